@@ -23,6 +23,14 @@ extensions = [
     "tardis_video",
     "tardis_html",
     "tardis_analytics",
+    "tardis_fingerprint",
+    "tardis_offline",
+    "tardis_compress",
+    "tardis_digest",
+    "tardis_weight",
+    "tardis_prefetch",
+    "tardis_search",
+    "tardis_tasks",
 ]
 
 myst_enable_extensions = [
@@ -38,8 +46,12 @@ myst_html_meta = {
     "align": "global",
 }
 
+# {{today}} : valeur fixe dans la configuration (myst_* → rebuild "env", une date
+# changeante relirait tous les documents chaque jour), remplacée par la date du
+# jour à l'écriture de chaque page (voir _resolve_today)
+_TODAY_MARKER = "@@TARDIS-TODAY@@"
 myst_substitutions = {
-    "today": datetime.now().strftime("%d.%m.%Y")
+    "today": _TODAY_MARKER
 }
 
 language = 'fr'
@@ -53,32 +65,39 @@ def _latex_escape(s):
         s = s.replace(ch, rep)
     return s
 
-_pub_date    = datetime.now().strftime("%d.%m.%Y")
-_author_tex  = _latex_escape(author)
 _logo_file   = "etml_logo_complet.png"
 
 latex_additional_files = [
     os.path.join(BASE_DIR, "themes", "pdf", "etml-2025", "images", _logo_file),
 ]
 
-latex_elements = {
-    'extrapackages': r'\usepackage{lastpage}',
-    'preamble': (
-        r'\setlength{\headheight}{24pt}' '\n'
-        r'\addtolength{\topmargin}{-12pt}' '\n'
-        r'\makeatletter' '\n'
-        r'\AtBeginDocument{%' '\n'
-        r'  \g@addto@macro\ps@normal{%' '\n'
-        r'    \fancyhead[L]{\includegraphics[height=0.7cm]{' + _logo_file + r'}}%' '\n'
-        r'    \fancyhead[R]{\small\leftmark}%' '\n'
-        r'    \fancyfoot[L]{\small Auteur~: ' + _author_tex + r'}%' '\n'
-        r'    \fancyfoot[C]{\small \thepage~/~\pageref*{LastPage}}%' '\n'
-        r'    \fancyfoot[R]{\small Publi\'{e} le~: ' + _pub_date + r'}%' '\n'
-        r'  }%' '\n'
-        r'}' '\n'
-        r'\makeatother'
-    ),
-}
+def _latex_elements():
+    """En-têtes et pieds de page PDF ; construits seulement pour un builder LaTeX."""
+    pub_date = datetime.now().strftime("%d.%m.%Y")
+    return {
+        'extrapackages': r'\usepackage{lastpage}',
+        'preamble': (
+            r'\setlength{\headheight}{24pt}' '\n'
+            r'\addtolength{\topmargin}{-12pt}' '\n'
+            r'\makeatletter' '\n'
+            r'\AtBeginDocument{%' '\n'
+            r'  \g@addto@macro\ps@normal{%' '\n'
+            r'    \fancyhead[L]{\includegraphics[height=0.7cm]{' + _logo_file + r'}}%' '\n'
+            r'    \fancyhead[R]{\small\leftmark}%' '\n'
+            r'    \fancyfoot[L]{\small Auteur~: ' + _latex_escape(author) + r'}%' '\n'
+            r'    \fancyfoot[C]{\small \thepage~/~\pageref*{LastPage}}%' '\n'
+            r'    \fancyfoot[R]{\small Publi\'{e} le~: ' + pub_date + r'}%' '\n'
+            r'  }%' '\n'
+            r'}' '\n'
+            r'\makeatother'
+        ),
+    }
+
+def _apply_latex_elements(app):
+    # Le builder LaTeX a lu latex_elements dans init() : on complète son contexte
+    if app.builder.format == 'latex':
+        app.config.latex_elements = {**_latex_elements(), **app.config.latex_elements}
+        app.builder.context.update(app.config.latex_elements)
 
 templates_path = ["_templates"]
 exclude_patterns = []
@@ -115,6 +134,23 @@ html_css_files = [
     "https://unpkg.com/monaco-editor@0.52.0/min/vs/editor/editor.main.css",
     "cards.css",
 ]
+# Post-traitement (minify + variantes .br/.gz + .htaccess) — activé en CI
+tardis_compress = os.getenv("TARDIS_COMPRESS", "") == "1"
+# Copies empreintées des assets du thème (etml.<hash>.css) + cache long
+tardis_fingerprint = os.getenv("TARDIS_FINGERPRINT", "") == "1"
+# Service worker + précache pour la consultation hors-ligne
+tardis_offline = os.getenv("TARDIS_OFFLINE", "") == "1"
+# Documents relus selon leur contenu (et non leur date) — .doctrees restauré en CI
+tardis_digest = os.getenv("TARDIS_DIGEST", "") == "1"
+# Rapport de poids des pages (_tardis/weight.json/.html) ; échec si budgets dépassés
+tardis_weight = os.getenv("TARDIS_WEIGHT", "") == "1"
+tardis_weight_fail = os.getenv("TARDIS_WEIGHT_FAIL", "") == "1"
+tardis_weight_remote = os.getenv("TARDIS_WEIGHT_REMOTE", "") == "1"
+# Préchargement (idle) du chapitre suivant/précédent et de ses assets
+tardis_prefetch = os.getenv("TARDIS_PREFETCH", "") == "1"
+# Index de recherche découpé par préfixe (_search/), chargé selon la requête
+tardis_search = os.getenv("TARDIS_SEARCH", "") == "1"
+
 html_js_files = [
     "page-title.js",
     "https://unpkg.com/monaco-editor@0.52.0/min/vs/loader.js",
@@ -124,3 +160,17 @@ html_js_files = [
 
 # -- Paths ---------------------------------------------------------------------
 sys.path.insert(0, os.path.abspath("."))
+
+
+def _resolve_today(app, doctree, docname):
+    from docutils import nodes
+
+    today = datetime.now().strftime("%d.%m.%Y")
+    for node in list(doctree.findall(nodes.Text)):
+        if _TODAY_MARKER in node:
+            node.parent.replace(node, nodes.Text(str(node).replace(_TODAY_MARKER, today)))
+
+
+def setup(app):
+    app.connect("builder-inited", _apply_latex_elements)
+    app.connect("doctree-resolved", _resolve_today)
@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Sphinx extension: post-traitement du site HTML (minify + .br/.gz)
+--------------------------------------------------------------------------
+Active si `tardis_compress = True` (conf.py : variable d'env TARDIS_COMPRESS=1).
+
+En fin de build HTML :
+- minifie de façon conservatrice les pages HTML et les CSS/JS issus des
+  thèmes TARDIS (html_static_path) : indentation, lignes vides, commentaires ;
+  <pre>, <textarea>, <script>, <style> et les template literals JS ne sont
+  jamais touchés ;
+- écrit des variantes précompressées `<fichier>.gz` (toujours) et
+  `<fichier>.br` (si le module `brotli` est installé) pour tous les fichiers
+  texte, de façon déterministe (gzip mtime=0) ;
+- écrit `.htaccess` (négociation Accept-Encoding via mod_rewrite) pour que
+  Apache serve directement les variantes, sans compression côté serveur.
+
+Le travail est réparti dans un pool de processus. Un fichier d'état
+(<outdir>/.tardis-compress.json) mémorise, pour chaque fichier traité,
+l'empreinte de la source (avant minification) et celle du fichier final :
+un fichier inchangé n'est pas recompressé, y compris les assets de
+html_static_path que Sphinx recopie à chaque build (seule la minification,
+peu coûteuse, est refaite). Les variantes .gz/.br dont la source a disparu
+sont supprimées.
+"""
+
+import hashlib
+import json
+import os
+import re
+import logging
+
+# gzip, brotli et le pool de processus ne sont importés qu'au premier fichier
+# traité : la plupart des builds (local, lint, LaTeX) n'en ont pas besoin
+_brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = '.tardis-compress.json'
+
+# Extensions compressées (le reste — images, vidéos, polices woff2 — l'est déjà)
+COMPRESSIBLE = ('.html', '.css', '.js', '.json', '.svg', '.txt', '.xml', '.map', '.ttf', '.otf', '.ico')
+
+# En dessous, le gain ne compense pas l'en-tête gzip/brotli
+MIN_SIZE = 512
+
+_HTML_RAW_RE = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.S | re.I)
+_HTML_COMMENT_RE = re.compile(r'<!--(?!\[if|<!|>).*?-->', re.S)
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+_CSS_STRING_RE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+
+
+# ---------------------------------------------------------------------------
+# Minification (conservatrice : ne change pas le rendu)
+# ---------------------------------------------------------------------------
+
+def minify_html(text: str) -> str:
+    parts = _HTML_RAW_RE.split(text)
+    out = []
+    # split() avec 2 groupes : [texte, bloc, nom_balise, texte, bloc, nom_balise, ...]
+    for i in range(0, len(parts), 3):
+        seg = _HTML_COMMENT_RE.sub('', parts[i])
+        seg = re.sub(r'\n[ \t]+', '\n', seg)
+        seg = re.sub(r'\n{2,}', '\n', seg)
+        out.append(seg)
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return ''.join(out)
+
+
+def minify_css(text: str) -> str:
+    text = _CSS_COMMENT_RE.sub('', text)
+    parts = _CSS_STRING_RE.split(text)
+    # Indices pairs : code CSS ; impairs : chaînes entre guillemets (intactes)
+    for i in range(0, len(parts), 2):
+        seg = re.sub(r'\s+', ' ', parts[i])
+        seg = re.sub(r'\s*([{};,])\s*', r'\1', seg)
+        parts[i] = seg.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def minify_js(text: str) -> str:
+    """Retire indentation, lignes vides et commentaires `//` pleine ligne.
+
+    Les retours à la ligne sont conservés (insertion automatique des `;`),
+    les lignes situées dans un template literal sont recopiées telles quelles.
+    """
+    out = []
+    in_template = False
+    for line in text.split('\n'):
+        if in_template:
+            out.append(line)
+        else:
+            s = line.strip()
+            if s and not s.startswith('//'):
+                out.append(s)
+        if len(re.findall(r'(?<!\\)`', line)) % 2:
+            in_template = not in_template
+    return '\n'.join(out) + '\n'
+
+
+_MINIFIERS = {'html': minify_html, 'css': minify_css, 'js': minify_js}
+
+
+# ---------------------------------------------------------------------------
+# Traitement d'un fichier (exécuté dans un processus du pool)
+# ---------------------------------------------------------------------------
+
+def brotli_module():
+    """Module brotli, ou None s'il n'est pas installé (importé au premier appel)."""
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+        except ImportError:
+            brotli = False
+        _brotli = brotli
+    return _brotli or None
+
+
+def minify_file(path: str, minify: str | None) -> tuple:
+    """Minifie le fichier sur place (optionnel) ; retourne (source, final) en octets."""
+    with open(path, 'rb') as fh:
+        source = fh.read()
+    data = source
+    if minify:
+        try:
+            text = source.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+        else:
+            small = _MINIFIERS[minify](text).encode('utf-8')
+            if len(small) < len(source):
+                data = small
+                with open(path, 'wb') as fh:
+                    fh.write(data)
+    return source, data
+
+
+def process_file(path: str, minify: str | None):
+    """Minifie (optionnel) puis écrit les variantes .gz/.br.
+
+    Retourne les empreintes [source, fichier final] et les tailles avant/après.
+    """
+    source, data = minify_file(path, minify)
+
+    sizes = {'raw': len(source), 'min': len(data)}
+    if len(data) >= MIN_SIZE:
+        import gzip
+
+        brotli = brotli_module()
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        with open(path + '.gz', 'wb') as fh:
+            fh.write(gz)
+        sizes['gz'] = len(gz)
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            with open(path + '.br', 'wb') as fh:
+                fh.write(br)
+            sizes['br'] = len(br)
+    # Variante d'un build précédent non réécrite (fichier devenu trop petit,
+    # brotli absent) : .htaccess la servirait à la place du nouveau contenu
+    for suffix in ('.gz', '.br'):
+        if suffix.lstrip('.') not in sizes and os.path.isfile(path + suffix):
+            os.remove(path + suffix)
+    digests = [hashlib.sha256(source).hexdigest(), hashlib.sha256(data).hexdigest()]
+    return digests, sizes
+
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# .htaccess
+# ---------------------------------------------------------------------------
+
+_MIME = {
+    'html': 'text/html',
+    'css': 'text/css',
+    'js': 'application/javascript',
+    'json': 'application/json',
+    'svg': 'image/svg+xml',
+    'txt': 'text/plain',
+    'xml': 'application/xml',
+    'map': 'application/json',
+    'ttf': 'font/ttf',
+    'otf': 'font/otf',
+    'ico': 'image/x-icon',
+}
+
+
+def write_htaccess_block(outdir: str, name: str, rules: str) -> None:
+    """Remplace (ou ajoute) le bloc `name` du .htaccess de `outdir`.
+
+    Chaque extension TARDIS gère son propre bloc, délimité par
+    `# BEGIN <name>` / `# END <name>` ; le reste du fichier est conservé.
+    """
+    path = os.path.join(outdir, '.htaccess')
+    try:
+        with open(path, encoding='utf-8') as fh:
+            content = fh.read()
+    except OSError:
+        content = ''
+    begin, end = f'# BEGIN {name}\n', f'# END {name}\n'
+    block = begin + rules.rstrip('\n') + '\n' + end
+    start = content.find(begin)
+    if start >= 0 and content.find(end, start) >= 0:
+        stop = content.find(end, start) + len(end)
+        content = content[:start] + block + content[stop:]
+    else:
+        content = (content + '\n' if content and not content.endswith('\n') else content) + block
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write(content)
+
+
+def htaccess_rules() -> str:
+    exts = '|'.join(e.lstrip('.') for e in COMPRESSIBLE)
+    lines = [
+        '# Variantes précompressées .br/.gz',
+        '<IfModule mod_rewrite.c>',
+        '  RewriteEngine On',
+        '  RewriteCond %{HTTP:Accept-Encoding} \\bbr\\b',
+        '  RewriteCond %{REQUEST_FILENAME} -f',
+        '  RewriteCond %{REQUEST_FILENAME}.br -f',
+        f'  RewriteRule ^(.+\\.({exts}))$ $1.br [L]',
+        '  RewriteCond %{HTTP:Accept-Encoding} \\bgzip\\b',
+        '  RewriteCond %{REQUEST_FILENAME} -f',
+        '  RewriteCond %{REQUEST_FILENAME}.gz -f',
+        f'  RewriteRule ^(.+\\.({exts}))$ $1.gz [L]',
+    ]
+    for ext, mime in _MIME.items():
+        for enc in ('br', 'gz'):
+            lines.append(f'  RewriteRule \\.{ext}\\.{enc}$ - [T={mime},E=no-gzip:1,E=no-brotli:1]')
+    lines += [
+        '</IfModule>',
+        '<IfModule mod_headers.c>',
+        '  <FilesMatch "\\.br$">',
+        '    Header set Content-Encoding br',
+        '    Header append Vary Accept-Encoding',
+        '  </FilesMatch>',
+        '  <FilesMatch "\\.gz$">',
+        '    Header set Content-Encoding gzip',
+        '    Header append Vary Accept-Encoding',
+        '  </FilesMatch>',
+        '</IfModule>',
+    ]
+    return '\n'.join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Événements Sphinx
+# ---------------------------------------------------------------------------
+
+def _theme_asset_names(app) -> set:
+    """Noms des CSS/JS fournis par les thèmes TARDIS (html_static_path)."""
+    names = set()
+    for static in app.config.html_static_path:
+        root = os.path.join(app.confdir, static)
+        if not os.path.isdir(root):
+            continue
+        for dirpath, _dirs, files in os.walk(root):
+            for name in files:
+                if name.endswith(('.css', '.js')):
+                    names.add(os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, '/'))
+    return names
+
+
+# Copies empreintées par tardis_fingerprint : etml.0123456789.css → etml.css
+_FINGERPRINT_RE = re.compile(r'\.[0-9a-f]{10}(?=\.[^./]+$)')
+
+
+def collect_targets(app):
+    """Retourne [(relpath, minify)] pour tous les fichiers compressibles."""
+    outdir = str(app.outdir)
+    theme_assets = _theme_asset_names(app)
+    targets = []
+    for dirpath, dirnames, filenames in os.walk(outdir):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        for name in sorted(filenames):
+            if name.startswith('.') or not name.endswith(COMPRESSIBLE):
+                continue
+            rel = os.path.relpath(os.path.join(dirpath, name), outdir).replace(os.sep, '/')
+            minify = None
+            if name.endswith('.html'):
+                minify = 'html'
+            elif rel.startswith('_static/') and \
+                    _FINGERPRINT_RE.sub('', rel[len('_static/'):]) in theme_assets:
+                minify = rel.rsplit('.', 1)[1]
+            targets.append((rel, minify))
+    return targets
+
+
+def on_build_finished(app, exception):
+    if exception:
+        return
+    if app.builder.format != 'html' or not app.config.tardis_compress:
+        return
+
+    outdir = str(app.outdir)
+    state_path = os.path.join(outdir, STATE_FILE)
+    try:
+        with open(state_path, encoding='utf-8') as fh:
+            state = json.load(fh)
+    except (OSError, ValueError):
+        state = {}
+
+    todo = []
+    new_state = {}
+    reminified = 0
+    for rel, minify in collect_targets(app):
+        path = os.path.join(outdir, rel)
+        previous = state.get(rel)
+        if isinstance(previous, list) and (
+                os.path.isfile(path + '.gz') or os.path.getsize(path) < MIN_SIZE):
+            current = _sha256_file(path)
+            if current == previous[1]:
+                new_state[rel] = previous
+                continue
+            if current == previous[0]:
+                # Source recopiée à l'identique (html_static_path) : variantes à jour
+                minify_file(path, minify)
+                new_state[rel] = previous
+                reminified += 1
+                continue
+        todo.append((rel, minify))
+
+    # Sources supprimées ou renommées : leurs variantes ne doivent plus être servies
+    removed = 0
+    for rel in state.keys() - new_state.keys() - {r for r, _m in todo}:
+        for suffix in ('.gz', '.br'):
+            variant = os.path.join(outdir, rel + suffix)
+            if os.path.isfile(variant):
+                os.remove(variant)
+                removed += 1
+
+    if brotli_module() is None:
+        logger.warning("tardis_compress: module 'brotli' absent — seules les variantes .gz sont écrites")
+
+    totals = {'raw': 0, 'min': 0, 'gz': 0, 'br': 0}
+    if todo:
+        from concurrent.futures import ProcessPoolExecutor
+
+        jobs = app.config.tardis_compress_jobs or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=min(jobs, len(todo))) as pool:
+            results = pool.map(
+                process_file,
+                [os.path.join(outdir, rel) for rel, _m in todo],
+                [m for _r, m in todo],
+                chunksize=16,
+            )
+            for (rel, _m), (digest, sizes) in zip(todo, results):
+                new_state[rel] = digest
+                for k, v in sizes.items():
+                    totals[k] += v
+
+    with open(state_path, 'w', encoding='utf-8') as fh:
+        json.dump(new_state, fh, indent=0, sort_keys=True)
+    write_htaccess_block(outdir, 'tardis_compress', htaccess_rules())
+
+    logger.info(
+        "tardis_compress: %d fichier(s) traités, %d inchangés (dont %d reminifiés), "
+        "%d variante(s) obsolète(s) supprimée(s) — %d → %d octets (gz %d, br %d)",
+        len(todo), len(new_state) - len(todo), reminified, removed,
+        totals['raw'], totals['min'], totals['gz'], totals['br'],
+    )
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+
+def setup(app):
+    app.add_config_value("tardis_compress", False, "html")
+    app.add_config_value("tardis_compress_jobs", 0, "html")
+    # Après les autres extensions (tardis_video copie ses fichiers en build-finished)
+    app.connect("build-finished", on_build_finished, priority=900)
+    return {
+        "version": "1.0",
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Sphinx extension: détection des documents modifiés par contenu
+-----------------------------------------------------------------------
+Active si `tardis_digest = True` (conf.py : variable d'env TARDIS_DIGEST=1).
+
+Sphinx relit un document dès que la date de son source (ou d'une de ses
+dépendances) est plus récente que sa dernière lecture. Un `actions/checkout`
+donne une date neuve à tous les fichiers : un .doctrees restauré depuis le
+cache CI est donc entièrement relu.
+
+Cette extension mémorise dans l'environnement une empreinte par document :
+contenu du source + contenu de ses dépendances notées par Sphinx
+(`env.dependencies`) :
+- inclusions {html} (html/ adjacent, notées par tardis_html) ;
+- vidéos {video} (video/ adjacent, notées par tardis_video) ;
+- images, dont celles de {card} :image: (notées par le collecteur d'images).
+
+Avant la lecture (`env-before-read-docs`), un document signalé par Sphinx
+uniquement à cause d'une date est retiré de la liste si son empreinte n'a
+pas changé. Restent toujours relus : nouveaux documents, changement de
+configuration, `reread_always`, toctrees globaux après ajout/suppression,
+doctree absent.
+"""
+
+import hashlib
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _file_digest(path: str, memo: dict):
+    """sha256 du contenu (None si absent) ; mémorisé pour la durée du build."""
+    if path in memo:
+        return memo[path]
+    h = hashlib.sha256()
+    try:
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+    except OSError:
+        digest = None
+    memo[path] = digest
+    return digest
+
+
+def doc_digest(env, docname: str, memo: dict) -> str:
+    """Empreinte du source et des dépendances d'un document."""
+    srcdir = str(env.srcdir)
+    h = hashlib.sha256()
+    h.update(str(_file_digest(str(env.doc2path(docname)), memo)).encode())
+    deps = sorted(str(dep) for dep in env.dependencies.get(docname, ()))
+    for dep in deps:
+        # Chemins relatifs : l'empreinte ne dépend pas du dossier de checkout
+        h.update(os.path.relpath(dep, srcdir).encode())
+        h.update(str(_file_digest(dep, memo)).encode())
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Événements Sphinx
+# ---------------------------------------------------------------------------
+
+def on_builder_inited(app):
+    app.tardis_digest_state = {'candidates': set(), 'read': [], 'memo': {}}
+
+
+def on_env_get_outdated(app, env, added, changed, removed):
+    """Retient les documents signalés « changed » qui peuvent être vérifiés."""
+    if not app.config.tardis_digest:
+        return []
+    candidates = set(changed) - set(env.reread_always)
+    if added or removed:
+        candidates -= env.glob_toctrees
+    app.tardis_digest_state['candidates'] = candidates
+    return []
+
+
+def on_env_before_read_docs(app, env, docnames):
+    """Retire (en place) les documents dont le contenu n'a pas changé."""
+    if not app.config.tardis_digest:
+        return
+    state = app.tardis_digest_state
+    digests = getattr(env, 'tardis_digests', {})
+    doctreedir = str(env.doctreedir)
+    skipped = []
+    now = time.time_ns() // 1_000
+    for docname in list(docnames):
+        if docname not in state['candidates'] or docname not in digests:
+            continue
+        if not os.path.isfile(os.path.join(doctreedir, docname + '.doctree')):
+            continue
+        if doc_digest(env, docname, state['memo']) != digests[docname]:
+            continue
+        docnames.remove(docname)
+        # Date de lecture rafraîchie (conservée si l'environnement est
+        # réenregistré) : les builds locaux reviennent à la comparaison de dates
+        env.all_docs[docname] = now
+        skipped.append(docname)
+    state['read'] = list(docnames)
+    if skipped:
+        logger.info("tardis_digest: %d document(s) inchangé(s) non relus, %d à relire",
+                    len(skipped), len(docnames))
+
+
+def on_env_purge_doc(app, env, docname):
+    if hasattr(env, 'tardis_digests'):
+        env.tardis_digests.pop(docname, None)
+
+
+def on_env_updated(app, env):
+    """Enregistre l'empreinte des documents lus (après fusion des lectures parallèles)."""
+    if not app.config.tardis_digest:
+        return []
+    if not hasattr(env, 'tardis_digests'):
+        env.tardis_digests = {}
+    state = app.tardis_digest_state
+    for docname in state['read']:
+        if docname in env.all_docs:
+            env.tardis_digests[docname] = doc_digest(env, docname, state['memo'])
+    state['read'] = []
+    return []
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+
+def setup(app):
+    # Rebuild "" : activer/désactiver ne force pas une relecture complète
+    app.add_config_value("tardis_digest", False, "")
+    app.connect("builder-inited", on_builder_inited)
+    app.connect("env-get-outdated", on_env_get_outdated)
+    app.connect("env-before-read-docs", on_env_before_read_docs)
+    app.connect("env-purge-doc", on_env_purge_doc)
+    app.connect("env-updated", on_env_updated)
+    return {
+        "version": "1.0",
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Sphinx extension: index des pages d'exercices
+-------------------------------------------------------
+Chargée automatiquement par tardis_textarea et tardis_qcm (setup_extension).
+
+Les directives {answer}, {qcm-answer}, {hole-answer}, {qcm} et
+{export-answers} signalent leur présence via `note_block()` pendant la
+lecture. En fin de build HTML, la liste des pages concernées est écrite
+dans <outdir>/_tardis/exercises.json :
+
+    {
+      "version": 1,
+      "pages": [
+        {
+          "docname": "obj1/exercices/exo-a",
+          "source": "obj1/exercices/exo-a.md",
+          "html": "obj1/exercices/exo-a.html",
+          "blocks": {"answer": 2, "qcm": 1, ...},
+          "total": 3,
+          "sha256": "<empreinte du HTML généré>"
+        }
+      ]
+    }
+
+L'étape PDF peut ainsi cibler directement les pages d'exercices et ne
+re-rendre que celles dont l'empreinte a changé.
+
+Configuration (conf.py) :
+    tardis_exercise_index = "_tardis/exercises.json"   # "" pour désactiver
+"""
+
+import hashlib
+import json
+import os
+import logging
+from collections import Counter
+
+from tardis_store import get_store
+
+logger = logging.getLogger(__name__)
+
+BLOCK_KINDS = ("answer", "qcm-answer", "hole-answer", "qcm", "export-answers")
+
+
+# ---------------------------------------------------------------------------
+# API pour les directives
+# ---------------------------------------------------------------------------
+
+def note_block(env, kind: str) -> None:
+    """Comptabilise un bloc `kind` dans le document en cours de lecture."""
+    get_store(env, 'exercises').add(env.docname, kind)
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _sha256_file(path: str) -> str | None:
+    h = hashlib.sha256()
+    try:
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b''):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def build_index(app) -> dict:
+    env = app.env
+    builder = app.builder
+    store = get_store(env, 'exercises')
+    pages = []
+    for docname in sorted(store):
+        counts = Counter(store.records(docname))
+        html = builder.get_target_uri(docname)
+        pages.append({
+            'docname': docname,
+            'source': os.path.relpath(env.doc2path(docname), env.srcdir).replace(os.sep, '/'),
+            'html': html,
+            'blocks': {k: counts[k] for k in BLOCK_KINDS if counts.get(k)},
+            'total': sum(counts.values()),
+            'sha256': _sha256_file(os.path.join(app.outdir, html)),
+        })
+    return {'version': 1, 'pages': pages}
+
+
+# ---------------------------------------------------------------------------
+# Événements Sphinx
+# ---------------------------------------------------------------------------
+
+def on_build_finished(app, exception):
+    """Écrit l'index des pages d'exercices à côté du site HTML."""
+    if exception:
+        return
+    if app.builder.format != 'html':
+        return
+    rel = app.config.tardis_exercise_index
+    if not rel:
+        return
+
+    index = build_index(app)
+    dest = os.path.join(app.outdir, rel)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    with open(dest, 'w', encoding='utf-8') as fh:
+        json.dump(index, fh, ensure_ascii=False, indent=1)
+    logger.info("tardis_exercises: %d page(s) d'exercices → %s", len(index['pages']), dest)
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+
+def setup(app):
+    app.setup_extension("tardis_store")
+    app.add_config_value("tardis_exercise_index", "_tardis/exercises.json", "html")
+    app.connect("build-finished", on_build_finished)
+    return {
+        "version": "1.0",
+        "env_version": 2,
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Sphinx extension: empreinte de contenu des assets du thème
+--------------------------------------------------------------------
+Active si `tardis_fingerprint = True` (conf.py : variable d'env TARDIS_FINGERPRINT=1).
+
+En fin de build HTML, chaque fichier copié dans _static/ depuis les thèmes
+TARDIS (html_static_path : themes/sphinx/<thème>, themes/sphinx/js) reçoit
+une copie nommée d'après son contenu :
+
+    _static/etml.css        → _static/etml.3f2a9c1d0b.css
+    _static/responses.js    → _static/responses.8e41aa07c2.js
+
+- les url(...) des CSS sont réécrites vers les polices/images empreintées
+  (avant le calcul de l'empreinte du CSS) ;
+- toutes les pages HTML sont réécrites (`_static/etml.css?v=…` →
+  `_static/etml.3f2a9c1d0b.css`), y compris celles non régénérées par un
+  build incrémental ;
+- la table de correspondance est écrite dans <outdir>/_tardis/assets.json ;
+- un bloc .htaccess pose `Cache-Control: immutable` sur 1 an pour les
+  fichiers empreintés (leur nom change à chaque modification).
+
+Les fichiers d'origine restent en place pour les URL construites en JS
+(ex. customToggle.js) ; les copies empreintées obsolètes sont supprimées.
+"""
+
+import hashlib
+import json
+import os
+import re
+import logging
+
+from tardis_compress import write_htaccess_block
+
+logger = logging.getLogger(__name__)
+
+ASSET_MAP = os.path.join('_tardis', 'assets.json')
+HASH_LEN = 10
+
+_FINGERPRINT_RE = re.compile(r'\.[0-9a-f]{%d}(?=\.[^./]+$)' % HASH_LEN)
+# Références _static/... dans les pages (href, src, url(), JSON Sphinx)
+_STATIC_REF_RE = re.compile(r'_static/([^"\'\s()?#<>]+)(\?v=[0-9a-f]+)?')
+_CSS_URL_RE = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)')
+
+CACHE_RULES = '''\
+# Assets empreintés : le nom change avec le contenu → cache long, sans revalidation
+<IfModule mod_headers.c>
+  <FilesMatch "\\.[0-9a-f]{%d}\\.[A-Za-z0-9]+(\\.(br|gz))?$">
+    Header set Cache-Control "public, max-age=31536000, immutable"
+  </FilesMatch>
+</IfModule>''' % HASH_LEN
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def fingerprinted_name(rel: str, data: bytes) -> str:
+    """`css/etml.css` + contenu → `css/etml.<hash>.css`."""
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LEN]
+    stem, ext = os.path.splitext(rel)
+    return f'{stem}.{digest}{ext}'
+
+
+def theme_static_files(app) -> list:
+    """Chemins (relatifs à _static/) des fichiers fournis par html_static_path."""
+    rels = set()
+    for static in app.config.html_static_path:
+        root = os.path.join(app.confdir, static)
+        if not os.path.isdir(root):
+            continue
+        for dirpath, _dirs, files in os.walk(root):
+            for name in files:
+                rels.add(os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, '/'))
+    return sorted(rels)
+
+
+def _rewrite_css_urls(text: str, css_rel: str, mapping: dict) -> str:
+    base = os.path.dirname(css_rel)
+
+    def repl(m):
+        quote, url = m.group(1), m.group(2)
+        if url.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return m.group(0)
+        path, sep, suffix = url.partition('?')
+        if not sep:
+            path, sep, suffix = url.partition('#')
+        target = os.path.normpath(os.path.join(base, path)).replace(os.sep, '/')
+        if target not in mapping:
+            return m.group(0)
+        new = os.path.relpath(mapping[target], base or '.').replace(os.sep, '/')
+        return f'url({quote}{new}{sep}{suffix}{quote})'
+
+    return _CSS_URL_RE.sub(repl, text)
+
+
+def build_mapping(static_dir: str, rels: list) -> dict:
+    """Écrit les copies empreintées et retourne {original: empreinté}.
+
+    Les CSS sont traités en dernier : leurs url() pointent vers des polices
+    et images déjà empreintées.
+    """
+    mapping = {}
+    present = [r for r in rels if os.path.isfile(os.path.join(static_dir, r))]
+    for rel in sorted(present, key=lambda r: r.endswith('.css')):
+        src = os.path.join(static_dir, rel)
+        with open(src, 'rb') as fh:
+            data = fh.read()
+        if rel.endswith('.css'):
+            try:
+                text = data.decode('utf-8')
+            except UnicodeDecodeError:
+                pass
+            else:
+                data = _rewrite_css_urls(text, rel, mapping).encode('utf-8')
+        new_rel = fingerprinted_name(rel, data)
+        dest = os.path.join(static_dir, new_rel)
+        if not os.path.isfile(dest):
+            with open(dest, 'wb') as fh:
+                fh.write(data)
+        mapping[rel] = new_rel
+    return mapping
+
+
+def rewrite_page(path: str, mapping: dict) -> bool:
+    """Remplace les références _static/ d'une page. Retourne True si modifiée."""
+    with open(path, encoding='utf-8') as fh:
+        text = fh.read()
+
+    def repl(m):
+        rel = _FINGERPRINT_RE.sub('', m.group(1))
+        new = mapping.get(rel)
+        return f'_static/{new}' if new else m.group(0)
+
+    new_text = _STATIC_REF_RE.sub(repl, text)
+    if new_text == text:
+        return False
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write(new_text)
+    return True
+
+
+def _remove_stale(static_dir: str, old: dict, mapping: dict) -> None:
+    live = set(mapping.values())
+    for rel in old.values():
+        if rel not in live:
+            for variant in ('', '.gz', '.br'):
+                try:
+                    os.remove(os.path.join(static_dir, rel + variant))
+                except OSError:
+                    pass
+
+
+# ---------------------------------------------------------------------------
+# Événements Sphinx
+# ---------------------------------------------------------------------------
+
+def on_build_finished(app, exception):
+    if exception:
+        return
+    if app.builder.format != 'html' or not app.config.tardis_fingerprint:
+        return
+
+    outdir = str(app.outdir)
+    static_dir = os.path.join(outdir, '_static')
+    map_path = os.path.join(outdir, ASSET_MAP)
+    try:
+        with open(map_path, encoding='utf-8') as fh:
+            old = json.load(fh)
+    except (OSError, ValueError):
+        old = {}
+
+    mapping = build_mapping(static_dir, theme_static_files(app))
+
+    rewritten = 0
+    for dirpath, dirnames, filenames in os.walk(outdir):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.') and d != '_static']
+        for name in filenames:
+            if name.endswith('.html') and rewrite_page(os.path.join(dirpath, name), mapping):
+                rewritten += 1
+
+    _remove_stale(static_dir, old, mapping)
+
+    os.makedirs(os.path.dirname(map_path), exist_ok=True)
+    with open(map_path, 'w', encoding='utf-8') as fh:
+        json.dump(mapping, fh, indent=1, sort_keys=True)
+    write_htaccess_block(outdir, 'tardis_fingerprint', CACHE_RULES)
+
+    logger.info("tardis_fingerprint: %d asset(s) empreintés, %d page(s) réécrites",
+                len(mapping), rewritten)
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+
+def setup(app):
+    app.add_config_value("tardis_fingerprint", False, "html")
+    # Avant tardis_compress (priorité 900) pour que les copies soient compressées
+    app.connect("build-finished", on_build_finished, priority=800)
+    return {
+        "version": "1.0",
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Sphinx extension: mode hors-ligne (service worker + précache)
+----------------------------------------------------------------------
+Active si `tardis_offline = True` (conf.py : variable d'env TARDIS_OFFLINE=1).
+
+En fin de build HTML, écrit à la racine du site :
+- `sw.js` : service worker dont la liste de précache est embarquée (une
+  nouvelle liste change les octets de sw.js → le navigateur installe la
+  nouvelle version) ;
+- `_tardis/precache.json` : la même liste, pour inspection.
+
+La liste couvre les pages HTML du module et les fichiers de _static/
+(assets du thème themes/sphinx/<thème>, vidéos copiées par tardis_video,
+CSS/JS Sphinx) sous `tardis_offline_max_bytes`. Les inclusions {html} sont
+injectées dans les pages et donc couvertes par celles-ci. Chaque entrée porte
+l'empreinte de son contenu : après un redéploiement, seuls les fichiers
+modifiés sont re-téléchargés.
+
+Le service worker ne touche ni au localStorage (réponses des élèves gérées
+par responses.js), ni aux requêtes autres que GET, et ne recharge jamais la
+page : une nouvelle version prend effet à la navigation suivante.
+"""
+
+import hashlib
+import json
+import os
+import re
+import logging
+
+from tardis_compress import process_file
+
+logger = logging.getLogger(__name__)
+
+SW_NAME = 'sw.js'
+MANIFEST = os.path.join('_tardis', 'precache.json')
+
+# Variantes et fichiers de service jamais mis en cache
+_SKIP_SUFFIXES = ('.gz', '.br', '.map', '.buildinfo')
+_SKIP_DIRS = ('_sources', '_tardis')
+_FINGERPRINT_RE = re.compile(r'\.[0-9a-f]{10}(?=\.[^./]+$)')
+
+REGISTER_JS = """\
+if ("serviceWorker" in navigator) {
+  window.addEventListener("load", function () {
+    var root = document.documentElement.dataset.content_root || "./";
+    navigator.serviceWorker.register(root + "sw.js", { scope: root }).catch(function () {});
+  });
+}"""
+
+SW_TEMPLATE = """\
+// Généré par tardis_offline — ne pas modifier.
+const PRECACHE = __PRECACHE__;
+const BASE = new URL("./", self.location).href;
+// Un cache par portée : modules et branches partagent la même origine
+const CACHE = "tardis-precache-" + self.registration.scope;
+const REVS = new Map(PRECACHE.map(([u, r]) => [new URL(u, BASE).href, r]));
+const keyFor = (url, rev) => url + "?__rev=" + rev;
+
+self.addEventListener("install", (event) => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(CACHE);
+    const queue = [...REVS];
+    // Quelques téléchargements en parallèle ; un échec (Wi-Fi instable)
+    // ne bloque pas l'installation, l'entrée sera servie par le réseau.
+    const worker = async () => {
+      while (queue.length) {
+        const [url, rev] = queue.shift();
+        const key = keyFor(url, rev);
+        if (await cache.match(key)) continue;
+        try {
+          const resp = await fetch(url, { cache: "no-cache" });
+          if (resp.ok) await cache.put(key, resp);
+        } catch (e) {}
+      }
+    };
+    await Promise.all(Array.from({ length: 4 }, worker));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil((async () => {
+    const wanted = new Set([...REVS].map(([u, r]) => keyFor(u, r)));
+    const cache = await caches.open(CACHE);
+    for (const req of await cache.keys()) {
+      if (!wanted.has(req.url)) await cache.delete(req);
+    }
+    await self.clients.claim();
+  })());
+});
+
+async function partial(resp, range) {
+  const buf = await resp.arrayBuffer();
+  const m = /bytes=(\\d*)-(\\d*)/.exec(range) || [];
+  const size = buf.byteLength;
+  const start = m[1] ? Number(m[1]) : (m[2] ? size - Number(m[2]) : 0);
+  const end = m[1] && m[2] ? Math.min(Number(m[2]), size - 1) : size - 1;
+  return new Response(buf.slice(start, end + 1), {
+    status: 206,
+    headers: {
+      "Content-Type": resp.headers.get("Content-Type") || "",
+      "Content-Range": `bytes ${start}-${end}/${size}`,
+      "Content-Length": String(end - start + 1),
+    },
+  });
+}
+
+self.addEventListener("fetch", (event) => {
+  const req = event.request;
+  if (req.method !== "GET") return;
+  const url = new URL(req.url);
+  url.hash = "";
+  url.search = "";
+  let href = url.href;
+  if (req.mode === "navigate" && href.endsWith("/")) href += "index.html";
+  const rev = REVS.get(href);
+  if (!rev) return;
+  event.respondWith((async () => {
+    const cache = await caches.open(CACHE);
+    const hit = await cache.match(keyFor(href, rev));
+    if (!hit) return fetch(req);
+    const range = req.headers.get("Range");
+    return range ? partial(hit, range) : hit;
+  })());
+});
+"""
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _revision(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def collect_precache(outdir: str, max_bytes: int, exclude=()) -> list:
+    """Retourne [[url relative, révision]] triée, prête pour sw.js (hors `exclude`)."""
+    rels = []
+    for dirpath, dirnames, filenames in os.walk(outdir):
+        dirnames[:] = sorted(
+            d for d in dirnames if not d.startswith('.') and d not in _SKIP_DIRS
+        )
+        for name in sorted(filenames):
+            if name.startswith('.') or name == SW_NAME or name.endswith(_SKIP_SUFFIXES):
+                continue
+            rels.append(os.path.relpath(os.path.join(dirpath, name), outdir).replace(os.sep, '/'))
+
+    # Si tardis_fingerprint est actif, seules les copies empreintées sont référencées
+    fingerprinted = {_FINGERPRINT_RE.sub('', r) for r in rels if _FINGERPRINT_RE.search(r)}
+
+    entries = []
+    skipped = 0
+    for rel in rels:
+        if rel in fingerprinted or rel in exclude:
+            continue
+        path = os.path.join(outdir, rel)
+        if not rel.endswith('.html') and os.path.getsize(path) > max_bytes:
+            skipped += 1
+            continue
+        entries.append([rel, _revision(path)])
+    if skipped:
+        logger.info("tardis_offline: %d fichier(s) au-delà de %d octets non précachés",
+                    skipped, max_bytes)
+    return entries
+
+
+# ---------------------------------------------------------------------------
+# Événements Sphinx
+# ---------------------------------------------------------------------------
+
+def on_builder_inited(app):
+    if app.builder.format != 'html' or not app.config.tardis_offline:
+        return
+    app.add_js_file(None, body=REGISTER_JS)
+
+
+def on_build_finished(app, exception):
+    if exception:
+        return
+    if app.builder.format != 'html' or not app.config.tardis_offline:
+        return
+
+    outdir = str(app.outdir)
+    # Avec tardis_search, la recherche passe par _search/ : searchindex.js n'est plus téléchargé
+    exclude = ('searchindex.js',) if getattr(app.config, 'tardis_search', False) else ()
+    entries = collect_precache(outdir, app.config.tardis_offline_max_bytes, exclude)
+
+    manifest_path = os.path.join(outdir, MANIFEST)
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as fh:
+        json.dump(entries, fh, indent=0)
+
+    sw = SW_TEMPLATE.replace('__PRECACHE__', json.dumps(entries, separators=(',', ':')))
+    sw_path = os.path.join(outdir, SW_NAME)
+    with open(sw_path, 'w', encoding='utf-8') as fh:
+        fh.write(sw)
+    if getattr(app.config, 'tardis_compress', False):
+        process_file(sw_path, None)
+
+    logger.info("tardis_offline: %d entrée(s) dans le précache → %s", len(entries), SW_NAME)
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+
+def setup(app):
+    app.add_config_value("tardis_offline", False, "html")
+    # Taille max. d'un fichier précaché (hors pages HTML) — 5 Mo par défaut
+    app.add_config_value("tardis_offline_max_bytes", 5 * 1024 * 1024, "html")
+    app.connect("builder-inited", on_builder_inited)
+    # Après tardis_video, tardis_fingerprint (800) et tardis_compress (900) :
+    # les révisions portent sur les octets réellement servis
+    app.connect("build-finished", on_build_finished, priority=950)
+    return {
+        "version": "1.0",
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Sphinx extension: préchargement des chapitres voisins
+--------------------------------------------------------------
+Active si `tardis_prefetch = True` (conf.py : variable d'env TARDIS_PREFETCH=1).
+
+Chaque page HTML reçoit un petit script qui, une fois la page chargée et le
+navigateur au repos (requestIdleCallback), ajoute des <link rel="prefetch">
+vers :
+
+1. la page suivante puis la page précédente, dans l'ordre du sommaire résolu
+   (celui de sphinx_external_toc, tel que Sphinx le calcule pour ses liens
+   « suivant / précédent ») ;
+2. les assets TARDIS de ces pages : images (_images/) et vidéos copiées par
+   tardis_video (_static/<docdir>/video/).
+
+Les {html} étant injectés dans la page, ils sont couverts par celle-ci.
+
+Les assets sont retenus dans cet ordre tant que leur taille cumulée reste
+sous `tardis_prefetch_max_bytes` (1 Mo par défaut) ; les pages elles-mêmes
+sont toujours retenues. Rien n'est préchargé si le navigateur signale
+Save-Data (navigator.connection.saveData) ou une connexion 2G.
+"""
+
+import json
+import os
+import logging
+
+from sphinx.util.osutil import relative_uri
+
+from tardis_store import get_store
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_JS = """\
+(function () {
+  var c = navigator.connection;
+  if (c && (c.saveData || /2g/.test(c.effectiveType || ""))) return;
+  var urls = __URLS__;
+  function go() {
+    urls.forEach(function (u) {
+      var l = document.createElement("link");
+      l.rel = "prefetch";
+      l.href = u;
+      document.head.appendChild(l);
+    });
+  }
+  window.addEventListener("load", function () {
+    if ("requestIdleCallback" in window) requestIdleCallback(go, { timeout: 3000 });
+    else setTimeout(go, 1500);
+  });
+})();"""
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def doc_assets(app) -> dict:
+    """
+    {docname: [(chemin relatif au site, taille)]} : images et vidéos de chaque
+    document, calculé une fois par build et par processus d'écriture.
+    """
+    assets = getattr(app.builder, 'tardis_prefetch_assets', None)
+    if assets is not None:
+        return assets
+
+    env = app.env
+    srcdir = str(app.srcdir)
+    assets = {}
+    imgpath = getattr(app.builder, 'imagedir', '_images')
+    for src, (docnames, uniquename) in env.images.items():
+        if '://' in src:
+            continue
+        size = _size(os.path.join(srcdir, src))
+        for docname in docnames:
+            assets.setdefault(docname, []).append((f'{imgpath}/{uniquename}', size))
+
+    for docname, (docdir, filename) in get_store(env, 'video').items():
+        rel = f'_static/{docdir}/video/{filename}' if docdir else f'_static/video/{filename}'
+        size = _size(os.path.join(srcdir, docdir, 'video', filename))
+        assets.setdefault(docname, []).append((rel, size))
+
+    for entries in assets.values():
+        entries.sort()
+    app.builder.tardis_prefetch_assets = assets
+    return assets
+
+
+def prefetch_urls(app, pagename: str) -> list:
+    """URL (relatives à la page) à précharger : voisins puis leurs assets sous le plafond."""
+    relations = getattr(app.builder, 'relations', {}).get(pagename)
+    if not relations:
+        return []
+    _parent, prev, nxt = relations
+    neighbours = [doc for doc in (nxt, prev) if doc and doc != pagename]
+    if not neighbours:
+        return []
+
+    builder = app.builder
+    base = builder.get_target_uri(pagename)
+    urls = [builder.get_relative_uri(pagename, doc) for doc in neighbours]
+
+    budget = int(app.config.tardis_prefetch_max_bytes)
+    seen = set()
+    assets = doc_assets(app)
+    for doc in neighbours:
+        for rel, size in assets.get(doc, ()):
+            if rel in seen or size > budget:
+                continue
+            seen.add(rel)
+            budget -= size
+            urls.append(relative_uri(base, rel))
+    return urls
+
+
+# ---------------------------------------------------------------------------
+# Événements Sphinx
+# ---------------------------------------------------------------------------
+
+def on_env_updated(app, env):
+    # Application réutilisée (tardis.py serve) : images et vidéos ont pu changer
+    app.builder.tardis_prefetch_assets = None
+
+
+def on_html_page_context(app, pagename, templatename, context, doctree):
+    if not app.config.tardis_prefetch or app.builder.format != 'html':
+        return
+    urls = prefetch_urls(app, pagename)
+    if not urls:
+        return
+    data = json.dumps(urls, ensure_ascii=False, separators=(',', ':')).replace('<', '\\u003c')
+    # Appelé pendant html-page-context : le script n'est ajouté qu'à cette page
+    app.add_js_file(None, body=PREFETCH_JS.replace('__URLS__', data))
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+
+def setup(app):
+    app.setup_extension("tardis_store")
+    app.add_config_value("tardis_prefetch", False, "html")
+    # Plafond cumulé des assets préchargés par page (les pages HTML en sont exclues)
+    app.add_config_value("tardis_prefetch_max_bytes", 1024 * 1024, "html")
+    app.connect("env-updated", on_env_updated)
+    app.connect("html-page-context", on_html_page_context)
+    return {
+        "version": "1.0",
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
@@ -27,6 +27,9 @@ from docutils import nodes
 from sphinx.util.docutils import SphinxDirective
 from docutils.parsers.rst import directives
 
+from tardis_exercises import note_block
+from tardis_store import get_store
+
 
 class qcm_node(nodes.General, nodes.Element):
     """Nœud Docutils pour les blocs {qcm}."""
@@ -55,11 +58,12 @@ class QcmDirective(SphinxDirective):
 
     def run(self):
         env = self.env
-        env.tardis_qcm_counter = getattr(env, "tardis_qcm_counter", {})
         doc = env.docname
-        env.tardis_qcm_counter[doc] = env.tardis_qcm_counter.get(doc, 0) + 1
+        # Rang du QCM dans le document (remis à zéro quand le document est relu)
+        rank = get_store(env, "qcm").add(doc, self.options.get("id", ""))
+        note_block(env, "qcm")
 
-        qid = self.options.get("id") or f"{doc.replace('/','_')}__qcm{env.tardis_qcm_counter[doc]}"
+        qid = self.options.get("id") or f"{doc.replace('/','_')}__qcm{rank}"
         label = self.options.get("label", "")
         multiple = _bool(self.options.get("multiple_answers", "true"))
         feedback_right = self.options.get("feedback_right", "Correct.")
@@ -220,6 +224,8 @@ def depart_qcm_latex(self, node: qcm_node):
 
 
 def setup(app):
+    app.setup_extension("tardis_store")
+    app.setup_extension("tardis_exercises")
     app.add_node(
         qcm_node,
         html=(visit_qcm_html, depart_qcm_html),
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Sphinx extension: index de recherche découpé et chargé à la demande
+---------------------------------------------------------------------------
+Active si `tardis_search = True` (conf.py : variable d'env TARDIS_SEARCH=1).
+
+Le `searchindex.js` de Sphinx contient tous les termes du module : la page de
+recherche le télécharge et l'analyse en entier à chaque visite. En fin de
+build HTML, cette extension le découpe :
+
+- `_search/index.js` : carte racine (documents, titres, objets…) sans les
+  termes, plus la table préfixe → fragment et le chargeur ;
+- `_search/t-<préfixe>.<empreinte>.json` : les termes (texte et titres)
+  commençant par les `tardis_search_prefix` premiers caractères, avec les
+  champs TARDIS pondérés. Le nom change avec le contenu : cache long possible.
+
+La page de recherche charge `_search/index.js` à la place de
+`searchindex.js` (`pathto` redirigé pour cette seule page). Le chargeur
+racinise la requête comme searchtools.js (Stemmer, stopwords), ne récupère
+que les fragments des préfixes concernés puis appelle `Search.setIndex`.
+Les correspondances partielles de Sphinx se limitent donc aux termes de
+même préfixe.
+
+Champs TARDIS indexés avec un poids (`tardis_search_weights`) : titres de
+{card}, labels de {qcm} / {qcm-answer}, texte des {hole-answer}. Ces textes,
+portés par des attributs de nœuds, échappent à l'indexeur de Sphinx : leurs
+termes sont ajoutés aux fragments et `Scorer.score` ajoute le poids du champ
+au score des pages concernées.
+
+`searchindex.js` reste écrit tel quel : Sphinx le relit lors des builds
+incrémentaux.
+"""
+
+import hashlib
+import json
+import os
+import re
+import logging
+
+from docutils import nodes
+
+from tardis_cards import tardis_card
+from tardis_qcm import qcm_node
+from tardis_store import get_store
+from tardis_textarea import HOLE_RE, hole_answer_node, qcm_answer_node
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DIR = '_search'
+LOADER = f'{SEARCH_DIR}/index.js'
+
+_SETINDEX_RE = re.compile(r'^\s*Search\.setIndex\((.*)\)\s*;?\s*$', re.S)
+
+LOADER_TEMPLATE = """\
+// Généré par tardis_search — ne pas modifier.
+(function () {
+  const ROOT = __ROOT__;
+  const SHARDS = __SHARDS__;
+  const PREFIX = __PREFIX__;
+  const base = new URL(".", document.currentScript.src);
+  const query = new URLSearchParams(window.location.search).get("q") || "";
+
+  // Même découpage et racinisation que Search._parseQuery (searchtools.js)
+  const stemmer = new Stemmer();
+  const stems = new Set();
+  splitQuery(query.trim()).forEach((term) => {
+    const lower = term.toLowerCase();
+    if (stopwords.has(lower) || lower.match(/^\\d+$/)) return;
+    const word = stemmer.stemWord(lower);
+    stems.add(word[0] === "-" ? word.substr(1) : word);
+  });
+  const wanted = new Set([...stems].map((w) => w.slice(0, PREFIX)).filter((p) => SHARDS[p]));
+
+  const fields = {};
+  const scorer = Scorer.score;
+  Scorer.score = (result) => {
+    let score = scorer ? scorer(result) : result[4];
+    const doc = ROOT.docnames.indexOf(result[0]);
+    stems.forEach((w) => { score += (fields[w] && fields[w][doc]) || 0; });
+    return score;
+  };
+
+  Promise.all([...wanted].map((p) =>
+    fetch(new URL(SHARDS[p], base)).then((r) => r.json()).catch(() => ({}))
+  )).then((shards) => {
+    const index = Object.assign({}, ROOT, { terms: {}, titleterms: {} });
+    shards.forEach((s) => {
+      Object.assign(index.terms, s.terms);
+      Object.assign(index.titleterms, s.titleterms);
+      Object.assign(fields, s.fields);
+    });
+    Search.setIndex(index);
+  });
+})();
+"""
+
+
+# ---------------------------------------------------------------------------
+# Collecte des champs TARDIS (lecture)
+# ---------------------------------------------------------------------------
+
+def field_texts(doctree):
+    """(champ, texte) des blocs TARDIS dont le texte n'est pas dans l'arbre."""
+    for node in doctree.findall(nodes.Element):
+        if isinstance(node, tardis_card):
+            yield 'card', node.get('title', '')
+        elif isinstance(node, (qcm_node, qcm_answer_node)):
+            yield 'qcm', node.get('label', '')
+        elif isinstance(node, hole_answer_node):
+            yield 'hole', ' '.join((node.get('label', ''), HOLE_RE.sub(' ', node['content'])))
+
+
+def on_doctree_read(app, doctree):
+    if not app.config.tardis_search:
+        return
+    store = get_store(app.env, 'search')
+    for field, text in field_texts(doctree):
+        if text.strip():
+            store.add(app.env.docname, (field, text))
+
+
+# ---------------------------------------------------------------------------
+# Découpage (fin de build)
+# ---------------------------------------------------------------------------
+
+def _shard_name(prefix: str, payload: bytes) -> str:
+    safe = ''.join(c if c.isascii() and c.isalnum() else f'_{ord(c):x}' for c in prefix)
+    return f't-{safe}.{hashlib.sha256(payload).hexdigest()[:10]}.json'
+
+
+def field_postings(app, docnames: list) -> dict:
+    """{terme racinisé: {indice du document: poids}} pour les champs TARDIS."""
+    lang = app.builder.indexer.lang
+    weights = {k: int(v) for k, v in app.config.tardis_search_weights.items()}
+    doc_index = {doc: i for i, doc in enumerate(docnames)}
+    postings = {}
+    for docname, (field, text) in get_store(app.env, 'search').items():
+        idx = doc_index.get(docname)
+        weight = weights.get(field, 0)
+        if idx is None or not weight:
+            continue
+        for word in lang.split(text):
+            stemmed = lang.stem(word).lower()
+            if not lang.word_filter(stemmed):
+                if not lang.word_filter(word):
+                    continue
+                stemmed = word.lower()
+            docs = postings.setdefault(stemmed, {})
+            docs[idx] = max(docs.get(idx, 0), weight)
+    return postings
+
+
+def split_index(index: dict, fields: dict, prefix_len: int) -> tuple:
+    """Retourne (carte racine, {préfixe: fragment})."""
+    root = {k: v for k, v in index.items() if k not in ('terms', 'titleterms')}
+    shards = {}
+
+    def shard(term):
+        return shards.setdefault(term[:prefix_len], {'terms': {}, 'titleterms': {}, 'fields': {}})
+
+    for key in ('terms', 'titleterms'):
+        for term, docs in index.get(key, {}).items():
+            shard(term)[key][term] = docs
+    for term, docs in fields.items():
+        entry = shard(term)
+        entry['fields'][term] = {str(i): w for i, w in sorted(docs.items())}
+        # Un document trouvé seulement via un champ TARDIS doit aussi être un résultat
+        known = entry['terms'].get(term, [])
+        known = [known] if isinstance(known, int) else list(known)
+        merged = sorted(set(known) | set(docs))
+        entry['terms'][term] = merged[0] if len(merged) == 1 else merged
+    return root, shards
+
+
+def write_shards(outdir: str, root: dict, shards: dict, prefix_len: int) -> dict:
+    """Écrit fragments et chargeur ; supprime les fragments obsolètes. Retourne les tailles."""
+    search_dir = os.path.join(outdir, SEARCH_DIR)
+    os.makedirs(search_dir, exist_ok=True)
+    names = {}
+    sizes = {'shards': 0, 'largest': 0}
+    for prefix, data in sorted(shards.items()):
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'),
+                             sort_keys=True).encode('utf-8')
+        name = _shard_name(prefix, payload)
+        names[prefix] = name
+        path = os.path.join(search_dir, name)
+        if not os.path.isfile(path):
+            with open(path, 'wb') as fh:
+                fh.write(payload)
+        sizes['shards'] += len(payload)
+        sizes['largest'] = max(sizes['largest'], len(payload))
+
+    keep = set(names.values())
+    for name in os.listdir(search_dir):
+        if name.startswith('t-') and name.split('.json')[0] + '.json' not in keep:
+            os.remove(os.path.join(search_dir, name))
+
+    loader = (LOADER_TEMPLATE
+              .replace('__ROOT__', json.dumps(root, ensure_ascii=False, separators=(',', ':')))
+              .replace('__SHARDS__', json.dumps(names, ensure_ascii=False, separators=(',', ':')))
+              .replace('__PREFIX__', str(prefix_len)))
+    with open(os.path.join(outdir, LOADER), 'w', encoding='utf-8') as fh:
+        fh.write(loader)
+    sizes['root'] = len(loader.encode('utf-8'))
+    sizes['count'] = len(names)
+    return sizes
+
+
+# ---------------------------------------------------------------------------
+# Événements Sphinx
+# ---------------------------------------------------------------------------
+
+def _enabled(app) -> bool:
+    return (app.config.tardis_search and app.builder.format == 'html'
+            and getattr(app.builder, 'indexer', None) is not None)
+
+
+def on_html_page_context(app, pagename, templatename, context, doctree):
+    if pagename != 'search' or not _enabled(app) or 'pathto' not in context:
+        return
+    pathto = context['pathto']
+
+    def tardis_pathto(otheruri, *args, **kwargs):
+        if otheruri == app.builder.searchindex_filename:
+            otheruri = LOADER
+        return pathto(otheruri, *args, **kwargs)
+
+    context['pathto'] = tardis_pathto
+
+
+def on_build_finished(app, exception):
+    if exception or not _enabled(app):
+        return
+    outdir = str(app.outdir)
+    index_path = os.path.join(outdir, app.builder.searchindex_filename)
+    try:
+        with open(index_path, encoding='utf-8') as fh:
+            match = _SETINDEX_RE.match(fh.read())
+        index = json.loads(match.group(1)) if match else None
+    except (OSError, ValueError):
+        index = None
+    if not index:
+        logger.warning("tardis_search: %s illisible — index non découpé", index_path)
+        return
+
+    prefix_len = max(1, int(app.config.tardis_search_prefix))
+    fields = field_postings(app, index.get('docnames', []))
+    root, shards = split_index(index, fields, prefix_len)
+    sizes = write_shards(outdir, root, shards, prefix_len)
+    logger.info(
+        "tardis_search: searchindex.js %.1f Ko → racine %.1f Ko + %d fragment(s) "
+        "(%.1f Ko au total, le plus gros %.1f Ko), %d terme(s) TARDIS pondéré(s)",
+        os.path.getsize(index_path) / 1024, sizes['root'] / 1024, sizes['count'],
+        sizes['shards'] / 1024, sizes['largest'] / 1024, len(fields),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+
+def setup(app):
+    app.setup_extension("tardis_store")
+    app.add_config_value("tardis_search", False, "env")
+    # Longueur du préfixe de terme qui détermine le fragment
+    app.add_config_value("tardis_search_prefix", 2, "html")
+    # Poids ajoutés au score d'une page dont un champ TARDIS contient le terme
+    # (à comparer aux scores Sphinx : terme 5, titre 15)
+    app.add_config_value("tardis_search_weights", {"card": 12, "qcm": 8, "hole": 4}, "html")
+    app.connect("doctree-read", on_doctree_read)
+    app.connect("html-page-context", on_html_page_context)
+    # Après tardis_fingerprint (800), avant tardis_compress (900) et
+    # tardis_offline (950) : les fragments sont compressés et précachés
+    app.connect("build-finished", on_build_finished, priority=850)
+    return {
+        "version": "1.0",
+        "env_version": 1,
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Sphinx extension: stockage par document dans l'environnement
+---------------------------------------------------------------------
+Chargée par les extensions qui collectent des données pendant la lecture
+(app.setup_extension("tardis_store")).
+
+Chaque extension range ses enregistrements (tuples ou chaînes, compacts au
+pickle) dans un store nommé, indexé par document :
+
+    from tardis_store import get_store
+
+    store = get_store(env, "video")
+    n = store.add(env.docname, (docdir, filename))   # → rang dans le document
+    for docname, record in store.items():            # sans liste intermédiaire
+        ...
+
+Les événements `env-purge-doc` (O(1) par document) et `env-merge-info`
+(lecture parallèle) sont branchés une seule fois ici pour tous les stores.
+Benchmark purge/merge/pickle : scripts/bench_store.py.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+class DocStore:
+    """Enregistrements d'une extension, indexés par docname."""
+
+    __slots__ = ('name', 'docs')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.docs = {}
+
+    def __getstate__(self):
+        return self.name, self.docs
+
+    def __setstate__(self, state):
+        self.name, self.docs = state
+
+    def add(self, docname: str, record) -> int:
+        """Ajoute un enregistrement ; retourne le nombre d'enregistrements du document."""
+        records = self.docs.get(docname)
+        if records is None:
+            records = self.docs[docname] = []
+        records.append(record)
+        return len(records)
+
+    def records(self, docname: str):
+        return self.docs.get(docname, ())
+
+    def count(self, docname: str) -> int:
+        return len(self.docs.get(docname, ()))
+
+    def items(self):
+        """Itère (docname, enregistrement) sur tous les documents."""
+        for docname, records in self.docs.items():
+            for record in records:
+                yield docname, record
+
+    def purge(self, docname: str) -> None:
+        self.docs.pop(docname, None)
+
+    def merge(self, docnames, other: 'DocStore') -> None:
+        for docname in docnames:
+            records = other.docs.get(docname)
+            if records:
+                self.docs[docname] = records
+
+    def __contains__(self, docname) -> bool:
+        return docname in self.docs
+
+    def __iter__(self):
+        return iter(self.docs)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+
+def get_store(env, name: str) -> DocStore:
+    """Retourne (et crée au besoin) le store `name` de l'environnement."""
+    stores = getattr(env, 'tardis_stores', None)
+    if stores is None:
+        stores = env.tardis_stores = {}
+    store = stores.get(name)
+    if store is None:
+        store = stores[name] = DocStore(name)
+    return store
+
+
+# ---------------------------------------------------------------------------
+# Événements Sphinx
+# ---------------------------------------------------------------------------
+
+def on_env_purge_doc(app, env, docname):
+    """Oublie les enregistrements du document relu (rebuild incrémental)."""
+    for store in getattr(env, 'tardis_stores', {}).values():
+        store.purge(docname)
+
+
+def on_env_merge_info(app, env, docnames, other):
+    """Fusionne les enregistrements collectés en lecture parallèle."""
+    for name, store in getattr(other, 'tardis_stores', {}).items():
+        get_store(env, name).merge(docnames, store)
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+
+def setup(app):
+    app.connect("env-purge-doc", on_env_purge_doc)
+    app.connect("env-merge-info", on_env_merge_info)
+    return {
+        "version": "1.0",
+        "env_version": 1,
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
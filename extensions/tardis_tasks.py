@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Sphinx extension: exécuteur de tâches de fin de build
+--------------------------------------------------------------
+Les extensions TARDIS soumettent leurs travaux de fin de build (copie de
+vidéos, etc.) dès que leurs entrées sont connues, par exemple depuis
+`VideoDirective.run` ; ils s'exécutent sur un pool de threads pendant la
+lecture et l'écriture des pages.
+
+    from tardis_tasks import get_runner
+
+    runner = get_runner(env)
+    if runner is not None:
+        runner.submit(("video", docdir, filename), "video demo.mp4", copy, src, dest)
+
+- la clé déduplique : une même tâche soumise deux fois ne s'exécute qu'une fois ;
+- `get_runner` renvoie None dans les processus de lecture/écriture parallèles
+  (un pool hérité d'un fork n'a pas de threads) : l'extension retombe alors
+  sur son traitement en build-finished, qui soumet ce qui manque ;
+- en build-finished (priorité 700, avant tardis_fingerprint, tardis_compress,
+  tardis_offline et tardis_weight qui lisent le résultat), toutes les tâches
+  sont attendues. Une tâche en erreur est journalisée et fait échouer le build ;
+  un résumé donne le nombre de tâches, leur durée cumulée et l'attente
+  restante en fin de build.
+
+Les tâches sont surtout des E/S (copies) : un pool de threads suffit. Un
+travail CPU en Python pur garde son propre pool de processus (cf. tardis_compress).
+"""
+
+import os
+import time
+import logging
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+# Un exécuteur par environnement (donc par build) ; jamais picklé avec l'env
+_RUNNERS = weakref.WeakKeyDictionary()
+
+
+class TaskRunner:
+    """Pool de threads créé à la première soumission, attendu en build-finished."""
+
+    def __init__(self, jobs: int, builder_format: str, outdir: str):
+        self.jobs = jobs
+        self.format = builder_format
+        self.outdir = outdir
+        self.pid = os.getpid()
+        self.started = None
+        self._pool = None
+        self._tasks = {}
+
+    def submit(self, key, label: str, fn, *args) -> bool:
+        """Soumet `fn(*args)` sous `key` ; False si la clé était déjà soumise."""
+        if key in self._tasks:
+            return False
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.jobs,
+                                            thread_name_prefix='tardis-task')
+            self.started = time.perf_counter()
+        self._tasks[key] = (label, self._pool.submit(_timed, fn, *args))
+        return True
+
+    def join(self) -> dict:
+        """Attend toutes les tâches ; retourne le résumé (erreurs comprises)."""
+        summary = {'count': len(self._tasks), 'busy': 0.0, 'wait': 0.0,
+                   'elapsed': 0.0, 'slowest': None, 'errors': []}
+        if self._pool is None:
+            return summary
+        waiting = time.perf_counter()
+        wait([future for _label, future in self._tasks.values()])
+        now = time.perf_counter()
+        summary['wait'] = now - waiting
+        summary['elapsed'] = now - self.started
+        slowest = 0.0
+        for label, future in self._tasks.values():
+            exc = future.exception()
+            if exc is not None:
+                summary['errors'].append((label, exc))
+                continue
+            duration = future.result()
+            summary['busy'] += duration
+            if duration >= slowest:
+                slowest = duration
+                summary['slowest'] = (label, duration)
+        self.shutdown()
+        return summary
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+        self._tasks = {}
+
+
+def _timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def get_runner(env):
+    """Exécuteur du build en cours, ou None (processus parallèle, build sans exécuteur)."""
+    runner = _RUNNERS.get(env)
+    if runner is None or runner.pid != os.getpid():
+        return None
+    return runner
+
+
+# ---------------------------------------------------------------------------
+# Événements Sphinx
+# ---------------------------------------------------------------------------
+
+def on_builder_inited(app):
+    jobs = int(app.config.tardis_tasks_jobs) or min(8, os.cpu_count() or 1)
+    _RUNNERS[app.env] = TaskRunner(jobs, app.builder.format, str(app.outdir))
+
+
+def on_build_finished(app, exception):
+    runner = get_runner(app.env)
+    if runner is None:
+        return
+    if exception:
+        runner.shutdown()
+        return
+
+    summary = runner.join()
+    if not summary['count']:
+        return
+    for label, exc in summary['errors']:
+        logger.error("tardis_tasks: %s a échoué : %s", label, exc)
+    if summary['errors']:
+        app.statuscode = 1
+
+    slowest = summary['slowest']
+    logger.info(
+        "tardis_tasks: %d tâche(s), %d en erreur — cumul %.2f s sur %.2f s, "
+        "attente en fin de build %.2f s%s",
+        summary['count'], len(summary['errors']), summary['busy'], summary['elapsed'],
+        summary['wait'], f" (plus longue : {slowest[0]} {slowest[1]:.2f} s)" if slowest else "",
+    )
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+
+def setup(app):
+    # Nombre de threads (0 : min(8, nombre de CPU))
+    app.add_config_value("tardis_tasks_jobs", 0, "")
+    app.connect("builder-inited", on_builder_inited)
+    app.connect("build-finished", on_build_finished, priority=700)
+    return {
+        "version": "1.0",
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
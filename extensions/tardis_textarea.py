@@ -5,23 +5,67 @@ import re
 import json
 import html as html_mod
 
-try:
-    from markdown_it import MarkdownIt as _MarkdownIt
-    _md = _MarkdownIt().enable("table")
-except ImportError:
-    _md = None
+from tardis_exercises import note_block
+
+# Rendu Markdown des {hole-answer} : construit au premier bloc rencontré
+_md = None
 
 HOLE_RE = re.compile(r'\[(_+)\]')
+# Bloc JSON unique par page : métadonnées des réponses lues par responses.js
+META_SCRIPT_ID = "tardis-answers"
 
 # ---------------------------------------------------------------------------
 # Utilitaires
 # ---------------------------------------------------------------------------
 
+def markdown_renderer():
+    """MarkdownIt (tables activées), ou None si markdown_it est absent."""
+    global _md
+    if _md is None:
+        try:
+            from markdown_it import MarkdownIt
+            _md = MarkdownIt().enable("table")
+        except ImportError:
+            _md = False
+    return _md or None
+
 def slugify(s: str) -> str:
     s = re.sub(r"\s+", "-", s.strip())
     s = re.sub(r"[^a-zA-Z0-9._\-]", "-", s)
     return s
 
+def section_title(node) -> str:
+    """
+    Titre de la section h1/h2 englobant le bloc : équivalent, résolu à
+    l'écriture, de la recherche du titre précédent côté navigateur.
+    """
+    sections = []
+    parent = node.parent
+    while parent is not None:
+        if isinstance(parent, nodes.section):
+            sections.append(parent)
+        parent = parent.parent
+    if not sections:
+        return ""
+    section = sections[-2] if len(sections) >= 2 else sections[-1]
+    title = section.next_node(nodes.title)
+    return title.astext().strip() if title is not None else ""
+
+def note_block_meta(translator, node, data_id: str, **entry) -> None:
+    """
+    Ajoute les métadonnées d'un bloc (type, template, nombre de trous…) à la page
+    en cours, indexées par id. Le label explicite n'y figure pas : il est déjà
+    dans le <p class="answer-label"> du bloc. Sans label, on y met le titre de
+    la section englobante, pour que l'export n'ait pas à parcourir le DOM.
+    """
+    if not node.get("label"):
+        entry["label"] = section_title(node)
+    builder = translator.builder
+    pages = builder.__dict__.setdefault("tardis_answer_meta", {})
+    pages.setdefault(builder.current_docname, {})[data_id] = {
+        k: v for k, v in entry.items() if v not in ("", None)
+    }
+
 def is_code_lang(lang: str) -> bool:
     if not lang:
         return False
@@ -88,6 +132,9 @@ class AnswerBlockDirective(Directive):
         lang  = self.options.get("lang", "")
         lines = self.options.get("lines", 6)
 
+        if env:
+            note_block(env, "answer")
+
         node = answer_node()
         node["data_id"] = data_id
         node["label"]   = label
@@ -101,6 +148,9 @@ class ExportAnswersDirective(Directive):
     has_content = False
     option_spec = {}
     def run(self):
+        env = getattr(self.state.document.settings, "env", None)
+        if env:
+            note_block(env, "export-answers")
         return [export_answers_node()]
 
 
@@ -142,6 +192,9 @@ class QcmAnswerDirective(Directive):
             elif line.startswith("-") and len(line) > 1:
                 items.append(line[1:].strip())
 
+        if env:
+            note_block(env, "qcm-answer")
+
         node = qcm_answer_node()
         node["data_id"] = data_id
         node["label"]   = label
@@ -177,6 +230,8 @@ class HoleAnswerDirective(Directive):
         label = self.options.get("label", "")
         content = "\n".join(self.content)
         hole_count = len(HOLE_RE.findall(content))
+        if env:
+            note_block(env, "hole-answer")
         node = hole_answer_node()
         node["data_id"]    = data_id
         node["label"]      = label
@@ -194,10 +249,9 @@ def visit_answer_html(self, node: answer_node):
     lang    = node["lang"]
     lines   = node["lines"]
     attrs = [f'data-id="{data_id}"']
-    if label:
-        attrs.append(f'data-label="{label}"')
     if lang:
         attrs.append(f'data-lang="{lang}"')
+    note_block_meta(self, node, data_id, type="answer")
 
     label_html = f'<p class="answer-label">{self.encode(label)}</p>' if label else ""
     self.body.append(
@@ -251,10 +305,9 @@ def visit_qcm_answer_html(self, node: qcm_answer_node):
 
     input_type = "radio" if single else "checkbox"
     attrs = f'data-id="{data_id}"'
-    if label:
-        attrs += f' data-label="{self.encode(label)}"'
     if single:
         attrs += ' data-single="1"'
+    note_block_meta(self, node, data_id, type="qcm", items=list(items))
 
     label_html = f'<p class="answer-label">{self.encode(label)}</p>' if label else ""
     self.body.append(f'<div class="tardis-qcm-answer" {attrs}>')
@@ -317,17 +370,17 @@ def visit_hole_answer_html(self, node: hole_answer_node):
         return f"TARDISHOLE{idx:04d}"
 
     processed = HOLE_RE.sub(make_placeholder, raw)
-    rendered  = _md.render(processed) if _md else f"<p>{html_mod.escape(processed)}</p>"
+    md        = markdown_renderer()
+    rendered  = md.render(processed) if md else f"<p>{html_mod.escape(processed)}</p>"
 
     for idx, inp in enumerate(inputs_html):
         rendered = rendered.replace(f"TARDISHOLE{idx:04d}", inp)
 
-    template_attr = html_mod.escape(json.dumps(raw))
     label_html    = f'<p class="answer-label">{self.encode(label)}</p>' if label else ""
+    note_block_meta(self, node, data_id, type="hole", template=raw, holes=hole_count)
 
     self.body.append(
-        f'<div class="tardis-hole-answer" data-id="{data_id}" '
-        f'data-holes="{hole_count}" data-template="{template_attr}">'
+        f'<div class="tardis-hole-answer" data-id="{data_id}">'
         f'{label_html}{rendered}</div>'
     )
     raise nodes.SkipNode
@@ -388,11 +441,24 @@ def visit_hole_answer_latex(self, node: hole_answer_node):
 def depart_hole_answer_latex(self, node):
     pass
 
+# ---------------------------------------------------------------------------
+# Événements Sphinx
+# ---------------------------------------------------------------------------
+
+def on_html_page_context(app, pagename, templatename, context, doctree):
+    """Ajoute au corps de la page le JSON des blocs de réponse (un seul par page)."""
+    blocks = getattr(app.builder, "tardis_answer_meta", {}).pop(pagename, None)
+    if not blocks or "body" not in context:
+        return
+    data = json.dumps(blocks, ensure_ascii=False, separators=(",", ":")).replace("<", "\\u003c")
+    context["body"] += f'<script type="application/json" id="{META_SCRIPT_ID}">{data}</script>'
+
 # ---------------------------------------------------------------------------
 # Setup Sphinx
 # ---------------------------------------------------------------------------
 
 def setup(app):
+    app.setup_extension("tardis_exercises")
     app.add_node(
         answer_node,
         html=(visit_answer_html, depart_answer_html),
@@ -417,4 +483,5 @@ def setup(app):
     app.add_directive("export-answers", ExportAnswersDirective)
     app.add_directive("qcm-answer", QcmAnswerDirective)
     app.add_directive("hole-answer", HoleAnswerDirective)
+    app.connect("html-page-context", on_html_page_context)
     return {"parallel_read_safe": True, "parallel_write_safe": True}
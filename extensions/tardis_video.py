@@ -17,6 +17,8 @@ Le fichier est résolu depuis video/ adjacent au source MD :
 
 Build HTML : copie video/ dans _static/<docdir>/video/ et génère
     <video autoplay loop muted playsinline controls>
+La copie est soumise à tardis_tasks dès la lecture de la directive ; les
+vidéos des documents non relus (ou lus en parallèle) le sont en build-finished.
 
 Build PDF/LaTeX : note statique italique [Vidéo : demo.mp4]
 Build Marp : non traité par Sphinx, le shortcode est ignoré nativement.
@@ -29,6 +31,9 @@ import logging
 from docutils import nodes
 from sphinx.util.docutils import SphinxDirective
 
+from tardis_store import get_store
+from tardis_tasks import get_runner
+
 logger = logging.getLogger(__name__)
 
 
@@ -66,16 +71,15 @@ class VideoDirective(SphinxDirective):
         src = os.path.join(env.srcdir, docdir, 'video', filename) if docdir \
             else os.path.join(env.srcdir, 'video', filename)
         node['src'] = src
+        # Dépendance du document (rebuild incrémental, empreinte tardis_digest)
+        env.note_dependency(src)
 
         # Collecte pour la copie en build-finished
-        if not hasattr(env, 'tardis_video_files'):
-            env.tardis_video_files = []
-        env.tardis_video_files.append({
-            'src': src,
-            'docdir': docdir,
-            'filename': filename,
-            'docname': env.docname,
-        })
+        get_store(env, 'video').add(env.docname, (docdir, filename))
+        # … et copie immédiate en tâche de fond quand c'est possible
+        runner = get_runner(env)
+        if runner is not None and runner.format == 'html' and os.path.isfile(src):
+            _submit_copy(runner, runner.outdir, docdir, filename, src)
 
         return [node]
 
@@ -84,6 +88,30 @@ class VideoDirective(SphinxDirective):
 # Helpers
 # ---------------------------------------------------------------------------
 
+def _copy_video(src: str, dest: str) -> None:
+    """Copie src → dest, sauf si dest est déjà à jour (même taille, même date)."""
+    try:
+        st_src, st_dest = os.stat(src), os.stat(dest)
+        if st_src.st_size == st_dest.st_size and int(st_src.st_mtime) == int(st_dest.st_mtime):
+            return
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    shutil.copy2(src, dest)
+    logger.debug("tardis_video: copié %s → %s", src, dest)
+
+
+def _video_dest(outdir: str, docdir: str, filename: str) -> str:
+    dest_dir = os.path.join(outdir, '_static', docdir, 'video') if docdir \
+        else os.path.join(outdir, '_static', 'video')
+    return os.path.join(dest_dir, filename)
+
+
+def _submit_copy(runner, outdir: str, docdir: str, filename: str, src: str) -> None:
+    runner.submit(('video', docdir, filename), f"vidéo {filename}",
+                  _copy_video, src, _video_dest(outdir, docdir, filename))
+
+
 def _html_src(current_docname: str, docdir: str, filename: str) -> str:
     """Chemin relatif depuis la page HTML courante vers _static/.../video/fichier."""
     depth = current_docname.count('/')
@@ -128,40 +156,21 @@ def depart_video_latex(self, node: video_node):
 # Événements Sphinx
 # ---------------------------------------------------------------------------
 
-def on_env_purge_doc(app, env, docname):
-    """Nettoie les entrées du document recalculé (rebuild incrémental)."""
-    if hasattr(env, 'tardis_video_files'):
-        env.tardis_video_files = [
-            vf for vf in env.tardis_video_files if vf['docname'] != docname
-        ]
-
-
-def on_env_merge_info(app, env, docnames, other):
-    """Fusionne les données collectées en lecture parallèle."""
-    if not hasattr(other, 'tardis_video_files'):
-        return
-    if not hasattr(env, 'tardis_video_files'):
-        env.tardis_video_files = []
-    env.tardis_video_files.extend(other.tardis_video_files)
-
-
 def on_build_finished(app, exception):
-    """Copie les fichiers vidéo référencés vers _static/ du build HTML."""
+    """Soumet (ou copie) les vidéos référencées vers _static/ ; tardis_tasks attend la fin."""
     if exception:
         return
     if app.builder.format != 'html':
         return
 
     seen = set()
-    for vf in getattr(app.env, 'tardis_video_files', []):
-        src = vf['src']
-        docdir = vf['docdir']
-        filename = vf['filename']
-
-        key = (docdir, filename)
+    for _docname, key in get_store(app.env, 'video').items():
         if key in seen:
             continue
         seen.add(key)
+        docdir, filename = key
+        src = os.path.join(app.srcdir, docdir, 'video', filename) if docdir \
+            else os.path.join(app.srcdir, 'video', filename)
 
         if not os.path.isfile(src):
             logger.warning(
@@ -171,12 +180,12 @@ def on_build_finished(app, exception):
             )
             continue
 
-        dest_dir = os.path.join(app.outdir, '_static', docdir, 'video') if docdir \
-            else os.path.join(app.outdir, '_static', 'video')
-        os.makedirs(dest_dir, exist_ok=True)
-        dest = os.path.join(dest_dir, filename)
-        shutil.copy2(src, dest)
-        logger.debug("tardis_video: copié %s → %s", src, dest)
+        runner = get_runner(app.env)
+        if runner is not None:
+            # Déjà soumise depuis VideoDirective.run → ignorée (même clé)
+            _submit_copy(runner, str(app.outdir), docdir, filename, src)
+        else:
+            _copy_video(src, _video_dest(str(app.outdir), docdir, filename))
 
 
 # ---------------------------------------------------------------------------
@@ -184,14 +193,14 @@ def on_build_finished(app, exception):
 # ---------------------------------------------------------------------------
 
 def setup(app):
+    app.setup_extension("tardis_store")
+    app.setup_extension("tardis_tasks")
     app.add_node(
         video_node,
         html=(visit_video_html, depart_video_html),
         latex=(visit_video_latex, depart_video_latex),
     )
     app.add_directive("video", VideoDirective)
-    app.connect("env-purge-doc", on_env_purge_doc)
-    app.connect("env-merge-info", on_env_merge_info)
     app.connect("build-finished", on_build_finished)
     return {
         "version": "1.0",
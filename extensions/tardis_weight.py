@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Sphinx extension: poids des pages et budgets
+------------------------------------------------------
+Active si `tardis_weight = True` (conf.py : variable d'env TARDIS_WEIGHT=1).
+
+En fin de build HTML, mesure chaque page telle qu'elle sera servie (après
+tardis_fingerprint et tardis_compress) :
+- octets du HTML (et taille transférée si une variante .br/.gz existe),
+  dont scripts et styles inline ;
+- octets produits par chaque type de nœud TARDIS (qcm, cards, html,
+  hole-answer, answer, qcm-answer), mesurés dans les visiteurs HTML ;
+- JS et CSS référencés : fichiers de _static/ et URL externes (Monaco sur
+  unpkg, voir html_js_files/html_css_files de conf.py) ;
+- médias de _static/ et _images/ référencés (vidéos, images…).
+
+Rapports : <outdir>/_tardis/weight.json et <outdir>/_tardis/weight.html.
+
+Budgets (octets, par page) : `tardis_weight_budgets`, clés parmi html,
+inline_script, inline_style, js, css, media, remote, total. Chaque
+dépassement est signalé ; `tardis_weight_fail = True` (TARDIS_WEIGHT_FAIL=1)
+fait échouer le build.
+
+Les URL externes ne sont mesurées que si `tardis_weight_remote = True`
+(TARDIS_WEIGHT_REMOTE=1, requête HEAD au build) ; sinon elles sont listées
+sans taille et hors total.
+
+Les octets des nœuds sont écrits par page dans <doctreedir>/tardis_weight/
+pendant l'écriture (compatible écriture parallèle et builds incrémentaux).
+"""
+
+import html as html_mod
+import json
+import os
+import re
+import logging
+
+from docutils import nodes
+
+logger = logging.getLogger(__name__)
+
+REPORT_JSON = os.path.join('_tardis', 'weight.json')
+REPORT_HTML = os.path.join('_tardis', 'weight.html')
+SIDECAR_DIR = 'tardis_weight'
+
+# Nœud docutils → groupe du rapport (les nœuds imbriqués d'un même groupe
+# ne sont comptés qu'une fois, au niveau le plus externe)
+NODE_GROUPS = {
+    'qcm_node': 'qcm',
+    'tardis_cardsheet': 'cards',
+    'tardis_cardgrid': 'cards',
+    'tardis_card': 'cards',
+    'html_include_node': 'html',
+    'hole_answer_node': 'hole-answer',
+    'answer_node': 'answer',
+    'qcm_answer_node': 'qcm-answer',
+}
+BUDGET_KEYS = ('html', 'inline_script', 'inline_style', 'js', 'css', 'media', 'remote', 'total')
+MEDIA_SUFFIXES = ('.mp4', '.webm', '.ogg', '.mp3', '.wav', '.png', '.jpg', '.jpeg', '.gif',
+                  '.webp', '.avif', '.svg', '.pdf')
+
+_INLINE_SCRIPT_RE = re.compile(r'<script\b(?![^>]*\bsrc=)[^>]*>(.*?)</script>', re.S | re.I)
+_INLINE_STYLE_RE = re.compile(r'<style\b[^>]*>(.*?)</style>', re.S | re.I)
+_SCRIPT_SRC_RE = re.compile(r'<script\b[^>]*\bsrc="([^"]+)"', re.I)
+_STYLESHEET_RE = re.compile(r'<link\b(?=[^>]*\brel="stylesheet")[^>]*\bhref="([^"]+)"', re.I)
+_MEDIA_RE = re.compile(r'\b(?:src|href|poster|data-src)="([^"]*_(?:static|images)/[^"]+)"', re.I)
+
+
+# ---------------------------------------------------------------------------
+# Mesure dans les visiteurs HTML
+# ---------------------------------------------------------------------------
+
+def _measure(translator, group: str, start: int) -> None:
+    size = sum(len(part.encode('utf-8')) for part in translator.body[start:])
+    page = translator.builder.tardis_weight_nodes.setdefault(translator.builder.current_docname, {})
+    page[group] = page.get(group, 0) + size
+
+
+def _wrap(group: str, visit, depart):
+    """Visiteurs enveloppés : octets ajoutés au body entre visit et depart."""
+
+    def visit_measured(self, node):
+        open_groups = self.__dict__.setdefault('_tardis_weight_open', {})
+        outer = not open_groups.get(group)
+        start = len(self.body)
+        try:
+            visit(self, node)
+        except nodes.SkipNode:
+            if outer:
+                _measure(self, group, start)
+            raise
+        open_groups[group] = open_groups.get(group, 0) + 1
+        if outer:
+            node['tardis_weight_start'] = start
+
+    def depart_measured(self, node):
+        if depart:
+            depart(self, node)
+        self._tardis_weight_open[group] -= 1
+        start = node.attributes.pop('tardis_weight_start', None)
+        if start is not None:
+            _measure(self, group, start)
+
+    return visit_measured, depart_measured
+
+
+def _instrument(app) -> None:
+    registry = app.registry.translation_handlers
+    handlers = registry.get(app.builder.name)
+    if handlers is None:
+        handlers = registry.get(app.builder.format, {})
+    for name, group in NODE_GROUPS.items():
+        if name in handlers:
+            handlers[name] = _wrap(group, *handlers[name])
+
+
+# ---------------------------------------------------------------------------
+# Analyse des pages écrites
+# ---------------------------------------------------------------------------
+
+def _local_target(outdir: str, page_dir: str, url: str):
+    path = url.split('#', 1)[0].split('?', 1)[0]
+    if not path or path.startswith(('data:', 'mailto:')):
+        return None
+    return os.path.normpath(os.path.join(outdir, page_dir, path))
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _transfer_size(path: str) -> int:
+    for suffix in ('.br', '.gz'):
+        if os.path.isfile(path + suffix):
+            return os.path.getsize(path + suffix)
+    return _size(path)
+
+
+def remote_size(url: str, memo: dict):
+    """Taille d'une URL externe (HEAD, Content-Length) ; None si inconnue."""
+    if url in memo:
+        return memo[url]
+    full = 'https:' + url if url.startswith('//') else url
+    size = None
+    try:
+        import urllib.request
+
+        req = urllib.request.Request(full, method='HEAD', headers={'User-Agent': 'tardis-weight'})
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            length = resp.headers.get('Content-Length')
+            size = int(length) if length else None
+    except (OSError, ValueError) as exc:
+        logger.debug("tardis_weight: taille inconnue pour %s (%s)", url, exc)
+    memo[url] = size
+    return size
+
+
+def measure_page(outdir: str, rel: str, node_bytes: dict, remote: bool, memo: dict) -> dict:
+    path = os.path.join(outdir, rel)
+    with open(path, encoding='utf-8') as fh:
+        text = fh.read()
+    page_dir = os.path.dirname(rel)
+
+    entry = {
+        'page': rel.replace(os.sep, '/'),
+        'html': len(text.encode('utf-8')),
+        'html_transfer': _transfer_size(path),
+        'inline_script': sum(len(m.group(1).encode('utf-8')) for m in _INLINE_SCRIPT_RE.finditer(text)),
+        'inline_style': sum(len(m.group(1).encode('utf-8')) for m in _INLINE_STYLE_RE.finditer(text)),
+        'nodes': dict(sorted(node_bytes.items())),
+        'assets': [],
+    }
+    totals = {'js': 0, 'css': 0, 'media': 0, 'remote': 0}
+    seen = set()
+
+    def add(kind, url):
+        if url in seen:
+            return
+        seen.add(url)
+        if url.startswith(('http:', 'https:', '//')):
+            size = remote_size(url, memo) if remote else None
+            entry['assets'].append({'kind': kind, 'url': url, 'remote': True, 'bytes': size})
+            totals['remote'] += size or 0
+            return
+        target = _local_target(outdir, page_dir, url)
+        if target is None:
+            return
+        size = _size(target)
+        entry['assets'].append({'kind': kind, 'url': url, 'bytes': size,
+                                'transfer': _transfer_size(target)})
+        totals[kind] += size
+
+    for m in _SCRIPT_SRC_RE.finditer(text):
+        add('js', html_mod.unescape(m.group(1)))
+    for m in _STYLESHEET_RE.finditer(text):
+        add('css', html_mod.unescape(m.group(1)))
+    for m in _MEDIA_RE.finditer(text):
+        url = html_mod.unescape(m.group(1))
+        if url.split('?', 1)[0].lower().endswith(MEDIA_SUFFIXES):
+            add('media', url)
+
+    entry.update(totals)
+    entry['total'] = entry['html'] + totals['js'] + totals['css'] + totals['media'] + totals['remote']
+    return entry
+
+
+def check_budgets(entry: dict, budgets: dict) -> list:
+    return [
+        (key, entry.get(key, 0), limit)
+        for key, limit in budgets.items()
+        if key in BUDGET_KEYS and limit and entry.get(key, 0) > limit
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Rapport HTML
+# ---------------------------------------------------------------------------
+
+def _kb(value) -> str:
+    return '—' if value is None else f'{value / 1024:.1f}'
+
+
+def render_report(report: dict) -> str:
+    groups = sorted({g for p in report['pages'] for g in p['nodes']})
+    head = ''.join(f'<th>{html_mod.escape(h)}</th>' for h in
+                   ['Page', 'Total', 'HTML', 'Transfert', 'Script inline', 'Style inline',
+                    *groups, 'JS', 'CSS', 'Médias', 'Externe'])
+    rows = []
+    for p in report['pages']:
+        over = {key for key, _v, _l in p['over_budget']}
+
+        def cell(key, value):
+            cls = ' class="over"' if key in over else ''
+            return f'<td{cls}>{_kb(value)}</td>'
+
+        page = html_mod.escape(p['page'])
+        rows.append(
+            f'<tr><td><a href="../{page}">{page}</a></td>'
+            + cell('total', p['total']) + cell('html', p['html'])
+            + cell('html_transfer', p['html_transfer'])
+            + cell('inline_script', p['inline_script']) + cell('inline_style', p['inline_style'])
+            + ''.join(cell(g, p['nodes'].get(g, 0)) for g in groups)
+            + cell('js', p['js']) + cell('css', p['css']) + cell('media', p['media'])
+            + cell('remote', p['remote']) + '</tr>'
+        )
+    budgets = ', '.join(f'{k} ≤ {_kb(v)} Ko' for k, v in report['budgets'].items()) or 'aucun'
+    return f'''<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>Poids des pages</title>
+<style>
+body{{font:14px system-ui,sans-serif;margin:1.5rem}}
+table{{border-collapse:collapse}}
+th,td{{border:1px solid #ccc;padding:.25rem .5rem;text-align:right}}
+td:first-child,th:first-child{{text-align:left}}
+th{{background:#f3f3f3;position:sticky;top:0}}
+.over{{background:#fdd;font-weight:bold}}
+</style></head><body>
+<h1>Poids des pages ({len(report['pages'])})</h1>
+<p>Valeurs en Ko, triées par total. Budgets : {html_mod.escape(budgets)}.
+{report['over_budget']} page(s) hors budget. Externe : « — » si non mesuré.</p>
+<table><thead><tr>{head}</tr></thead><tbody>
+{chr(10).join(rows)}
+</tbody></table></body></html>
+'''
+
+
+# ---------------------------------------------------------------------------
+# Événements Sphinx
+# ---------------------------------------------------------------------------
+
+def _sidecar_dir(app) -> str:
+    return os.path.join(str(app.doctreedir), SIDECAR_DIR)
+
+
+def on_builder_inited(app):
+    if app.builder.format != 'html' or not app.config.tardis_weight:
+        return
+    app.builder.tardis_weight_nodes = {}
+    _instrument(app)
+
+
+def on_html_page_context(app, pagename, templatename, context, doctree):
+    """Enregistre les octets des nœuds TARDIS de la page (processus d'écriture)."""
+    if not app.config.tardis_weight or doctree is None:
+        return
+    page = app.builder.tardis_weight_nodes.pop(pagename, {})
+    path = os.path.join(_sidecar_dir(app), pagename + '.json')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(page, fh)
+
+
+def _read_sidecar(app, pagename: str) -> dict:
+    try:
+        with open(os.path.join(_sidecar_dir(app), pagename + '.json'), encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def on_build_finished(app, exception):
+    if exception:
+        return
+    if app.builder.format != 'html' or not app.config.tardis_weight:
+        return
+
+    outdir = str(app.outdir)
+    # int() : `-D tardis_weight_budgets.html=…` passe des chaînes
+    budgets = {k: int(v) for k, v in app.config.tardis_weight_budgets.items() if k in BUDGET_KEYS}
+    memo = {}
+    pages = []
+    for dirpath, dirnames, filenames in os.walk(outdir):
+        dirnames[:] = sorted(d for d in dirnames
+                             if not d.startswith(('.', '_static', '_images', '_sources', '_tardis')))
+        for name in sorted(filenames):
+            if not name.endswith('.html'):
+                continue
+            rel = os.path.relpath(os.path.join(dirpath, name), outdir)
+            pagename = os.path.splitext(rel)[0].replace(os.sep, '/')
+            entry = measure_page(outdir, rel, _read_sidecar(app, pagename),
+                                 app.config.tardis_weight_remote, memo)
+            entry['over_budget'] = check_budgets(entry, budgets)
+            pages.append(entry)
+    pages.sort(key=lambda p: p['total'], reverse=True)
+
+    over = [p for p in pages if p['over_budget']]
+    report = {'version': 1, 'budgets': budgets, 'over_budget': len(over), 'pages': pages}
+    for rel, content in ((REPORT_JSON, json.dumps(report, ensure_ascii=False, indent=1)),
+                         (REPORT_HTML, render_report(report))):
+        dest = os.path.join(outdir, rel)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        with open(dest, 'w', encoding='utf-8') as fh:
+            fh.write(content)
+
+    for p in over:
+        details = ', '.join(f'{key} {_kb(value)} Ko > {_kb(limit)} Ko'
+                            for key, value, limit in p['over_budget'])
+        logger.warning("tardis_weight: %s hors budget (%s)", p['page'], details)
+    heaviest = pages[0] if pages else None
+    logger.info("tardis_weight: %d page(s), %d hors budget, la plus lourde %s (%s Ko) → %s",
+                len(pages), len(over), heaviest['page'] if heaviest else '-',
+                _kb(heaviest['total']) if heaviest else '0', REPORT_HTML)
+    if over and app.config.tardis_weight_fail:
+        # Code de sortie non nul de sphinx-build, sans trace d'exception
+        logger.error("tardis_weight: %d page(s) dépassent les budgets (voir %s)",
+                     len(over), REPORT_HTML)
+        app.statuscode = 1
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+
+def setup(app):
+    app.add_config_value("tardis_weight", False, "html")
+    app.add_config_value("tardis_weight_fail", False, "html")
+    app.add_config_value("tardis_weight_remote", False, "html")
+    # Budgets par page pour un téléphone en partage de connexion
+    app.add_config_value("tardis_weight_budgets", {
+        "html": 300 * 1024,
+        "media": 1024 * 1024,
+        "total": 1536 * 1024,
+    }, "html")
+    app.connect("builder-inited", on_builder_inited)
+    app.connect("html-page-context", on_html_page_context)
+    # Après tardis_fingerprint (800), tardis_compress (900) et tardis_offline (950) :
+    # mesure des octets réellement servis
+    app.connect("build-finished", on_build_finished, priority=960)
+    return {
+        "version": "1.0",
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
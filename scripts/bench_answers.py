@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Benchmark d'une page d'exercices chargée
+-------------------------------------------------
+Construit (Sphinx, conf.py et extensions TARDIS) une page synthétique avec
+BENCH_BLOCKS blocs de chaque type ({answer}, {qcm-answer}, {hole-answer}
+avec tableau), répartis sous des titres de section, puis mesure :
+
+    html     taille de la page générée
+    meta     octets des métadonnées de réponses (attributs data-label /
+             data-template ou bloc JSON #tardis-answers)
+    parse    temps d'analyse de la page (html.parser, médiane de 5)
+
+Variables d'environnement :
+    BENCH_BLOCKS   blocs par type (défaut: 60)
+    BENCH_DIR      dossier de travail (défaut: dossier temporaire)
+
+Usage :
+    python scripts/bench_answers.py
+"""
+
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from html.parser import HTMLParser
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+
+BLOCKS = int(os.getenv('BENCH_BLOCKS', '60'))
+
+_META_RE = re.compile(r'\sdata-(?:label|template|holes)="[^"]*"'
+                      r'|<script type="application/json" id="tardis-answers">.*?</script>', re.S)
+
+
+def write_page(srcdir: str) -> None:
+    parts = ['# Exercices\n']
+    for i in range(BLOCKS):
+        parts.append(f'''
+## Exercice {i + 1}
+
+Lisez l'énoncé puis répondez aux questions.
+
+```{{answer}} ans-{i}
+:label: Expliquez le rôle du composant {i}
+:lang: shell
+```
+
+```{{qcm-answer}} qa-{i}
+:label: Quelles affirmations sont vraies ({i}) ?
+- Le protocole {i} est chiffré
+- Le port {i} est réservé
+- La couche {i} est physique
+```
+
+```{{hole-answer}} hole-{i}
+:label: Complétez le tableau {i}
+| Couche | Protocole | Port |
+|--------|-----------|------|
+| 7      | [___]     | [___] |
+| 4      | [_____]   | [___] |
+| 3      | [___]     | —     |
+```
+''')
+    parts.append('\n```{export-answers}\n```\n')
+    with open(os.path.join(srcdir, 'index.md'), 'w', encoding='utf-8') as fh:
+        fh.write(''.join(parts))
+    with open(os.path.join(srcdir, '_toc.yml'), 'w', encoding='utf-8') as fh:
+        fh.write('root: index\n')
+
+
+def build(workdir: str) -> str:
+    from sphinx.application import Sphinx
+    from sphinx.util.docutils import docutils_namespace, patch_docutils
+
+    srcdir = os.path.join(workdir, 'src')
+    outdir = os.path.join(workdir, 'html')
+    os.makedirs(srcdir, exist_ok=True)
+    write_page(srcdir)
+    with open(os.path.join(workdir, 'build.log'), 'w', encoding='utf-8') as log, \
+            patch_docutils(BASE_DIR), docutils_namespace():
+        app = Sphinx(srcdir, BASE_DIR, outdir, os.path.join(workdir, 'doctrees'), 'html',
+                     status=log, warning=log, freshenv=True)
+        app.build()
+    return os.path.join(outdir, 'index.html')
+
+
+def parse_time(text: str) -> float:
+    samples = []
+    for _ in range(5):
+        parser = HTMLParser()
+        started = time.perf_counter()
+        parser.feed(text)
+        parser.close()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    workdir = os.getenv('BENCH_DIR') or tempfile.mkdtemp(prefix='tardis-bench-')
+    page = build(workdir)
+    with open(page, encoding='utf-8') as fh:
+        text = fh.read()
+    size = len(text.encode('utf-8'))
+    meta = sum(len(m.group(0).encode('utf-8')) for m in _META_RE.finditer(text))
+    print(f'📊 {BLOCKS} bloc(s) de chaque type → {page}')
+    print(f'html   {size / 1024:8.1f} Ko')
+    print(f'meta   {meta / 1024:8.1f} Ko')
+    print(f'parse  {parse_time(text) * 1000:8.1f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
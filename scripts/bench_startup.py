@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Benchmark du démarrage à froid (conf.py + extensions TARDIS)
+---------------------------------------------------------------------
+Chaque mesure tourne dans un processus Python neuf, sur un module minimal
+(index.md + _toc.yml) et un environnement vide :
+
+    process      lancement de l'interpréteur → application prête
+    sphinx       import de sphinx.application dans le processus
+    app          Sphinx(...) : conf.py, setup des extensions, init du builder
+                 (le constructeur rend la main juste après builder-inited)
+    tardis       imports des modules extensions/tardis_* (cumul -X importtime)
+    conf.py      une exécution de conf.py, imports déjà chauds
+
+C'est ce que paie chaque sphinx-build, chaque worker de `tardis.py batch`
+et `tardis_lint.py` (imports des directives) avant de lire un document.
+
+Variables d'environnement :
+    BENCH_RUNS     mesures par builder, médiane affichée (défaut: 7)
+
+Usage :
+    python scripts/bench_startup.py              # html et latex
+    python scripts/bench_startup.py html dummy
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+
+RUNS = int(os.getenv('BENCH_RUNS', '7'))
+# Builders fournis par Sphinx lui-même (aucune extension supplémentaire requise)
+BUILDERS = ('html', 'dirhtml', 'singlehtml', 'latex', 'text', 'man', 'texinfo',
+            'epub', 'xml', 'pseudoxml', 'gettext', 'dummy')
+_IMPORTTIME_RE = re.compile(r'^import time:\s*(\d+) \|\s*(\d+) \|( *)(\S+)')
+
+
+def make_module(root: str) -> str:
+    """Module minimal : une page, un sommaire."""
+    srcdir = os.path.join(root, 'src')
+    os.makedirs(srcdir)
+    with open(os.path.join(srcdir, 'index.md'), 'w', encoding='utf-8') as fh:
+        fh.write('# Démarrage\n\nTexte.\n')
+    with open(os.path.join(srcdir, '_toc.yml'), 'w', encoding='utf-8') as fh:
+        fh.write('format: jb-book\nroot: index\n')
+    return srcdir
+
+
+# ---------------------------------------------------------------------------
+# Processus mesuré
+# ---------------------------------------------------------------------------
+
+def child(buildername: str, srcdir: str, outdir: str) -> None:
+    started = time.perf_counter()
+    from sphinx.application import Sphinx
+    from sphinx.util.docutils import docutils_namespace, patch_docutils
+    imported = time.perf_counter()
+
+    with patch_docutils(BASE_DIR), docutils_namespace():
+        Sphinx(srcdir=srcdir, confdir=BASE_DIR, outdir=os.path.join(outdir, buildername),
+               doctreedir=os.path.join(outdir, '.doctrees'), buildername=buildername,
+               status=None, warning=None, freshenv=True)
+    ready = time.perf_counter()
+
+    conf_path = os.path.join(BASE_DIR, 'conf.py')
+    with open(conf_path, encoding='utf-8') as fh:
+        code = compile(fh.read(), conf_path, 'exec')
+    conf_started = time.perf_counter()
+    exec(code, {'__file__': conf_path, 'tags': None})
+    conf_done = time.perf_counter()
+
+    print(json.dumps({'sphinx': imported - started, 'app': ready - imported,
+                      'conf': conf_done - conf_started}))
+
+
+def tardis_import_time(buildername: str, srcdir: str, outdir: str) -> float:
+    """Cumul (s) des imports de premier niveau des modules tardis_*."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', __file__, '--child', buildername, srcdir, outdir],
+        capture_output=True, text=True, check=True,
+    )
+    total = 0
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        # Modules importés par conf.py / Sphinx, pas par un autre module TARDIS
+        if match and match.group(4).startswith('tardis_') and len(match.group(3)) == 1:
+            total += int(match.group(2))
+    return total / 1e6
+
+
+def measure(buildername: str, srcdir: str, outdir: str) -> dict:
+    runs = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, __file__, '--child', buildername, srcdir, outdir],
+                              capture_output=True, text=True, check=True)
+        elapsed = time.perf_counter() - started
+        data = json.loads(proc.stdout.strip().splitlines()[-1])
+        data['process'] = elapsed
+        runs.append(data)
+    result = {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+    result['tardis'] = tardis_import_time(buildername, srcdir, outdir)
+    return result
+
+
+def main(argv) -> int:
+    # Processus mesuré (interne, lancé par measure())
+    if argv[:1] == ['--child']:
+        child(*argv[1:4])
+        return 0
+
+    parser = argparse.ArgumentParser(description='Démarrage à froid de Sphinx avec conf.py et les extensions TARDIS')
+    parser.add_argument('builders', nargs='*', metavar='BUILDER',
+                        help=f'builders mesurés (défaut: html latex) parmi : {", ".join(BUILDERS)}')
+    args = parser.parse_args(argv)
+    # Pas de choices= : argparse le vérifie aussi sur la liste vide par défaut
+    unknown = [b for b in args.builders if b not in BUILDERS]
+    if unknown:
+        parser.error(f'builder inconnu : {", ".join(unknown)} (choisir parmi : {", ".join(BUILDERS)})')
+    builders = args.builders or ['html', 'latex']
+    print(f'Démarrage à froid, médiane de {RUNS} processus')
+    print(f'{"builder":<8} {"process":>9} {"sphinx":>9} {"app":>9} {"tardis":>9} {"conf.py":>9}')
+    with tempfile.TemporaryDirectory() as root:
+        srcdir = make_module(root)
+        for buildername in builders:
+            r = measure(buildername, srcdir, os.path.join(root, 'out'))
+            print(f'{buildername:<8} {r["process"] * 1000:8.0f}ms {r["sphinx"] * 1000:8.0f}ms '
+                  f'{r["app"] * 1000:8.0f}ms {r["tardis"] * 1000:8.1f}ms {r["conf"] * 1000:8.2f}ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Benchmark du stockage par document (extensions/tardis_store.py)
+------------------------------------------------------------------------
+Compare, sur un environnement synthétique, l'ancien rangement des
+extensions (liste plate de dicts pour tardis_video, dicts de compteurs pour
+tardis_qcm / tardis_exercises) et les DocStore :
+
+    purge   env-purge-doc de tous les documents (relecture complète)
+    merge   env-merge-info de 4 lots (lecture parallèle -j 4)
+    pickle  sérialisation de l'environnement (taille, dump, load)
+
+Variables d'environnement :
+    BENCH_DOCS     nombre de documents (défaut: 2000)
+    BENCH_VIDEOS   vidéos par document (défaut: 3)
+    BENCH_BLOCKS   blocs d'exercice par document (défaut: 6)
+
+Usage :
+    python scripts/bench_store.py
+"""
+
+import os
+import pickle
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(SCRIPT_DIR), 'extensions'))
+
+from tardis_store import get_store, on_env_merge_info, on_env_purge_doc  # noqa: E402
+
+DOCS = int(os.getenv('BENCH_DOCS', '2000'))
+VIDEOS = int(os.getenv('BENCH_VIDEOS', '3'))
+BLOCKS = int(os.getenv('BENCH_BLOCKS', '6'))
+KINDS = ('answer', 'qcm-answer', 'hole-answer', 'qcm')
+CHUNKS = 4
+
+
+class Env:
+    """Environnement minimal : seuls les attributs des extensions comptent."""
+
+
+def docnames():
+    return [f'obj{i // 50}/chap{i % 50}/page' for i in range(DOCS)]
+
+
+# ---------------------------------------------------------------------------
+# Ancien rangement
+# ---------------------------------------------------------------------------
+
+def fill_legacy(env, names) -> None:
+    env.tardis_video_files = getattr(env, 'tardis_video_files', [])
+    env.tardis_qcm_counter = getattr(env, 'tardis_qcm_counter', {})
+    env.tardis_exercise_blocks = getattr(env, 'tardis_exercise_blocks', {})
+    for doc in names:
+        docdir = os.path.dirname(doc)
+        for v in range(VIDEOS):
+            env.tardis_video_files.append({
+                'src': f'/src/{docdir}/video/demo{v}.mp4',
+                'docdir': docdir,
+                'filename': f'demo{v}.mp4',
+                'docname': doc,
+            })
+        counts = env.tardis_exercise_blocks.setdefault(doc, {})
+        for b in range(BLOCKS):
+            kind = KINDS[b % len(KINDS)]
+            counts[kind] = counts.get(kind, 0) + 1
+            if kind == 'qcm':
+                env.tardis_qcm_counter[doc] = env.tardis_qcm_counter.get(doc, 0) + 1
+
+
+def purge_legacy(env, doc) -> None:
+    env.tardis_video_files = [vf for vf in env.tardis_video_files if vf['docname'] != doc]
+    env.tardis_exercise_blocks.pop(doc, None)
+    # tardis_qcm ne purgeait pas son compteur
+
+
+def merge_legacy(env, names, other) -> None:
+    env.tardis_video_files.extend(other.tardis_video_files)
+    for doc in names:
+        if doc in other.tardis_exercise_blocks:
+            env.tardis_exercise_blocks[doc] = other.tardis_exercise_blocks[doc]
+        if doc in other.tardis_qcm_counter:
+            env.tardis_qcm_counter[doc] = other.tardis_qcm_counter[doc]
+
+
+# ---------------------------------------------------------------------------
+# DocStore
+# ---------------------------------------------------------------------------
+
+def fill_store(env, names) -> None:
+    videos, qcms, blocks = get_store(env, 'video'), get_store(env, 'qcm'), get_store(env, 'exercises')
+    for doc in names:
+        docdir = os.path.dirname(doc)
+        for v in range(VIDEOS):
+            videos.add(doc, (docdir, f'demo{v}.mp4'))
+        for b in range(BLOCKS):
+            kind = KINDS[b % len(KINDS)]
+            blocks.add(doc, kind)
+            if kind == 'qcm':
+                qcms.add(doc, '')
+
+
+# ---------------------------------------------------------------------------
+# Mesures
+# ---------------------------------------------------------------------------
+
+def _timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def bench(fill, purge, merge) -> dict:
+    names = docnames()
+    env = Env()
+    fill(env, names)
+
+    data = {}
+    data['dump'] = _timed(lambda: data.setdefault('blob', pickle.dumps(env.__dict__, pickle.HIGHEST_PROTOCOL)))
+    data['load'] = _timed(lambda: pickle.loads(data['blob']))
+    data['bytes'] = len(data.pop('blob'))
+
+    data['purge'] = _timed(lambda: [purge(env, doc) for doc in names])
+
+    size = -(-len(names) // CHUNKS)
+    chunks = [names[i:i + size] for i in range(0, len(names), size)]
+    others = []
+    for chunk in chunks:
+        other = Env()
+        fill(other, chunk)
+        others.append((chunk, other))
+    data['merge'] = _timed(lambda: [merge(env, chunk, other) for chunk, other in others])
+    return data
+
+
+def main() -> int:
+    print(f'📊 {DOCS} documents, {VIDEOS} vidéo(s) et {BLOCKS} bloc(s) par document')
+    legacy = bench(fill_legacy, purge_legacy, merge_legacy)
+    store = bench(fill_store,
+                  lambda env, doc: on_env_purge_doc(None, env, doc),
+                  lambda env, names, other: on_env_merge_info(None, env, names, other))
+
+    print(f'{"":8} {"avant":>12} {"DocStore":>12}')
+    for key in ('purge', 'merge', 'dump', 'load'):
+        print(f'{key:8} {legacy[key] * 1000:10.1f}ms {store[key] * 1000:10.1f}ms')
+    print(f'{"pickle":8} {legacy["bytes"] / 1024:10.1f}Ko {store["bytes"] / 1024:10.1f}Ko')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,7 @@ import fs from 'fs/promises';
 import path from 'path';
 import { glob } from 'glob';
 import YAML from 'yaml';
+import { reportManifestSizes, writeManifest } from './manifestSplit.mjs';
 
 const SRC_DIR = process.env.SRC_DIR || '../b-UnitesEnseignement';
 const OUT_DIR = process.env.OUT_DIR || '../_build_local/tardis/manifests';
@@ -118,11 +119,8 @@ const seqKey = seq => {
       }
     };
 
-    await fs.writeFile(
-      path.join(OUT_DIR, 'tardis.json'),
-      JSON.stringify(manifest, null, 2),
-      'utf8'
-    );
+    // Racine empreintée + détails par séquence + tardis.json complet (minifiés)
+    const sizes = await writeManifest(manifest, OUT_DIR);
     await fs.writeFile(
       path.join(OUT_DIR, 'tardis.yml'),
       YAML.stringify(manifest),
@@ -130,6 +128,7 @@ const seqKey = seq => {
     );
 
     console.log(`✅ Manifest généré: ${items.length} items, ${sequences.length} séquences`);
+    await reportManifestSizes(sizes, process.env.ICT_MODULE);
   } catch (e) {
     console.error('❌ Erreur:', e.message);
     process.exit(1);
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - PDF des exercices via le builder LaTeX de Sphinx
+---------------------------------------------------------
+Alternative rapide à export_exos_pdf_playwright.mjs : pas de navigateur,
+pas de build HTML préalable. Les exercices sont les mêmes (.md sous un dossier
+`exercices/`, hors index.md) et les PDF sont rangés dans les mêmes buckets
+(`exercices/` ou `solutions/` selon le dossier parent).
+
+Étapes :
+1. Une seule lecture Sphinx (builder latex) avec un `latex_documents` par
+   exercice → un .tex par exercice dans LATEX_OUT_DIR.
+2. Pour chaque exercice, clé de cache = doctree + dépendances (html/, images)
+   + thème PDF + conf.py/extensions + variables d'environnement du module.
+3. Clé connue → PDF restauré depuis le cache ; sinon latexmk (xelatex) dans
+   un pool de processus, puis mise en cache.
+
+Variables d'environnement :
+    SPHINX_SRC_DIR    sources Sphinx (défaut: b-UnitesEnseignement/Support)
+    PDF_OUT_DIR       sortie des PDF (défaut: <src>/_build/exo-pdf)
+    LATEX_OUT_DIR     sortie .tex + doctrees (défaut: <src>/_build/exo-latex)
+    TARDIS_CACHE_DIR  cache persistant (défaut: <src>/_build/.tardis-cache)
+    PDF_THEME         thème themes/pdf/<nom> (défaut: etml-2025)
+    TARDIS_JOBS       nombre de jobs xelatex en parallèle (défaut: nb CPU)
+
+Usage :
+    python tardis-pipelines/scripts/build_exo_pdf.py
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from tardis_cache import ResultCache, hash_files
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+EXTENSIONS_DIR = os.path.join(BASE_DIR, 'extensions')
+THEMES_DIR = os.path.join(BASE_DIR, 'themes', 'pdf')
+
+SRC = os.getenv('SPHINX_SRC_DIR', 'b-UnitesEnseignement/Support')
+PDF_OUT = os.getenv('PDF_OUT_DIR') or os.path.join(SRC, '_build', 'exo-pdf')
+LATEX_OUT = os.getenv('LATEX_OUT_DIR') or os.path.join(SRC, '_build', 'exo-latex')
+CACHE_DIR = os.getenv('TARDIS_CACHE_DIR') or os.path.join(SRC, '_build', '.tardis-cache')
+PDF_THEME = os.getenv('PDF_THEME', 'etml-2025')
+JOBS = int(os.getenv('TARDIS_JOBS', '0') or 0) or os.cpu_count() or 1
+
+# Variables lues par conf.py qui modifient le rendu LaTeX
+_ENV_KEYS = ('ICT_MODULE', 'AUTHOR', 'SPHINX_THEME')
+
+_TITLE_RE = re.compile(r'^#\s+(.+?)\s*#*\s*$', re.M)
+
+
+# ---------------------------------------------------------------------------
+# Collecte des exercices
+# ---------------------------------------------------------------------------
+
+def collect_exercises(srcdir: str):
+    """Retourne [(docname, bucket, basename, titre)] — même règle que Playwright."""
+    out = []
+    for dirpath, dirnames, filenames in os.walk(srcdir):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith(('_', '.')))
+        for name in sorted(filenames):
+            if not name.lower().endswith('.md') or name.lower() == 'index.md':
+                continue
+            path = os.path.join(dirpath, name)
+            rel = os.path.relpath(path, srcdir)
+            parts = [p.lower() for p in rel.split(os.sep)]
+            if 'exercices' not in parts:
+                continue
+            parent = os.path.basename(dirpath).lower()
+            bucket = 'solutions' if parent == 'solutions' else 'exercices'
+            base = os.path.splitext(name)[0]
+            out.append((rel[:-3].replace(os.sep, '/'), bucket, base, _read_title(path, base)))
+    return out
+
+
+def _read_title(path: str, default: str) -> str:
+    try:
+        with open(path, encoding='utf-8') as fh:
+            m = _TITLE_RE.search(fh.read())
+    except OSError:
+        return default
+    return m.group(1) if m else default
+
+
+def _texname(docname: str) -> str:
+    return re.sub(r'[^A-Za-z0-9._-]', '-', docname.replace('/', '--')) + '.tex'
+
+
+# ---------------------------------------------------------------------------
+# Lecture Sphinx + écriture des .tex
+# ---------------------------------------------------------------------------
+
+def build_latex(exercises):
+    """Lance Sphinx (builder latex) et retourne l'application après le build."""
+    from sphinx.application import Sphinx
+
+    author = os.getenv('AUTHOR', 'ETML (Section Informatique)')
+    latex_documents = [
+        (docname, _texname(docname), title, author, 'howto')
+        for docname, _bucket, _base, title in exercises
+    ]
+    app = Sphinx(
+        srcdir=SRC,
+        confdir=BASE_DIR,
+        outdir=LATEX_OUT,
+        doctreedir=os.path.join(LATEX_OUT, '.doctrees'),
+        buildername='latex',
+        confoverrides={'latex_documents': latex_documents},
+        status=None,
+        parallel=JOBS,
+    )
+    app.build()
+    if app.statuscode:
+        raise SystemExit(app.statuscode)
+    return app
+
+
+def _doc_dependencies(env, docname: str):
+    """Fichiers dont dépend le rendu : includes notés + images référencées."""
+    deps = set(env.dependencies.get(docname, ()))
+    for filename, (docnames, _unique) in env.images.items():
+        if docname in docnames:
+            deps.add(filename)
+    return [os.path.join(env.srcdir, d) for d in sorted(deps)]
+
+
+def cache_key(app, docname: str, shared: str) -> str:
+    doctree = os.path.join(str(app.doctreedir), docname + '.doctree')
+    h = hashlib.sha256(shared.encode('ascii'))
+    h.update(hash_files([doctree]).encode('ascii'))
+    h.update(hash_files(_doc_dependencies(app.env, docname), root=str(app.srcdir)).encode('ascii'))
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Compilation xelatex (pool de processus)
+# ---------------------------------------------------------------------------
+
+def run_latexmk(latex_dir: str, texname: str):
+    """Compile un .tex avec latexmk/xelatex. Exécuté dans un processus du pool."""
+    proc = subprocess.run(
+        ['latexmk', '-pdfxe', '-interaction=nonstopmode', '-halt-on-error', texname],
+        cwd=latex_dir,
+        capture_output=True,
+        text=True,
+        errors='replace',
+    )
+    return texname, proc.returncode, proc.stdout[-3000:]
+
+
+def _target_path(bucket: str, base: str, docname: str, used: set) -> str:
+    """Nom du PDF de sortie, suffixé d'un hash court en cas de collision."""
+    target = os.path.join(PDF_OUT, bucket, base + '.pdf')
+    if target in used:
+        h = hashlib.md5(docname.encode('utf-8')).hexdigest()[:6]
+        target = os.path.join(PDF_OUT, bucket, f'{base}-{h}.pdf')
+    used.add(target)
+    return target
+
+
+# ---------------------------------------------------------------------------
+# MAIN
+# ---------------------------------------------------------------------------
+
+def main() -> int:
+    if not os.path.isdir(SRC):
+        print(f'Dossier source introuvable: {SRC} — aucun exercice à exporter.')
+        return 0
+
+    exercises = collect_exercises(SRC)
+    if not exercises:
+        print('Aucun exercice trouvé.')
+        return 0
+
+    if not shutil.which('latexmk'):
+        print('❌ latexmk introuvable (texlive-xetex + latexmk requis)', file=sys.stderr)
+        return 1
+
+    sys.path.insert(0, EXTENSIONS_DIR)
+    app = build_latex(exercises)
+    latex_dir = str(app.outdir)
+
+    shared = hash_files(
+        [os.path.join(BASE_DIR, 'conf.py'), EXTENSIONS_DIR, os.path.join(THEMES_DIR, PDF_THEME)],
+        root=BASE_DIR,
+        extra=[f'{k}={os.getenv(k, "")}' for k in _ENV_KEYS],
+    )
+    cache = ResultCache(os.path.join(CACHE_DIR, 'exo-pdf'), ext='.pdf')
+    # Index reconstruit à chaque run : exercices supprimés ou renommés → objets purgés
+    cache.index.clear()
+
+    used = set()
+    pending = {}
+    reused = 0
+    for docname, bucket, base, _title in exercises:
+        target = _target_path(bucket, base, docname, used)
+        key = cache_key(app, docname, shared)
+        if cache.has(key):
+            cache.restore(docname, key, target)
+            print('✓ PDF (cache)', os.path.relpath(target, PDF_OUT))
+            reused += 1
+        else:
+            pending[_texname(docname)] = (docname, key, target)
+
+    failed = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=min(JOBS, len(pending))) as pool:
+            futures = [pool.submit(run_latexmk, latex_dir, tex) for tex in pending]
+            for fut in as_completed(futures):
+                texname, code, log = fut.result()
+                docname, key, target = pending[texname]
+                pdf = os.path.join(latex_dir, texname[:-4] + '.pdf')
+                if code != 0 or not os.path.isfile(pdf):
+                    print(f'❌ xelatex a échoué pour {docname}\n{log}', file=sys.stderr)
+                    failed += 1
+                    continue
+                cache.store(docname, key, pdf)
+                cache.restore(docname, key, target)
+                print('✓ PDF', os.path.relpath(target, PDF_OUT))
+
+    cache.prune()
+    cache.save()
+    print(f'Terminé: {len(pending) - failed} PDF compilés, {reused} repris du cache, {failed} en erreur.')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Build parallèle et incrémental des présentations Marp
+--------------------------------------------------------------
+Remplace la boucle bash de marp-to-section-inf.yml (racine + un niveau de
+sous-dossiers, un appel marp à la fois).
+
+Étapes :
+1. Découverte des decks (.md) à toute profondeur sous SLIDES_SRC_DIR, hors
+   dist/ et dossiers cachés ; l'arborescence est conservée en sortie.
+2. Pour chaque deck, clé de cache = source + jeu de thèmes themes/marp/
+   (passé en entier à marp via --theme-set : un deck peut en choisir un autre)
+   + fichiers locaux référencés (images, header HTML, url() du front matter)
+   + version de marp-cli et options de conversion.
+3. Clé connue → HTML restauré depuis le cache ; sinon marp-cli dans un pool
+   de processus, puis mise en cache.
+4. Copie des assets (tout sauf .md) : seuls les fichiers absents ou modifiés
+   (taille/date) sont recopiés.
+5. Si SLIDES_PDF=1 ou SLIDES_OUT_PDF est défini : un PDF par deck (même cache
+   par empreinte, --pdf-outlines), puis PDF combiné trié par seq/order
+   (même ordre que merge-slides-pdf.mjs). Le combiné est réassemblé depuis
+   les PDF en cache, avec un signet par deck contenant ses propres signets ;
+   il est repris tel quel si aucun deck n'a changé.
+6. Index statique <sortie>/decks.json (titre, sous-dossier, lien PDF, taille,
+   date) lu par index.php : plus aucun scandir à chaque requête HTTP.
+
+Variables d'environnement :
+    SLIDES_SRC_DIR    sources des decks (défaut: caller/b-UnitesEnseignement/Presentations)
+    SLIDES_OUT_DIR    sortie HTML (défaut: <src>/dist/html)
+    SLIDES_PDF_DIR    PDF déployés à côté du HTML, liés dans l'index (défaut: <src>/dist/pdf)
+    SLIDES_PDF        1 pour exporter aussi un PDF par deck
+    SLIDES_OUT_PDF    chemin du PDF combiné (active l'export PDF)
+    THEME_NAME        thème themes/marp/<nom> (défaut: etml-2025)
+    SLIDES_IGNORE     motifs (fnmatch, séparés par des virgules) de .md à ignorer
+    TARDIS_CACHE_DIR  cache persistant (défaut: <src>/dist/.tardis-cache)
+    TARDIS_JOBS       nombre de conversions en parallèle (défaut: nb CPU)
+    MARP              commande marp-cli (défaut: marp)
+
+Dépendance optionnelle : pypdf pour la fusion avec signets ; à défaut,
+pdfunite (poppler-utils) assemble les pages sans signets.
+
+Usage :
+    python pipelines/scripts/build_marp.py
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from tardis_cache import ResultCache, hash_files
+
+try:
+    from pypdf import PdfWriter
+except ImportError:  # fusion sans signets via pdfunite
+    PdfWriter = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+THEME_SET_DIR = os.path.join(BASE_DIR, 'themes', 'marp')
+
+SRC = os.getenv('SLIDES_SRC_DIR', 'caller/b-UnitesEnseignement/Presentations')
+OUT_HTML = os.getenv('SLIDES_OUT_DIR') or os.path.join(SRC, 'dist', 'html')
+PDF_DIR = os.getenv('SLIDES_PDF_DIR') or os.path.join(SRC, 'dist', 'pdf')
+OUT_PDF = os.getenv('SLIDES_OUT_PDF', '')
+BUILD_PDF = os.getenv('SLIDES_PDF', '') == '1' or bool(OUT_PDF)
+THEME_NAME = os.getenv('THEME_NAME', 'etml-2025')
+IGNORE = [p.strip() for p in os.getenv('SLIDES_IGNORE', '').split(',') if p.strip()]
+CACHE_DIR = os.getenv('TARDIS_CACHE_DIR') or os.path.join(SRC, 'dist', '.tardis-cache')
+JOBS = int(os.getenv('TARDIS_JOBS', '0') or 0) or os.cpu_count() or 1
+MARP = shlex.split(os.getenv('MARP', 'marp'))
+
+HTML_OPTIONS = ['--html', '--allow-local-files']
+PDF_OPTIONS = ['--pdf', '--pdf-outlines', '--html', '--allow-local-files']
+DECK_INDEX = 'decks.json'
+
+# Dossiers jamais parcourus (sorties, dépendances)
+_SKIP_DIRS = ('dist', 'node_modules')
+
+# Références locales dans un deck : ![](…), src="…"/href="…" (y compris
+# échappés dans le front matter YAML) et url(…) (backgroundImage, style)
+_REF_RES = (
+    re.compile(r'!\[[^\]]*\]\(\s*<?([^)\s>]+)'),
+    re.compile(r'(?:src|href)\s*=\s*\\?["\']([^"\'\\]+)'),
+    re.compile(r'url\(\s*\\?["\']?([^"\')\\]+)'),
+)
+_EXTERNAL = ('http:', 'https:', '//', 'data:', 'mailto:', '#', '/')
+
+_FM_RE = re.compile(r'^\ufeff?---\s*\n(.*?)\n(?:---|\.\.\.)', re.S)
+_FM_TITLE_RE = re.compile(r'^title:\s*(.+?)\s*$', re.M)
+_FM_SEQ_RE = re.compile(r'^seq:\s*["\']?(.+?)["\']?\s*$', re.M)
+_FM_ORDER_RE = re.compile(r'^order:\s*["\']?(-?\d+(?:\.\d+)?)["\']?\s*$', re.M)
+_SEQ_NUM_RE = re.compile(r'^SEQ-(\d+)$')
+_H1_RE = re.compile(r'^#\s+(.+?)\s*#*\s*$', re.M)
+_NUM_RE = re.compile(r'(\d+)')
+
+
+# ---------------------------------------------------------------------------
+# Découverte des decks et des assets
+# ---------------------------------------------------------------------------
+
+def _walk(srcdir: str):
+    """(chemin, relatif) de chaque fichier source, hors sorties et dossiers cachés."""
+    for dirpath, dirnames, filenames in os.walk(srcdir):
+        top = os.path.samefile(dirpath, srcdir)
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if not d.startswith('.') and not (top and d in _SKIP_DIRS)
+        )
+        for name in sorted(filenames):
+            if name.startswith('.'):
+                continue
+            path = os.path.join(dirpath, name)
+            yield path, os.path.relpath(path, srcdir).replace(os.sep, '/')
+
+
+def collect_decks(srcdir: str):
+    """Retourne [(chemin, relatif)] des .md à convertir."""
+    return [
+        (path, rel) for path, rel in _walk(srcdir)
+        if rel.lower().endswith('.md')
+        and not any(fnmatch.fnmatch(rel, pat) for pat in IGNORE)
+    ]
+
+
+def referenced_files(path: str):
+    """Fichiers locaux existants référencés par le deck."""
+    with open(path, encoding='utf-8', errors='replace') as fh:
+        text = fh.read()
+    base = os.path.dirname(path)
+    refs = set()
+    for regex in _REF_RES:
+        for m in regex.finditer(text):
+            url = m.group(1).strip()
+            if url.startswith(_EXTERNAL):
+                continue
+            target = os.path.normpath(os.path.join(base, url.split('#')[0].split('?')[0]))
+            if os.path.isfile(target):
+                refs.add(target)
+    return sorted(refs)
+
+
+def copy_assets(srcdir: str, outdir: str):
+    """Recopie les fichiers non-.md absents ou modifiés. Retourne (copiés, inchangés)."""
+    copied = unchanged = 0
+    for path, rel in _walk(srcdir):
+        if rel.lower().endswith('.md'):
+            continue
+        dest = os.path.join(outdir, rel)
+        try:
+            st_src, st_dest = os.stat(path), os.stat(dest)
+        except OSError:
+            pass
+        else:
+            if st_src.st_size == st_dest.st_size and int(st_src.st_mtime) == int(st_dest.st_mtime):
+                unchanged += 1
+                continue
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copy2(path, dest)
+        copied += 1
+    return copied, unchanged
+
+
+# ---------------------------------------------------------------------------
+# Clés de cache
+# ---------------------------------------------------------------------------
+
+def marp_version() -> str:
+    try:
+        proc = subprocess.run(MARP + ['--version'], capture_output=True, text=True, timeout=120)
+    except (OSError, subprocess.TimeoutExpired):
+        return ''
+    return proc.stdout.strip()
+
+
+def deck_key(path: str, shared: str) -> str:
+    h = hashlib.sha256(shared.encode('ascii'))
+    h.update(hash_files([path], root=SRC).encode('ascii'))
+    h.update(hash_files(referenced_files(path), root=SRC).encode('ascii'))
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Conversion marp-cli (pool de processus)
+# ---------------------------------------------------------------------------
+
+def run_marp(path: str, output: str, options):
+    """Convertit un deck. Exécuté dans un processus du pool."""
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    proc = subprocess.run(
+        MARP + [path] + list(options) + ['--theme-set', THEME_SET_DIR, '--output', output],
+        capture_output=True,
+        text=True,
+        errors='replace',
+    )
+    return proc.returncode, (proc.stderr or proc.stdout)[-3000:]
+
+
+def build_decks(decks, outdir: str, ext: str, options, cache: ResultCache, shared: str):
+    """Restaure ou convertit chaque deck vers <outdir>/<rel>.<ext>.
+
+    Retourne (convertis, repris, en erreur, {rel: clé}).
+    """
+    keys = {}
+    pending = {}
+    reused = 0
+    for path, rel in decks:
+        target = os.path.join(outdir, rel[:-3] + ext)
+        key = deck_key(path, shared)
+        keys[rel] = key
+        if cache.has(key):
+            cache.restore(rel, key, target)
+            print('✓', rel[:-3] + ext, '(cache)')
+            reused += 1
+        else:
+            pending[rel] = (path, key, target)
+
+    # Decks supprimés : leur sortie disparaît aussi
+    for rel in [r for r in cache.index if r not in keys]:
+        try:
+            os.remove(os.path.join(outdir, rel[:-3] + ext))
+        except OSError:
+            pass
+        del cache.index[rel]
+
+    failed = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=min(JOBS, len(pending))) as pool:
+            futures = {
+                pool.submit(run_marp, path, target, options): rel
+                for rel, (path, _key, target) in pending.items()
+            }
+            for fut in as_completed(futures):
+                rel = futures[fut]
+                _path, key, target = pending[rel]
+                code, log = fut.result()
+                if code != 0 or not os.path.isfile(target):
+                    print(f'❌ marp a échoué pour {rel}\n{log}', file=sys.stderr)
+                    failed += 1
+                    continue
+                cache.store(rel, key, target)
+                print('✓', rel[:-3] + ext)
+
+    cache.prune()
+    cache.save()
+    return len(pending) - failed, reused, failed, keys
+
+
+# ---------------------------------------------------------------------------
+# PDF combiné
+# ---------------------------------------------------------------------------
+
+def _front_matter(path: str) -> str:
+    try:
+        with open(path, encoding='utf-8', errors='replace') as fh:
+            m = _FM_RE.match(fh.read())
+    except OSError:
+        return ''
+    return m.group(1) if m else ''
+
+
+def deck_order(path: str):
+    """Clé de tri seq/order — même règle que merge-slides-pdf.mjs."""
+    fm = _front_matter(path)
+    m = _FM_SEQ_RE.search(fm)
+    seq = m.group(1).strip() if m else ''
+    m = _FM_ORDER_RE.search(fm)
+    order = float(m.group(1)) if m else 9999
+    num = _SEQ_NUM_RE.match(seq)
+    return (0, int(num.group(1)), '', order) if num else (1, 0, seq.lower(), order)
+
+
+def merge_pdfs(parts, output: str) -> None:
+    """Assemble [(titre, pdf)] ; un signet par deck, signets du deck imbriqués."""
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    if PdfWriter is None:
+        if not shutil.which('pdfunite'):
+            raise RuntimeError('ni pypdf ni pdfunite disponibles pour la fusion')
+        print('⚠️  pypdf absent : fusion via pdfunite, sans signets par deck')
+        subprocess.run(['pdfunite', *[pdf for _title, pdf in parts], output], check=True)
+        return
+    writer = PdfWriter()
+    for title, pdf in parts:
+        writer.append(pdf, outline_item=title, import_outline=True)
+    with open(output, 'wb') as fh:
+        writer.write(fh)
+    writer.close()
+
+
+def build_combined(decks, keys: dict, pdf_dir: str, output: str, cache: ResultCache) -> bool:
+    """PDF combiné depuis les PDF par deck ; repris du cache si rien n'a changé."""
+    parts = []
+    for path, rel in sorted(decks, key=lambda d: (deck_order(d[0]), _natural_key(d[1]))):
+        pdf = os.path.join(pdf_dir, rel[:-3] + '.pdf')
+        if rel not in keys or not os.path.isfile(pdf):
+            print(f'⚠️  PDF introuvable (skippé): {pdf}')
+            continue
+        title = deck_title(path, os.path.splitext(os.path.basename(rel))[0])
+        parts.append((title, pdf, keys[rel]))
+    if not parts:
+        print('⚠️  Aucun PDF de deck à fusionner.')
+        return False
+
+    h = hashlib.sha256(b'pypdf' if PdfWriter is not None else b'pdfunite')
+    for title, _pdf, key in parts:
+        h.update(f'{title}\0{key}\0'.encode('utf-8'))
+    key = h.hexdigest()
+    name = os.path.basename(output)
+    cache.index.clear()
+    if cache.has(key):
+        cache.restore(name, key, output)
+        print(f'📑 PDF combiné inchangé ({len(parts)} deck(s)) → {output} (cache)')
+    else:
+        print(f'📑 Fusion de {len(parts)} PDF (triés par séquence)')
+        merge_pdfs([(title, pdf) for title, pdf, _key in parts], output)
+        cache.store(name, key, output)
+        print(f'✅ PDF combiné: {output}')
+    cache.prune()
+    cache.save()
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Index statique des decks (lu par index.php)
+# ---------------------------------------------------------------------------
+
+def deck_title(path: str, default: str) -> str:
+    """Titre du front matter, sinon premier titre `#`, sinon nom du fichier."""
+    try:
+        with open(path, encoding='utf-8', errors='replace') as fh:
+            text = fh.read()
+    except OSError:
+        return default
+    fm = _FM_RE.match(text)
+    m = _FM_TITLE_RE.search(fm.group(1)) if fm else None
+    if m:
+        value = m.group(1)
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+            value = value[1:-1]
+        return value
+    m = _H1_RE.search(text[fm.end():] if fm else text)
+    return m.group(1) if m else default
+
+
+def _natural_key(rel: str):
+    """Tri « naturel » (SEQ-2 avant SEQ-10), comme natsort() en PHP."""
+    return [int(part) if part.isdigit() else part.lower() for part in _NUM_RE.split(rel)]
+
+
+def _file_info(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, None
+    modified = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(int(st.st_mtime)))
+    return st.st_size, modified
+
+
+def write_index(decks, outdir: str, pdf_dir: str, combined_pdf: str = '') -> dict:
+    """Écrit <outdir>/decks.json et le retourne.
+
+    `modified` est la date du HTML produit : restauré depuis le cache, il
+    garde la date de sa dernière compilation réelle. Le champ `hash` ne
+    dépend que du contenu de l'index (ETag côté index.php).
+    """
+    entries = []
+    for path, rel in sorted(decks, key=lambda d: _natural_key(d[1])):
+        html = rel[:-3] + '.html'
+        size, modified = _file_info(os.path.join(outdir, html))
+        if size is None:
+            continue
+        pdf = rel[:-3] + '.pdf'
+        pdf_size, _ = _file_info(os.path.join(pdf_dir, pdf))
+        folder, file = os.path.split(html)
+        entries.append({
+            'title': deck_title(path, os.path.splitext(file)[0]),
+            'folder': folder,
+            'file': file,
+            'html': html,
+            'pdf': pdf if pdf_size is not None else None,
+            'size': size,
+            'pdf_size': pdf_size,
+            'modified': modified,
+        })
+
+    combined = None
+    if combined_pdf and os.path.isfile(combined_pdf):
+        size, modified = _file_info(combined_pdf)
+        rel = os.path.relpath(combined_pdf, pdf_dir).replace(os.sep, '/')
+        combined = {'pdf': rel, 'size': size, 'modified': modified}
+
+    body = {'decks': entries, 'combined': combined}
+    digest = hashlib.sha256(
+        json.dumps(body, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()[:16]
+    index = {'version': 1, 'hash': digest, **body}
+
+    os.makedirs(outdir, exist_ok=True)
+    with open(os.path.join(outdir, DECK_INDEX), 'w', encoding='utf-8') as fh:
+        json.dump(index, fh, ensure_ascii=False, indent=1)
+    return index
+
+
+# ---------------------------------------------------------------------------
+# MAIN
+# ---------------------------------------------------------------------------
+
+def main() -> int:
+    started = time.monotonic()
+    if not os.path.isdir(SRC):
+        print(f'Dossier source introuvable: {SRC} — aucune présentation à compiler.')
+        return 0
+
+    theme_dir = os.path.join(THEME_SET_DIR, THEME_NAME)
+    if not os.path.isdir(theme_dir):
+        print(f'❌ Thème introuvable: {theme_dir}', file=sys.stderr)
+        return 1
+
+    decks = collect_decks(SRC)
+    if not decks:
+        print(f'⚠️  Aucun fichier .md trouvé dans {SRC}/')
+        return 0
+
+    version = marp_version()
+    if not version:
+        print(f'❌ marp-cli introuvable ({" ".join(MARP)})', file=sys.stderr)
+        return 1
+
+    # Tout le jeu de thèmes : `theme: <autre>` dans un front matter, @import entre thèmes
+    theme_hash = hash_files([THEME_SET_DIR], root=THEME_SET_DIR, extra=[version])
+    cache = ResultCache(os.path.join(CACHE_DIR, 'marp-html'), ext='.html')
+    shared = hash_files([], extra=[theme_hash, *HTML_OPTIONS])
+    built, reused, failed, _keys = build_decks(decks, OUT_HTML, '.html', HTML_OPTIONS, cache, shared)
+
+    if BUILD_PDF:
+        cache = ResultCache(os.path.join(CACHE_DIR, 'marp-pdf'), ext='.pdf')
+        shared = hash_files([], extra=[theme_hash, *PDF_OPTIONS])
+        pdf_built, pdf_reused, pdf_failed, keys = build_decks(
+            decks, PDF_DIR, '.pdf', PDF_OPTIONS, cache, shared)
+        print(f'PDF: {pdf_built} deck(s) exporté(s), {pdf_reused} repris du cache, '
+              f'{pdf_failed} en erreur.')
+        failed += pdf_failed
+        if OUT_PDF:
+            build_combined(decks, keys, PDF_DIR, OUT_PDF,
+                           ResultCache(os.path.join(CACHE_DIR, 'marp-combined'), ext='.pdf'))
+
+    copied, unchanged = copy_assets(SRC, OUT_HTML)
+    index = write_index(decks, OUT_HTML, PDF_DIR, OUT_PDF)
+    print(f'🗂️  Index: {len(index["decks"])} deck(s) → {os.path.join(OUT_HTML, DECK_INDEX)}')
+
+    print(f'Terminé en {time.monotonic() - started:.1f}s: {built} deck(s) compilé(s), '
+          f'{reused} repris du cache, {failed} en erreur ; '
+          f'assets: {copied} copié(s), {unchanged} inchangé(s).')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -184,6 +184,46 @@ async function pdfExerciseFull(page, htmlAbs, pdfTarget, baseName) {
   });
 }
 
+// ---------------------------------------------------------------------------
+// INDEX DES PAGES D'EXERCICES (écrit par l'extension tardis_exercises)
+// ---------------------------------------------------------------------------
+const EXO_INDEX_REL = path.join("_tardis", "exercises.json");
+// État du dernier export : dans le cache de build, jamais dans PDF_OUT (déployé)
+const CACHE_DIR = process.env.TARDIS_CACHE_DIR || path.join(SRC, "_build", ".tardis-cache");
+const STATE_PATH = path.join(CACHE_DIR, "exo-pdf-playwright.json");
+
+async function loadIndexHashes(file) {
+  try {
+    const data = JSON.parse(await fs.readFile(file, "utf8"));
+    return new Map((data.pages || []).map((p) => [p.html, p.sha256]));
+  } catch {
+    return null;
+  }
+}
+
+async function loadState() {
+  try {
+    return JSON.parse(await fs.readFile(STATE_PATH, "utf8")).pages || {};
+  } catch {
+    return {};
+  }
+}
+
+// Tout ce qui entre dans le PDF en dehors de la page : thème (CSS d'en-tête,
+// de pied, print-exo, logos), métadonnées, date et ce script lui-même
+async function renderKey() {
+  const h = crypto.createHash("sha256");
+  for (const part of [
+    headerCss, footerCss, await safeLoad(PRINT_EXO_CSS_PATH),
+    LOGO_DATA, SECTION_LOGO_DATA,
+    ICT_MODULE, JSON.stringify(AUTHOR), TODAY,
+    await safeLoad(new URL(import.meta.url).pathname),
+  ]) {
+    h.update(String(part)).update("\0");
+  }
+  return h.digest("hex");
+}
+
 // ---------------------------------------------------------------------------
 // MAIN
 // ---------------------------------------------------------------------------
@@ -194,7 +234,7 @@ async function main() {
     return;
   }
 
-  // collecte des .md sous /exercices (hors index.md)
+  // collecte des .md sous /exercices (hors index.md), ordre stable pour les noms
   const mdFiles = [];
   for await (const p of walk(SRC)) {
     if (!p.toLowerCase().endsWith(".md")) continue;
@@ -203,6 +243,7 @@ async function main() {
     if (path.basename(p).toLowerCase() === "index.md") continue;
     mdFiles.push(p);
   }
+  mdFiles.sort();
 
   if (!mdFiles.length) {
     console.log("Aucun exercice trouvé.");
@@ -217,6 +258,14 @@ async function main() {
   await fs.mkdir(bucketExo, { recursive: true });
   await fs.mkdir(bucketSol, { recursive: true });
 
+  // Pages inchangées depuis le dernier export : même empreinte HTML, même
+  // rendu (thème, auteur, date…), même nom de PDF et PDF présent
+  const curHashes = await loadIndexHashes(path.join(HTML_OUT, EXO_INDEX_REL));
+  const prevState = curHashes ? await loadState() : {};
+  const nextState = {};
+  const render = await renderKey();
+  const claimed = new Set();
+
   const browser = await chromium.launch();
   const ctx = await browser.newContext({ locale: "fr-CH" });
   const page = await ctx.newPage();
@@ -241,16 +290,30 @@ async function main() {
     const bucket = parent === "solutions" ? bucketSol : bucketExo;
 
     const baseName = path.basename(mdPath, ".md");
+    const htmlKey = htmlRel.split(path.sep).join("/");
 
+    // Nom final résolu avant le test de reprise : deux exercices de même nom
+    // dans un même dossier → le second prend un suffixe dérivé de son chemin
     let pdfName = `${baseName}.pdf`;
-    let pdfTarget = path.join(bucket, pdfName);
-
-    try {
-      await fs.access(pdfTarget);
-      const h = shortHash(rel);
-      pdfName = `${baseName}-${h}.pdf`;
-      pdfTarget = path.join(bucket, pdfName);
-    } catch {}
+    if (claimed.has(path.join(bucket, pdfName))) {
+      pdfName = `${baseName}-${shortHash(rel)}.pdf`;
+    }
+    const pdfTarget = path.join(bucket, pdfName);
+    claimed.add(pdfTarget);
+    const pdfKey = path.relative(PDF_OUT, pdfTarget).split(path.sep).join("/");
+
+    const hash = curHashes?.get(htmlKey);
+    const key = hash ? crypto.createHash("sha256").update(`${hash}\0${render}`).digest("hex") : null;
+    if (key) nextState[htmlKey] = { key, pdf: pdfKey };
+    const prev = prevState[htmlKey];
+    if (key && prev?.key === key && prev.pdf === pdfKey) {
+      try {
+        await fs.access(pdfTarget);
+        console.log("= PDF inchangé", pdfKey);
+        skipped++;
+        continue;
+      } catch {}
+    }
 
     await pdfExerciseFull(page, htmlAbs, pdfTarget, baseName);
     console.log("✓ PDF", path.relative(PDF_OUT, pdfTarget));
@@ -259,6 +322,11 @@ async function main() {
 
   await browser.close();
 
+  if (curHashes) {
+    await fs.mkdir(CACHE_DIR, { recursive: true });
+    await fs.writeFile(STATE_PATH, JSON.stringify({ pages: nextState }, null, 2), "utf8");
+  }
+
   console.log(`Terminé: ${converted} PDF exo/sol créés, ${skipped} ignorés.`);
 }
 
@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Déploiement FTPS parallèle par delta d'empreintes
+---------------------------------------------------------
+Utilisé par l'action composite .github/actions/ftp-sync (remplace
+FTP-Deploy-Action, qui envoie tout sur une seule connexion).
+
+Étapes :
+1. Empreinte SHA-256 de chaque fichier de LOCAL_DIR.
+2. Lecture du manifeste distant <SERVER_DIR>/<STATE_NAME> (absent → tout est
+   envoyé). Le format est celui de FTP-Deploy-Action : les fichiers d'état
+   déjà présents sur le serveur restent valides.
+3. Création des dossiers manquants, puis envoi des fichiers nouveaux ou
+   modifiés et suppression des fichiers disparus, répartis sur FTP_CONNECTIONS
+   connexions FTPS ; chaque opération est retentée FTP_RETRIES fois (avec
+   reconnexion).
+4. Écriture du nouveau manifeste en dernier (fichier temporaire + RENAME). Un
+   fichier en échec garde son ancienne empreinte et sera renvoyé au
+   prochain déploiement.
+
+Variables d'environnement :
+    FTP_SERVER, FTP_USERNAME, FTP_PASSWORD   accès (obligatoires)
+    FTP_PORT          port (défaut: 21)
+    FTP_TLS           1 = FTPS explicite (défaut), 0 = FTP en clair (tests locaux)
+    FTP_TLS_VERIFY    1 pour vérifier le certificat (défaut: 0, comme curl -k)
+    FTP_CONNECTIONS   connexions simultanées (défaut: 4)
+    FTP_RETRIES       tentatives par opération (défaut: 3)
+    FTP_TIMEOUT_MS    timeout réseau par opération (défaut: 300000)
+    LOCAL_DIR         dossier local à synchroniser (obligatoire)
+    SERVER_DIR        dossier distant (obligatoire)
+    STATE_NAME        nom du manifeste distant (défaut: .ftp-sync-state.json)
+    LOG_LEVEL         minimal | basic | standard | verbose (défaut: minimal)
+    DRY_RUN           1 pour afficher le delta sans rien modifier
+
+Test local (pyftpdlib) :
+    python -m pyftpdlib -p 2121 -w -d /tmp/ftp-root -u test -P test &
+    FTP_SERVER=127.0.0.1 FTP_PORT=2121 FTP_TLS=0 FTP_USERNAME=test FTP_PASSWORD=test \\
+      LOCAL_DIR=_build/html SERVER_DIR=moduleICT/346/cours \\
+      python tardis-pipelines/scripts/ftp_deploy.py
+"""
+
+import ftplib
+import io
+import json
+import os
+import posixpath
+import ssl
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fnmatch import fnmatch
+
+from tardis_cache import sha256_file
+
+SERVER = os.getenv('FTP_SERVER', '')
+USERNAME = os.getenv('FTP_USERNAME', '')
+PASSWORD = os.getenv('FTP_PASSWORD', '')
+PORT = int(os.getenv('FTP_PORT', '21') or 21)
+USE_TLS = os.getenv('FTP_TLS', '1') != '0'
+TLS_VERIFY = os.getenv('FTP_TLS_VERIFY', '0') == '1'
+CONNECTIONS = max(1, int(os.getenv('FTP_CONNECTIONS', '4') or 4))
+RETRIES = max(1, int(os.getenv('FTP_RETRIES', '3') or 3))
+TIMEOUT = int(os.getenv('FTP_TIMEOUT_MS', '300000') or 300000) / 1000
+LOCAL_DIR = os.getenv('LOCAL_DIR', '')
+SERVER_DIR = os.getenv('SERVER_DIR', '')
+STATE_NAME = os.getenv('STATE_NAME', '.ftp-sync-state.json')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'minimal')
+DRY_RUN = os.getenv('DRY_RUN', '') == '1'
+
+# Mêmes exclusions par défaut que FTP-Deploy-Action
+EXCLUDE = ('.git*', '.git*/**', '**/.git*', '**/.git*/**', '**/node_modules/**', 'node_modules/**')
+
+STATE_DESCRIPTION = (
+    "DO NOT DELETE THIS FILE. Manifeste d'empreintes du dernier déploiement "
+    "(tardis-pipelines/scripts/ftp_deploy.py). Supprimé → tout est renvoyé."
+)
+
+
+def log(level: str, *args) -> None:
+    order = ('minimal', 'basic', 'standard', 'verbose')
+    if order.index(level) <= order.index(LOG_LEVEL if LOG_LEVEL in order else 'minimal'):
+        print(*args, flush=True)
+
+
+# ---------------------------------------------------------------------------
+# Manifestes local / distant
+# ---------------------------------------------------------------------------
+
+def _excluded(rel: str) -> bool:
+    return any(fnmatch(rel, pat) for pat in EXCLUDE)
+
+
+def local_manifest(root: str) -> dict:
+    """{chemin relatif: (sha256, taille)} des fichiers à déployer."""
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            rel = os.path.relpath(path, root).replace(os.sep, '/')
+            if rel == STATE_NAME or _excluded(rel):
+                continue
+            files[rel] = (sha256_file(path), os.path.getsize(path))
+    return files
+
+
+def parse_state(data: bytes) -> dict:
+    """Fichier d'état distant → {chemin: sha256}. Illisible ou vide → {}."""
+    try:
+        state = json.loads(data.decode('utf-8') or '{}')
+    except ValueError:
+        return {}
+    return {
+        item['name']: item.get('hash', '')
+        for item in state.get('data', [])
+        if isinstance(item, dict) and item.get('type') == 'file' and 'name' in item
+    }
+
+
+def render_state(files: dict) -> bytes:
+    folders = sorted({
+        posixpath.dirname(rel) for rel in files if posixpath.dirname(rel)
+    })
+    data = [{'type': 'folder', 'name': f} for f in folders]
+    data += [
+        {'type': 'file', 'name': rel, 'size': size, 'hash': digest}
+        for rel, (digest, size) in sorted(files.items())
+    ]
+    state = {
+        'description': STATE_DESCRIPTION,
+        'version': '1.0.0',
+        'generatedTime': int(time.time() * 1000),
+        'data': data,
+    }
+    return json.dumps(state, indent=1).encode('utf-8')
+
+
+def _parents(rel: str):
+    parts = rel.split('/')[:-1]
+    return ['/'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+# ---------------------------------------------------------------------------
+# Connexions FTPS
+# ---------------------------------------------------------------------------
+
+class ReusedSessionFTP_TLS(ftplib.FTP_TLS):
+    """FTP_TLS qui réutilise la session TLS du canal de contrôle pour les
+    connexions de données (exigé par vsftpd/pure-ftpd en mode strict)."""
+
+    def ntransfercmd(self, cmd, rest=None):
+        conn, size = ftplib.FTP.ntransfercmd(self, cmd, rest)
+        if self._prot_p:
+            conn = self.context.wrap_socket(
+                conn, server_hostname=self.host, session=self.sock.session
+            )
+        return conn, size
+
+
+def connect() -> ftplib.FTP:
+    if USE_TLS:
+        context = ssl.create_default_context()
+        if not TLS_VERIFY:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        ftp = ReusedSessionFTP_TLS(context=context, timeout=TIMEOUT)
+    else:
+        ftp = ftplib.FTP(timeout=TIMEOUT)
+    ftp.connect(SERVER, PORT)
+    ftp.login(USERNAME, PASSWORD)
+    if USE_TLS:
+        ftp.prot_p()
+    ftp.set_pasv(True)
+    return ftp
+
+
+class ConnectionPool:
+    """Une connexion par thread de travail, recréée après une erreur."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def get(self) -> ftplib.FTP:
+        ftp = getattr(self._local, 'ftp', None)
+        if ftp is None:
+            ftp = connect()
+            self._local.ftp = ftp
+            with self._lock:
+                self._all.append(ftp)
+        return ftp
+
+    def reset(self) -> None:
+        ftp = getattr(self._local, 'ftp', None)
+        self._local.ftp = None
+        if ftp is not None:
+            try:
+                ftp.close()
+            except OSError:
+                pass
+
+    def run(self, action, *args):
+        """Exécute action(ftp, *args) avec retentatives et reconnexion."""
+        for attempt in range(1, RETRIES + 1):
+            try:
+                return action(self.get(), *args)
+            except ftplib.error_perm:
+                raise
+            except (ftplib.Error, OSError, EOFError) as exc:
+                self.reset()
+                if attempt == RETRIES:
+                    raise
+                target = args[0] if args and isinstance(args[0], str) else ''
+                log('basic', f'↻ {action.__name__} {target}: {exc} — nouvelle tentative ({attempt}/{RETRIES})')
+                time.sleep(min(2 ** attempt, 10))
+
+    def close(self) -> None:
+        for ftp in self._all:
+            try:
+                ftp.quit()
+            except (ftplib.Error, OSError, EOFError):
+                try:
+                    ftp.close()
+                except OSError:
+                    pass
+
+
+def _remote(rel: str) -> str:
+    return posixpath.join(SERVER_DIR, rel) if rel else SERVER_DIR.rstrip('/') or '/'
+
+
+def read_state(ftp, name: str) -> dict:
+    buf = io.BytesIO()
+    try:
+        ftp.retrbinary('RETR ' + _remote(name), buf.write)
+    except ftplib.error_perm:
+        return {}
+    return parse_state(buf.getvalue())
+
+
+def make_dirs(ftp, dirs) -> None:
+    """Crée les dossiers (parents d'abord) ; « existe déjà » est ignoré."""
+    for d in sorted(dirs, key=lambda p: (p.count('/'), p)):
+        try:
+            ftp.mkd(d)
+            log('verbose', '📁', d)
+        except ftplib.error_perm:
+            pass
+
+
+def remove_dirs(ftp, dirs) -> None:
+    """Supprime les dossiers (plus profonds d'abord) ; non vide ou absent est ignoré."""
+    for d in sorted(dirs, key=lambda p: (-p.count('/'), p)):
+        try:
+            ftp.rmd(d)
+            log('verbose', '🗑️ ', d)
+        except ftplib.error_perm:
+            pass
+
+
+def upload(ftp, rel: str, local_root: str):
+    with open(os.path.join(local_root, rel), 'rb') as fh:
+        ftp.storbinary('STOR ' + _remote(rel), fh)
+
+
+def delete(ftp, rel: str):
+    try:
+        ftp.delete(_remote(rel))
+    except ftplib.error_perm:
+        pass  # déjà absent
+
+
+def write_state(ftp, name: str, data: bytes) -> None:
+    tmp = _remote(name + '.tmp')
+    ftp.storbinary('STOR ' + tmp, io.BytesIO(data))
+    try:
+        ftp.delete(_remote(name))
+    except ftplib.error_perm:
+        pass
+    ftp.rename(tmp, _remote(name))
+
+
+# ---------------------------------------------------------------------------
+# MAIN
+# ---------------------------------------------------------------------------
+
+def _server_dir_chain() -> list:
+    parts = [p for p in SERVER_DIR.strip('/').split('/') if p]
+    prefix = '/' if SERVER_DIR.startswith('/') else ''
+    return [prefix + '/'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+def main() -> int:
+    started = time.monotonic()
+    missing = [k for k, v in (('FTP_SERVER', SERVER), ('FTP_USERNAME', USERNAME),
+                              ('FTP_PASSWORD', PASSWORD), ('LOCAL_DIR', LOCAL_DIR),
+                              ('SERVER_DIR', SERVER_DIR)) if not v]
+    if missing:
+        print(f'❌ Variables manquantes: {", ".join(missing)}', file=sys.stderr)
+        return 1
+    if not os.path.isdir(LOCAL_DIR):
+        print(f'❌ Dossier local introuvable: {LOCAL_DIR}', file=sys.stderr)
+        return 1
+
+    local = local_manifest(LOCAL_DIR)
+    pool = ConnectionPool()
+    try:
+        remote = pool.run(read_state, STATE_NAME)
+        to_upload = sorted(rel for rel, (digest, _size) in local.items() if remote.get(rel) != digest)
+        to_delete = sorted(rel for rel in remote if rel not in local)
+        upload_bytes = sum(local[rel][1] for rel in to_upload)
+        print(f'📦 {len(local)} fichier(s) locaux — {len(to_upload)} à envoyer '
+              f'({upload_bytes / 1e6:.1f} Mo), {len(to_delete)} à supprimer, '
+              f'{len(local) - len(to_upload)} inchangé(s) → {SERVER}:{SERVER_DIR}')
+        if DRY_RUN:
+            for rel in to_upload:
+                print('  +', rel)
+            for rel in to_delete:
+                print('  -', rel)
+            return 0
+
+        known = {d for rel in remote for d in _parents(rel)}
+        dirs = {d for rel in to_upload for d in _parents(rel)} - known
+        chain = _server_dir_chain() if not remote else []
+        pool.run(make_dirs, chain + [_remote(d) for d in dirs])
+
+        # Nouveau manifeste : ancienne empreinte conservée pour les échecs
+        state = {rel: (digest, local[rel][1] if rel in local else 0)
+                 for rel, digest in remote.items()}
+        done = {'+': 0, '-': 0}
+        deleted = []
+        failed = 0
+        with ThreadPoolExecutor(max_workers=CONNECTIONS) as executor:
+            futures = {executor.submit(pool.run, upload, rel, LOCAL_DIR): ('+', rel) for rel in to_upload}
+            futures.update({executor.submit(pool.run, delete, rel): ('-', rel) for rel in to_delete})
+            for fut in as_completed(futures):
+                op, rel = futures[fut]
+                try:
+                    fut.result()
+                except (ftplib.Error, OSError, EOFError) as exc:
+                    print(f'❌ {op} {rel}: {exc}', file=sys.stderr)
+                    failed += 1
+                    continue
+                if op == '+':
+                    state[rel] = local[rel]
+                else:
+                    state.pop(rel, None)
+                    deleted.append(rel)
+                done[op] += 1
+                log('standard', op, rel)
+
+        # Dossiers dont plus aucun fichier déployé ne dépend
+        occupied = {d for rel in state for d in _parents(rel)}
+        empty = {d for rel in deleted for d in _parents(rel)} - occupied
+        if empty:
+            pool.run(remove_dirs, [_remote(d) for d in empty])
+
+        pool.run(write_state, STATE_NAME, render_state(state))
+    except (ftplib.Error, OSError, EOFError) as exc:
+        print(f'❌ Erreur FTP ({SERVER}:{PORT}): {exc}', file=sys.stderr)
+        return 1
+    finally:
+        pool.close()
+
+    elapsed = time.monotonic() - started
+    print(f'Terminé en {elapsed:.1f}s: {done["+"]} envoyé(s), {done["-"]} supprimé(s) '
+          f'sur {CONNECTIONS} connexion(s), {failed} en erreur.')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+/**
+ * Écriture du manifeste TARDIS pour la landing (themes/tardis/etml-2025/index.html).
+ *
+ * - tardis.<hash>.json      racine minifiée : synopsis (legal), séquences avec
+ *                           compteurs et nom de leur fichier de détail, stats ;
+ * - seq/<seq>.<hash>.json   items complets d'une séquence, chargés par la
+ *                           landing à l'ouverture de l'onglet ;
+ * - tardis.json             manifeste complet minifié (autres consommateurs,
+ *                           repli de la landing).
+ *
+ * Les noms empreintés changent avec le contenu : .htaccess pose un cache long
+ * dessus, tardis.json et tardis.yml restent revalidés. La racine ne contient
+ * pas `generated_at` : un manifeste inchangé garde son nom d'un build à l'autre.
+ * Le nom de la racine est injecté dans la landing au bundle (%%TARDIS_MANIFEST%%,
+ * voir rootManifestName). Les fichiers empreintés obsolètes sont supprimés.
+ *
+ * Utilisé par scripts/build-manifest.mjs et par le workflow build-tardis-manifest.
+ */
+
+import { createHash } from 'crypto';
+import fs from 'fs/promises';
+import path from 'path';
+import { gzipSync } from 'zlib';
+
+const HASH_LEN = 10;
+const SEQ_DIR = 'seq';
+const ROOT_RE = new RegExp(`^tardis\\.[0-9a-f]{${HASH_LEN}}\\.json$`);
+
+const HTACCESS = `# Manifestes empreintés : le nom change avec le contenu → cache long
+<IfModule mod_headers.c>
+  <FilesMatch "\\.[0-9a-f]{${HASH_LEN}}\\.json$">
+    Header set Cache-Control "public, max-age=31536000, immutable"
+  </FilesMatch>
+  <FilesMatch "^tardis\\.(json|yml)$">
+    Header set Cache-Control "no-cache"
+  </FilesMatch>
+</IfModule>
+`;
+
+const hashed = (base, payload) =>
+  `${base}.${createHash('sha256').update(payload).digest('hex').slice(0, HASH_LEN)}.json`;
+
+const safeName = seq => String(seq).replace(/[^A-Za-z0-9_-]/g, '_') || 'seq';
+
+/** Nom du manifeste racine présent dans `outDir` (null si absent). */
+export async function rootManifestName(outDir) {
+  const names = await fs.readdir(outDir).catch(() => []);
+  return names.find(n => ROOT_RE.test(n)) || null;
+}
+
+async function removeStale(dir, keep, re) {
+  for (const name of await fs.readdir(dir).catch(() => [])) {
+    if (re.test(name) && !keep.has(name)) await fs.rm(path.join(dir, name));
+  }
+}
+
+/**
+ * Écrit racine, détails, tardis.json et .htaccess ; retourne les tailles (octets).
+ */
+export async function writeManifest(manifest, outDir) {
+  const seqDir = path.join(outDir, SEQ_DIR);
+  await fs.mkdir(seqDir, { recursive: true });
+
+  const details = [];
+  const sequences = (manifest.sequences || []).map(s => {
+    const payload = JSON.stringify(s);
+    const name = hashed(safeName(s.seq), payload);
+    details.push({ name, payload });
+    return { seq: s.seq, count: s.count, detail: `${SEQ_DIR}/${name}` };
+  });
+
+  const { generated_at, sequences: _full, index_by_seq, ...rest } = manifest;
+  const root = JSON.stringify({ ...rest, sequences });
+  const rootName = hashed('tardis', root);
+  const full = JSON.stringify(manifest);
+
+  await fs.writeFile(path.join(outDir, rootName), root, 'utf8');
+  for (const { name, payload } of details) {
+    await fs.writeFile(path.join(seqDir, name), payload, 'utf8');
+  }
+  await fs.writeFile(path.join(outDir, 'tardis.json'), full, 'utf8');
+  await fs.writeFile(path.join(outDir, '.htaccess'), HTACCESS, 'utf8');
+
+  await removeStale(outDir, new Set([rootName]), ROOT_RE);
+  await removeStale(seqDir, new Set(details.map(d => d.name)), /\.[0-9a-f]+\.json$/);
+
+  const bytes = s => Buffer.byteLength(s);
+  const gz = s => gzipSync(s, { level: 9 }).length;
+  return {
+    rootName,
+    root: bytes(root),
+    rootGz: gz(root),
+    details: details.reduce((n, d) => n + bytes(d.payload), 0),
+    largestDetail: Math.max(0, ...details.map(d => bytes(d.payload))),
+    count: details.length,
+    full: bytes(full),
+    fullGz: gz(full),
+    pretty: bytes(JSON.stringify(manifest, null, 2)),
+  };
+}
+
+/** Log des tailles, et ligne de tableau dans le résumé du job GitHub si disponible. */
+export async function reportManifestSizes(sizes, module) {
+  const kb = n => `${(n / 1024).toFixed(1)} Ko`;
+  console.log(
+    `📦 Manifeste ${module || '(module ?)'} : racine ${kb(sizes.root)} (gz ${kb(sizes.rootGz)}), ` +
+    `${sizes.count} détail(s) ${kb(sizes.details)} (le plus gros ${kb(sizes.largestDetail)}) — ` +
+    `complet ${kb(sizes.full)} (gz ${kb(sizes.fullGz)}), indenté ${kb(sizes.pretty)}`
+  );
+  const summary = process.env.GITHUB_STEP_SUMMARY;
+  if (summary) {
+    await fs.appendFile(summary,
+      '| Module | Racine | Racine gz | Détails | Plus gros détail | Complet | Indenté |\n' +
+      '|---|---|---|---|---|---|---|\n' +
+      `| ${module || '?'} | ${kb(sizes.root)} | ${kb(sizes.rootGz)} | ${sizes.count} · ${kb(sizes.details)} | ` +
+      `${kb(sizes.largestDetail)} | ${kb(sizes.full)} | ${kb(sizes.pretty)} |\n`, 'utf8');
+  }
+}
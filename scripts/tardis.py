@@ -0,0 +1,706 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Pipeline complet en local (graphe de dépendances)
+----------------------------------------------------------
+Enchaîne sur une seule machine ce que les workflows font en plusieurs jobs
+(checkout, installation des dépendances et artefacts à chaque fois) :
+
+    lint        tardis_lint.py (directives MyST) — échec rapide avant html
+    html        Sphinx HTML                     → <build>/cours          (après lint)
+    exo-pdf     PDF d'exercices (build_exo_pdf.py, xelatex)
+                                                → <build>/pdf/exercices
+    manifest    tardis.json / tardis.yml        → <build>/tardis/manifests
+    ui          landing TARDIS (index.html)     → <build>/tardis      (après manifest)
+    slides      decks Marp HTML + PDF (build_marp.py)
+                                                → <build>/presentations, <build>/pdf/presentations
+    pdf-index   landing des PDF                 → <build>/pdf/index.html (après exo-pdf, slides)
+
+Les étapes indépendantes tournent en parallèle. Chaque étape a une clé :
+empreinte de ses entrées (sources, conf.py, extensions, thèmes, scripts),
+de ses variables d'environnement et des clés des étapes dont elle dépend.
+Clé inchangée et sorties présentes → étape sautée. Les empreintes de
+fichiers sont mémorisées par (taille, date) dans <build>/.tardis-cache/
+pipeline.json : un second lancement ne relit pas les vidéos.
+
+Les caches internes des drivers (PDF d'exercices, decks Marp) restent actifs :
+une étape relancée ne recompile que ce qui a changé.
+
+Variables d'environnement (défauts = arborescence du Makefile local) :
+    TARDIS_UNITS_DIR          b-UnitesEnseignement
+    TARDIS_DOCS_DIR           <units>/Support
+    TARDIS_PRESENTATIONS_DIR  <units>/Presentations
+    TARDIS_BUILD_DIR          _build_local
+    ICT_MODULE, BRANCH_NAME   module et branche (défaut: branche git courante)
+
+Mode batch (rebuild de tous les modules après un correctif de thème ou
+d'extension) : chaque module est construit dans un pool de processus dont
+les workers importent une seule fois Sphinx, myst_parser,
+sphinx_external_toc, furo et les extensions TARDIS, puis enchaînent les
+modules. conf.py est ré-exécuté pour chaque module avec son propre
+ICT_MODULE (HTML_BASEURL est recalculé par conf.py) ; les registres docutils
+sont isolés par module comme dans sphinx-build.
+
+Mode formats (un module, plusieurs sorties) : les sources sont lues une
+seule fois (builder dummy, lecture parallèle) dans <out>/.doctrees, puis
+chaque sortie — HTML par thème (SPHINX_THEME), LaTeX — est écrite dans son
+propre processus à partir de l'environnement picklé, sans relire le MyST.
+
+Mode serve (rédaction) : une application Sphinx reste chargée, les sources
+(Markdown, html/, video/) sont surveillées et seuls les documents touchés
+sont relus ; les onglets ouverts se rechargent par WebSocket
+(voir tardis_serve.py).
+
+Usage (depuis la racine du dépôt de cours) :
+    python tardis-pipelines/scripts/tardis.py run              # tout
+    python tardis-pipelines/scripts/tardis.py run slides ui    # + leurs dépendances
+    python tardis-pipelines/scripts/tardis.py run -j 2 --force
+    python tardis-pipelines/scripts/tardis.py list
+    python tardis-pipelines/scripts/tardis.py batch -o _build_batch \
+        ../I346/b-UnitesEnseignement/Support=346 ../I117/b-UnitesEnseignement/Support=117
+    python tardis-pipelines/scripts/tardis.py formats b-UnitesEnseignement/Support \
+        html:etml-2025 html:etml-2026-furo latex -o _build_formats
+    python tardis-pipelines/scripts/tardis.py serve b-UnitesEnseignement/Support --port 8000
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+
+from tardis_cache import iter_files, sha256_file
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+
+UNITS = os.getenv('TARDIS_UNITS_DIR', 'b-UnitesEnseignement')
+DOCS = os.getenv('TARDIS_DOCS_DIR') or os.path.join(UNITS, 'Support')
+PRESENTATIONS = os.getenv('TARDIS_PRESENTATIONS_DIR') or os.path.join(UNITS, 'Presentations')
+BUILD = os.getenv('TARDIS_BUILD_DIR', '_build_local')
+CACHE_DIR = os.path.join(BUILD, '.tardis-cache')
+STATE_PATH = os.path.join(CACHE_DIR, 'pipeline.json')
+LOG_DIR = os.path.join(CACHE_DIR, 'logs')
+PDF_DIR = os.path.join(BUILD, 'pdf')
+_MANIFEST_ROOT_RE = re.compile(r'^tardis\.[0-9a-f]{10}\.json$')
+
+# Variables du module transmises aux étapes (et donc dans leurs clés) ; toutes
+# les variables TARDIS_* (options des extensions) y sont ajoutées, voir module_env()
+_MODULE_ENV = ('ICT_MODULE', 'AUTHOR', 'SPHINX_THEME', 'GOATCOUNTER_URL', 'HTML_BASEURL')
+
+
+def module_env() -> dict:
+    """Variables d'environnement qui entrent dans la clé de chaque étape."""
+    env = {key: os.getenv(key, '') for key in _MODULE_ENV}
+    env.update({k: v for k, v in os.environ.items() if k.startswith('TARDIS_')})
+    return env
+
+
+def _branch() -> str:
+    branch = os.getenv('BRANCH_NAME')
+    if branch:
+        return branch
+    try:
+        proc = subprocess.run(['git', 'branch', '--show-current'],
+                              capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return 'main'
+    return proc.stdout.strip() or 'main'
+
+
+def _pipelines(*parts) -> str:
+    return os.path.join(BASE_DIR, *parts)
+
+
+# ---------------------------------------------------------------------------
+# Étapes
+# ---------------------------------------------------------------------------
+
+class Stage:
+    """Une étape du graphe : commande (ou fonction), entrées, sorties."""
+
+    def __init__(self, name, *, deps=(), inputs=(), suffixes=None, outputs=(),
+                 cmd=None, action=None, env=None, tools=()):
+        self.name = name
+        self.deps = tuple(deps)
+        self.inputs = tuple(inputs)
+        self.suffixes = suffixes
+        self.outputs = tuple(outputs)
+        self.cmd = cmd
+        self.action = action
+        self.env = dict(env or {})
+        self.tools = tuple(tools)
+
+    def missing_tools(self):
+        return [t for t in self.tools if not shutil.which(t)]
+
+
+def write_ui() -> None:
+    """Copie la landing TARDIS et remplace les marqueurs (comme le Makefile)."""
+    theme = _pipelines('themes', 'tardis', 'etml-2025')
+    out = os.path.join(BUILD, 'tardis')
+    os.makedirs(out, exist_ok=True)
+    branch = _branch()
+    prefix = '' if branch in ('main', 'master') else '/' + branch
+    with open(os.path.join(theme, 'index.html'), encoding='utf-8') as fh:
+        html = fh.read()
+    # Manifeste racine empreinté écrit par l'étape manifest (manifestSplit.mjs)
+    manifests = os.path.join(out, 'manifests')
+    names = sorted(os.listdir(manifests)) if os.path.isdir(manifests) else []
+    root = next((n for n in names if _MANIFEST_ROOT_RE.match(n)), 'tardis.json')
+    html = (html.replace('%%ICT_MODULE%%', os.getenv('ICT_MODULE', ''))
+                .replace('%%BRANCH_PREFIX%%', prefix)
+                .replace('%%TARDIS_MANIFEST%%', root))
+    with open(os.path.join(out, 'index.html'), 'w', encoding='utf-8') as fh:
+        fh.write(html)
+    shutil.copy2(os.path.join(theme, 'styles.css'), os.path.join(out, 'styles.css'))
+
+
+def build_stages() -> dict:
+    module = os.getenv('ICT_MODULE', '')
+    safe_branch = _branch().replace('/', '-')
+    python = sys.executable
+    sphinx_inputs = (DOCS, _pipelines('conf.py'), _pipelines('extensions'),
+                     _pipelines('themes', 'sphinx'))
+    stages = [
+        Stage(
+            'lint',
+            inputs=[DOCS, _pipelines('extensions'), _pipelines('scripts', 'tardis_lint.py')],
+            suffixes=('.md', '.py'),
+            cmd=[python, _pipelines('scripts', 'tardis_lint.py'), DOCS],
+        ),
+        Stage(
+            'html',
+            deps=['lint'],
+            inputs=sphinx_inputs,
+            outputs=[os.path.join(BUILD, 'cours', 'index.html')],
+            cmd=[python, '-m', 'sphinx', '-q', '-c', BASE_DIR, '-b', 'html',
+                 DOCS, os.path.join(BUILD, 'cours')],
+        ),
+        Stage(
+            'exo-pdf',
+            inputs=sphinx_inputs + (_pipelines('themes', 'pdf'),
+                                    _pipelines('scripts', 'build_exo_pdf.py')),
+            outputs=[os.path.join(PDF_DIR, 'exercices')],
+            cmd=[python, _pipelines('scripts', 'build_exo_pdf.py')],
+            env={
+                'SPHINX_SRC_DIR': DOCS,
+                'PDF_OUT_DIR': os.path.join(PDF_DIR, 'exercices'),
+                'LATEX_OUT_DIR': os.path.join(BUILD, 'exo-latex'),
+                'TARDIS_CACHE_DIR': CACHE_DIR,
+            },
+            tools=['latexmk'],
+        ),
+        Stage(
+            'manifest',
+            inputs=[UNITS, _pipelines('scripts', 'build-manifest.mjs'),
+                    _pipelines('scripts', 'manifestSplit.mjs')],
+            suffixes=('.md', '.mjs'),
+            outputs=[os.path.join(BUILD, 'tardis', 'manifests', 'tardis.json')],
+            cmd=['node', _pipelines('scripts', 'build-manifest.mjs')],
+            env={
+                'SRC_DIR': os.path.abspath(UNITS),
+                'OUT_DIR': os.path.abspath(os.path.join(BUILD, 'tardis', 'manifests')),
+            },
+            tools=['node'],
+        ),
+        Stage(
+            'ui',
+            deps=['manifest'],
+            inputs=[_pipelines('themes', 'tardis', 'etml-2025')],
+            outputs=[os.path.join(BUILD, 'tardis', 'index.html')],
+            action=write_ui,
+            env={'BRANCH_NAME': safe_branch},
+        ),
+        Stage(
+            'slides',
+            inputs=[PRESENTATIONS, _pipelines('themes', 'marp'),
+                    _pipelines('scripts', 'build_marp.py')],
+            outputs=[os.path.join(BUILD, 'presentations', 'decks.json')],
+            cmd=[python, _pipelines('scripts', 'build_marp.py')],
+            env={
+                'SLIDES_SRC_DIR': PRESENTATIONS,
+                'SLIDES_OUT_DIR': os.path.join(BUILD, 'presentations'),
+                'SLIDES_PDF_DIR': os.path.join(PDF_DIR, 'presentations'),
+                'SLIDES_OUT_PDF': os.path.join(PDF_DIR, 'presentations',
+                                               f'{module}-{safe_branch}_slides.pdf'),
+                'SLIDES_IGNORE': 'index.md',
+                'TARDIS_CACHE_DIR': CACHE_DIR,
+                'MARP': os.getenv('MARP', 'npx @marp-team/marp-cli'),
+            },
+            tools=['npx'],
+        ),
+        Stage(
+            'pdf-index',
+            deps=['exo-pdf', 'slides'],
+            inputs=[_pipelines('scripts', 'build_pdf_index.mjs')],
+            outputs=[os.path.join(PDF_DIR, 'index.html')],
+            cmd=['node', _pipelines('scripts', 'build_pdf_index.mjs')],
+            env={
+                'PDF_ROOT': os.path.abspath(PDF_DIR),
+                'SRC_DIR': os.path.abspath(PRESENTATIONS),
+            },
+            tools=['node'],
+        ),
+    ]
+    return {stage.name: stage for stage in stages}
+
+
+def select(stages: dict, names) -> list:
+    """Étapes demandées + leurs dépendances, en ordre topologique."""
+    order = []
+
+    def visit(name, path=()):
+        if name not in stages:
+            raise SystemExit(f'❌ Étape inconnue: {name} (voir: tardis.py list)')
+        if name in path:
+            raise SystemExit(f'❌ Cycle de dépendances: {" → ".join(path + (name,))}')
+        if name in order:
+            return
+        for dep in stages[name].deps:
+            visit(dep, path + (name,))
+        order.append(name)
+
+    for name in names or stages:
+        visit(name)
+    return order
+
+
+# ---------------------------------------------------------------------------
+# Clés de cache
+# ---------------------------------------------------------------------------
+
+class Fingerprints:
+    """Empreintes SHA-256 mémorisées par (taille, mtime) entre deux lancements."""
+
+    def __init__(self, memo: dict):
+        self.memo = memo
+
+    def file(self, path: str) -> str:
+        st = os.stat(path)
+        stamp = f'{st.st_size}:{st.st_mtime_ns}'
+        entry = self.memo.get(path)
+        if entry and entry[0] == stamp:
+            return entry[1]
+        digest = sha256_file(path)
+        self.memo[path] = [stamp, digest]
+        return digest
+
+    def stage(self, stage: Stage, dep_keys) -> str:
+        h = hashlib.sha256(stage.name.encode('utf-8') + b'\0')
+        for part in stage.cmd or [stage.action.__name__]:
+            h.update(str(part).encode('utf-8') + b'\0')
+        for key in sorted(stage.env):
+            h.update(f'{key}={stage.env[key]}\0'.encode('utf-8'))
+        env = module_env()
+        for key in sorted(env):
+            h.update(f'{key}={env[key]}\0'.encode('utf-8'))
+        for key in dep_keys:
+            h.update(key.encode('ascii') + b'\0')
+        for path in stage.inputs:
+            files = iter_files(path) if os.path.isdir(path) else [path] if os.path.isfile(path) else []
+            for f in files:
+                if stage.suffixes and not f.endswith(stage.suffixes):
+                    continue
+                if os.sep + '_build' in f or os.sep + 'dist' + os.sep in f:
+                    continue  # sorties des builds précédents
+                h.update(os.path.relpath(f).replace(os.sep, '/').encode('utf-8') + b'\0')
+                h.update(self.file(f).encode('ascii') + b'\0')
+        return h.hexdigest()
+
+
+def load_state() -> dict:
+    try:
+        with open(STATE_PATH, encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: dict) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = STATE_PATH + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(state, fh, indent=1, sort_keys=True)
+    os.replace(tmp, STATE_PATH)
+
+
+# ---------------------------------------------------------------------------
+# Exécution
+# ---------------------------------------------------------------------------
+
+def run_stage(stage: Stage, jobs_per_stage: int):
+    """Exécute une étape ; retourne (code, durée, chemin du log)."""
+    started = time.monotonic()
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, stage.name + '.log')
+    if stage.action is not None:
+        try:
+            stage.action()
+        except OSError as exc:
+            with open(log_path, 'w', encoding='utf-8') as fh:
+                fh.write(f'{exc}\n')
+            return 1, time.monotonic() - started, log_path
+        return 0, time.monotonic() - started, log_path
+
+    env = dict(os.environ, **stage.env)
+    env.setdefault('TARDIS_JOBS', str(jobs_per_stage))
+    with open(log_path, 'w', encoding='utf-8') as log:
+        proc = subprocess.run(stage.cmd, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return proc.returncode, time.monotonic() - started, log_path
+
+
+def _tail(path: str, lines: int = 30) -> str:
+    try:
+        with open(path, encoding='utf-8', errors='replace') as fh:
+            return ''.join(fh.readlines()[-lines:])
+    except OSError:
+        return ''
+
+
+def run(names, jobs: int, force: bool, dry_run: bool) -> int:
+    started = time.monotonic()
+    stages = build_stages()
+    order = select(stages, names)
+    state = load_state()
+    prints = Fingerprints(state.setdefault('files', {}))
+    keys_done = state.setdefault('stages', {})
+
+    jobs_per_stage = max(1, (os.cpu_count() or 1) // max(1, min(jobs, len(order))))
+    status = {}   # nom → 'ok' | 'cached' | 'failed' | 'skipped'
+    keys = {}
+    running = {}
+    pending = list(order)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name in list(pending):
+                stage = stages[name]
+                if any(status.get(d) in ('failed', 'skipped') for d in stage.deps):
+                    status[name] = 'skipped'
+                    pending.remove(name)
+                    print(f'⏭️  {name}: dépendance en échec')
+                    continue
+                if not all(status.get(d) in ('ok', 'cached') for d in stage.deps):
+                    continue
+                pending.remove(name)
+                missing = stage.missing_tools()
+                if missing:
+                    status[name] = 'skipped'
+                    print(f'⏭️  {name}: outil manquant ({", ".join(missing)})')
+                    continue
+                key = prints.stage(stage, [keys[d] for d in stage.deps])
+                keys[name] = key
+                outputs_ok = all(os.path.exists(p) for p in stage.outputs)
+                if not force and keys_done.get(name) == key and outputs_ok:
+                    status[name] = 'cached'
+                    print(f'✓ {name} (cache)')
+                    continue
+                if dry_run:
+                    status[name] = 'ok'
+                    print(f'→ {name} serait relancée')
+                    continue
+                print(f'▶️  {name}')
+                running[pool.submit(run_stage, stage, jobs_per_stage)] = name
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                code, elapsed, log_path = fut.result()
+                if code == 0:
+                    status[name] = 'ok'
+                    keys_done[name] = keys[name]
+                    print(f'✓ {name} ({elapsed:.1f}s)')
+                else:
+                    status[name] = 'failed'
+                    keys_done.pop(name, None)
+                    print(f'❌ {name} ({elapsed:.1f}s) — log: {log_path}\n{_tail(log_path)}',
+                          file=sys.stderr)
+            if not dry_run:
+                save_state(state)
+
+    if not dry_run:
+        save_state(state)
+    counts = {s: sum(1 for v in status.values() if v == s)
+              for s in ('ok', 'cached', 'skipped', 'failed')}
+    print(f'Terminé en {time.monotonic() - started:.1f}s: {counts["ok"]} exécutée(s), '
+          f'{counts["cached"]} en cache, {counts["skipped"]} sautée(s), '
+          f'{counts["failed"]} en échec.')
+    return 1 if counts['failed'] else 0
+
+
+def list_stages() -> int:
+    for name, stage in build_stages().items():
+        deps = f' (après {", ".join(stage.deps)})' if stage.deps else ''
+        missing = stage.missing_tools()
+        note = f'  ⚠️ manque: {", ".join(missing)}' if missing else ''
+        print(f'{name}{deps}{note}')
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Mode batch : plusieurs modules, workers Sphinx « chauds »
+# ---------------------------------------------------------------------------
+
+_WARM_MODULES = ('sphinx.application', 'sphinx.builders.html', 'myst_parser',
+                 'sphinx_external_toc', 'furo', 'tardis_textarea', 'tardis_qcm',
+                 'tardis_cards', 'tardis_video', 'tardis_html', 'tardis_analytics',
+                 'tardis_fingerprint', 'tardis_offline', 'tardis_compress', 'tardis_store',
+                 'tardis_digest', 'tardis_weight', 'tardis_prefetch',
+                 'tardis_search', 'tardis_tasks')
+
+
+def _warm_worker() -> None:
+    """Initialiseur du pool : imports coûteux faits une fois par worker."""
+    import importlib
+
+    sys.path.insert(0, _pipelines('extensions'))
+    for name in _WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+def parse_module_spec(spec: str):
+    """`chemin[=ICT_MODULE]` → (chemin, module, nom de sortie)."""
+    path, sep, module = spec.partition('=')
+    path = os.path.abspath(path)
+    if not sep:
+        module = ''
+    name = module or os.path.basename(os.path.dirname(os.path.dirname(path))) or os.path.basename(path)
+    return path, module, name
+
+
+def _run_sphinx(srcdir: str, outdir: str, doctreedir: str, buildername: str,
+                env: dict, log_path: str, parallel: int = 0):
+    """Build Sphinx dans le processus courant ; retourne (code, documents lus).
+
+    `env` : variables posées le temps du build (None → variable retirée),
+    conf.py les lit à chaque exécution.
+    """
+    from sphinx.application import Sphinx
+    from sphinx.util.docutils import docutils_namespace, patch_docutils
+
+    reread = []
+    saved = dict(os.environ)
+    try:
+        for key, value in env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        with open(log_path, 'w', encoding='utf-8') as log, \
+                patch_docutils(BASE_DIR), docutils_namespace():
+            app = Sphinx(
+                srcdir=srcdir,
+                confdir=BASE_DIR,
+                outdir=outdir,
+                doctreedir=doctreedir,
+                buildername=buildername,
+                status=log,
+                warning=log,
+                parallel=parallel,
+            )
+            app.connect('env-before-read-docs', lambda _app, _env, docnames: reread.extend(docnames))
+            app.build()
+            code = app.statuscode
+    except Exception as exc:  # un build en erreur ne doit pas arrêter les autres
+        with open(log_path, 'a', encoding='utf-8') as log:
+            log.write(f'\n{type(exc).__name__}: {exc}\n')
+        code = 1
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+    return code, len(reread)
+
+
+def build_module(srcdir: str, module: str, outdir: str, buildername: str):
+    """Construit un module dans le worker courant ; retourne (code, durée, log)."""
+    started = time.monotonic()
+    os.makedirs(outdir, exist_ok=True)
+    log_path = os.path.join(outdir, 'build.log')
+    # Configuration propre au module : HTML_BASEURL est recalculé par conf.py
+    code, _reread = _run_sphinx(
+        srcdir, os.path.join(outdir, buildername), os.path.join(outdir, '.doctrees'),
+        buildername, {'HTML_BASEURL': None, 'ICT_MODULE': module or None}, log_path,
+    )
+    return code, time.monotonic() - started, log_path
+
+
+def batch(specs, out: str, jobs: int, buildername: str) -> int:
+    started = time.monotonic()
+    modules = [parse_module_spec(spec) for spec in specs]
+    names = [name for _path, _module, name in modules]
+    if len(set(names)) != len(names):
+        print('❌ Noms de sortie en double : précisez =ICT_MODULE pour chaque module', file=sys.stderr)
+        return 1
+    for path, _module, _name in modules:
+        if not os.path.isdir(path):
+            print(f'❌ Dossier source introuvable: {path}', file=sys.stderr)
+            return 1
+
+    failed = 0
+    workers = max(1, min(jobs, len(modules)))
+    print(f'📚 {len(modules)} module(s), {workers} worker(s) → {out}/<module>/{buildername}')
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker) as pool:
+        futures = {
+            pool.submit(build_module, path, module, os.path.join(out, name), buildername): name
+            for path, module, name in modules
+        }
+        for fut in as_completed(futures):
+            name = futures[fut]
+            code, elapsed, log_path = fut.result()
+            if code:
+                failed += 1
+                print(f'❌ {name} ({elapsed:.1f}s) — log: {log_path}\n{_tail(log_path)}',
+                      file=sys.stderr)
+            else:
+                print(f'✓ {name} ({elapsed:.1f}s)')
+
+    total = time.monotonic() - started
+    print(f'Terminé en {total:.1f}s: {len(modules) - failed} module(s) construit(s), '
+          f'{failed} en échec ({len(modules) / total * 60:.1f} modules/min).')
+    return 1 if failed else 0
+
+
+# ---------------------------------------------------------------------------
+# Mode formats : une lecture, plusieurs sorties
+# ---------------------------------------------------------------------------
+
+def parse_format_spec(spec: str):
+    """`html:<thème>` ou `latex` → (builder, thème, nom de sortie)."""
+    builder, _sep, theme = spec.partition(':')
+    if builder != 'html':
+        return builder, '', builder
+    theme = theme or os.getenv('SPHINX_THEME', 'etml-2026-furo')
+    return builder, theme, f'html-{theme}'
+
+
+def write_format(srcdir: str, doctreedir: str, outdir: str, buildername: str, env: dict):
+    """Écrit une sortie depuis l'environnement déjà lu ; retourne (code, relus, durée, log)."""
+    started = time.monotonic()
+    os.makedirs(outdir, exist_ok=True)
+    log_path = os.path.join(os.path.dirname(outdir), f'{os.path.basename(outdir)}.log')
+    code, reread = _run_sphinx(srcdir, outdir, doctreedir, buildername, env, log_path)
+    return code, reread, time.monotonic() - started, log_path
+
+
+def formats(srcdir: str, specs, out: str, jobs: int, module: str) -> int:
+    started = time.monotonic()
+    srcdir = os.path.abspath(srcdir)
+    if not os.path.isdir(srcdir):
+        print(f'❌ Dossier source introuvable: {srcdir}', file=sys.stderr)
+        return 1
+    outputs = [parse_format_spec(spec) for spec in specs]
+    doctreedir = os.path.join(out, '.doctrees')
+    os.makedirs(out, exist_ok=True)
+    base_env = {'HTML_BASEURL': os.getenv('HTML_BASEURL'), 'ICT_MODULE': module or os.getenv('ICT_MODULE')}
+
+    # 1. Lecture seule (builder dummy) : parse MyST, environnement et doctrees
+    #    partagés, écrits une fois dans <out>/.doctrees
+    sys.path.insert(0, _pipelines('extensions'))
+    log_path = os.path.join(out, 'read.log')
+    code, reread = _run_sphinx(srcdir, os.path.join(out, '.dummy'), doctreedir, 'dummy',
+                               base_env, log_path, parallel=max(1, jobs))
+    if code:
+        print(f'❌ Lecture ({time.monotonic() - started:.1f}s) — log: {log_path}\n{_tail(log_path)}',
+              file=sys.stderr)
+        return 1
+    print(f'📖 {reread} document(s) lu(s) en {time.monotonic() - started:.1f}s → {doctreedir}')
+
+    # 2. Écritures en parallèle : chaque worker recharge l'environnement
+    #    picklé sans relire les sources (seules des valeurs de config
+    #    « html »/« latex » diffèrent ; le pickle n'est réécrit que si des
+    #    documents sont relus, ce qui n'arrive pas ici)
+    failed = 0
+    workers = max(1, min(jobs, len(outputs)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker) as pool:
+        futures = {}
+        for builder, theme, name in outputs:
+            env = dict(base_env, SPHINX_THEME=theme) if theme else base_env
+            fut = pool.submit(write_format, srcdir, doctreedir, os.path.join(out, name), builder, env)
+            futures[fut] = name
+        for fut in as_completed(futures):
+            name = futures[fut]
+            code, reread, elapsed, log_path = fut.result()
+            if code:
+                failed += 1
+                print(f'❌ {name} ({elapsed:.1f}s) — log: {log_path}\n{_tail(log_path)}',
+                      file=sys.stderr)
+                continue
+            print(f'✓ {name} ({elapsed:.1f}s)')
+            if reread:
+                print(f'   ⚠️  {reread} document(s) relu(s) : configuration « env » différente de la lecture')
+
+    print(f'Terminé en {time.monotonic() - started:.1f}s: {len(outputs) - failed} sortie(s), '
+          f'{failed} en échec.')
+    return 1 if failed else 0
+
+
+# ---------------------------------------------------------------------------
+# MAIN
+# ---------------------------------------------------------------------------
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='tardis', description='Pipeline TARDIS local')
+    sub = parser.add_subparsers(dest='command')
+
+    p_run = sub.add_parser('run', help='exécute les étapes (toutes par défaut)')
+    p_run.add_argument('stages', nargs='*', help='étapes à exécuter (+ dépendances)')
+    p_run.add_argument('-j', '--jobs', type=int, default=3, help='étapes en parallèle (défaut: 3)')
+    p_run.add_argument('-f', '--force', action='store_true', help='ignore le cache des étapes')
+    p_run.add_argument('-n', '--dry-run', action='store_true', help='affiche sans exécuter')
+
+    sub.add_parser('list', help='liste les étapes et leurs dépendances')
+
+    p_batch = sub.add_parser('batch', help='construit plusieurs modules avec des workers Sphinx partagés')
+    p_batch.add_argument('modules', nargs='+', metavar='SRC[=ICT_MODULE]',
+                         help='dossier source Sphinx du module, suivi de son code ICT')
+    p_batch.add_argument('-o', '--out', default='_build_batch', help='dossier de sortie (défaut: _build_batch)')
+    p_batch.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                         help='workers (défaut: nb CPU)')
+    p_batch.add_argument('-b', '--builder', default='html', help='builder Sphinx (défaut: html)')
+
+    p_formats = sub.add_parser('formats', help='une lecture Sphinx, plusieurs thèmes HTML et LaTeX')
+    p_formats.add_argument('srcdir', help='dossier source Sphinx du module')
+    p_formats.add_argument('formats', nargs='*', metavar='FORMAT',
+                           help='html:<thème> ou latex (défaut: html:$SPHINX_THEME latex)')
+    p_formats.add_argument('-o', '--out', default='_build_formats', help='dossier de sortie (défaut: _build_formats)')
+    p_formats.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                           help='processus de lecture et d\'écriture (défaut: nb CPU)')
+    p_formats.add_argument('-m', '--module', default='', help='ICT_MODULE (défaut: variable d\'environnement)')
+
+    p_serve = sub.add_parser('serve', help='prévisualisation avec reconstruction et rechargement à chaud')
+    p_serve.add_argument('srcdir', help='dossier source Sphinx du module')
+    p_serve.add_argument('-o', '--out', default='_build_serve', help='dossier de sortie (défaut: _build_serve)')
+    p_serve.add_argument('--host', default='127.0.0.1', help='adresse d\'écoute (défaut: 127.0.0.1)')
+    p_serve.add_argument('-p', '--port', type=int, default=8000, help='port HTTP (défaut: 8000)')
+    p_serve.add_argument('-m', '--module', default='', help='ICT_MODULE (défaut: variable d\'environnement)')
+    p_serve.add_argument('--search', action='store_true',
+                         help='garde l\'index de recherche et l\'index général (rebuild plus lent)')
+
+    args = parser.parse_args(argv)
+    if args.command == 'list':
+        return list_stages()
+    if args.command == 'run':
+        return run(args.stages, max(1, args.jobs), args.force, args.dry_run)
+    if args.command == 'batch':
+        return batch(args.modules, args.out, args.jobs, args.builder)
+    if args.command == 'formats':
+        return formats(args.srcdir, args.formats or ['html', 'latex'], args.out, args.jobs, args.module)
+    if args.command == 'serve':
+        from tardis_serve import serve
+        return serve(args.srcdir, args.out, args.host, args.port, args.module, args.search)
+    parser.print_help()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,474 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Dépouillement des réponses exportées par les élèves
+------------------------------------------------------------
+Les élèves rendent le Markdown produit par le bouton {export-answers} :
+
+    # Réponses – <titre de la page>
+    _Export du 2026-03-12_
+
+    ## <label du bloc>
+    ```                         {answer} : texte libre
+    ...
+    ```
+
+    ## <label>
+    - [x] OSPF                  {qcm-answer} : une ligne par choix
+    - [ ] RIP
+
+    ## <label>
+    | 7 | [HTTP] | [80] |       {hole-answer} : template, trous remplis
+                                ([___] si vide)
+
+Le script parcourt un dossier (récursivement) ou une archive .zip de ces
+fichiers et les rapproche des pages du site généré (--site) :
+_tardis/exercises.json liste les pages d'exercices, dont le HTML donne le
+titre exporté, l'ordre, l'id, le label et les métadonnées des blocs (JSON
+#tardis-answers : choix des QCM, template des textes à trous). Un fichier
+est associé à la page de même titre (puis de mêmes labels), chaque section
+au bloc de même rang et de même label.
+
+Agrégats par bloc :
+    answer  réponses non vides / vides, longueur moyenne
+    qcm     nombre de cases cochées par choix, copies sans aucune case
+    hole    distribution des valeurs saisies par trou, trous laissés vides
+
+Sortie JSON (détail complet) ou CSV (une ligne par page, bloc, clé, valeur)
+selon l'extension de -o ; sans -o, résumé à l'écran. Les fichiers sont
+analysés dans un pool de processus, soumis par lots bornés : la mémoire
+reste constante quel que soit le nombre de copies.
+
+Usage :
+    python scripts/tardis_answers.py rendus/ --site _build/html -o stats.csv
+    python scripts/tardis_answers.py rendus.zip autres/ --site _build/html -o stats.json -j 8
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+import zipfile
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from html.parser import HTMLParser
+
+TITLE_RE = re.compile(r'^#\s+Réponses\s+[–-]\s*(.*)$')
+HOLE_RE = re.compile(r'\[_+\]')
+QCM_LINE_RE = re.compile(r'^-\s+\[([ xX])\]\s?(.*)$')
+EMPTY_HOLE = '___'
+# Fichiers par tâche envoyée au pool
+BATCH_SIZE = 256
+
+BLOCK_CLASSES = {
+    'answer-block': 'answer',
+    'tardis-qcm-answer': 'qcm',
+    'tardis-hole-answer': 'hole',
+}
+
+
+# ---------------------------------------------------------------------------
+# Pages du site : blocs et métadonnées
+# ---------------------------------------------------------------------------
+
+def safe_title(raw: str) -> str:
+    """Équivalent de safeTitleText (responses.js) : titre tel qu'exporté."""
+    text = unicodedata.normalize('NFD', raw or 'Exercices')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[^a-zA-Z0-9\s\-]', '', text).strip()
+
+
+class PageParser(HTMLParser):
+    """Premier titre h1/h2, blocs de réponse (ordre du document) et JSON #tardis-answers."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self.blocks = []
+        self.meta = {}
+        self._heading = None
+        self._label = None
+        self._meta_text = None
+        self._stack = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+        if tag in ('h1', 'h2') and self.title is None and self._heading is None:
+            self._heading = []
+        elif tag == 'script' and attrs.get('id') == 'tardis-answers':
+            self._meta_text = []
+        elif tag == 'p' and 'answer-label' in classes and self._stack and self._stack[-1] is not None:
+            self._label = []
+        if tag == 'div':
+            kind = next((BLOCK_CLASSES[c] for c in classes if c in BLOCK_CLASSES), None)
+            if kind:
+                block = {'id': attrs.get('data-id', ''), 'type': kind, 'label': ''}
+                self.blocks.append(block)
+                self._stack.append(block)
+            else:
+                self._stack.append(None)
+
+    def handle_endtag(self, tag):
+        if tag in ('h1', 'h2') and self._heading is not None:
+            self.title = ''.join(self._heading)
+            self._heading = None
+        elif tag == 'script' and self._meta_text is not None:
+            try:
+                self.meta = json.loads(''.join(self._meta_text))
+            except ValueError:
+                self.meta = {}
+            self._meta_text = None
+        elif tag == 'p' and self._label is not None:
+            self._stack[-1]['label'] = ''.join(self._label).strip()
+            self._label = None
+        elif tag == 'div' and self._stack:
+            self._stack.pop()
+
+    def handle_data(self, data):
+        for buf in (self._heading, self._meta_text, self._label):
+            if buf is not None:
+                buf.append(data)
+
+
+def load_site(site: str) -> list:
+    """Pages d'exercices du site : [{docname, title, blocks: [{id, type, label, …}]}]."""
+    with open(os.path.join(site, '_tardis', 'exercises.json'), encoding='utf-8') as fh:
+        index = json.load(fh)
+    pages = []
+    for entry in index.get('pages', []):
+        path = os.path.join(site, entry['html'])
+        if not os.path.isfile(path):
+            continue
+        parser = PageParser()
+        with open(path, encoding='utf-8') as fh:
+            parser.feed(fh.read())
+        blocks = []
+        for block in parser.blocks:
+            meta = parser.meta.get(block['id'], {})
+            block['label'] = block['label'] or meta.get('label') or block['id'] or 'Réponse'
+            if block['type'] == 'qcm':
+                block['items'] = meta.get('items', [])
+            elif block['type'] == 'hole':
+                block['template'] = meta.get('template', '')
+            blocks.append(block)
+        if blocks:
+            pages.append({'docname': entry['docname'], 'title': safe_title(parser.title),
+                          'blocks': blocks})
+    return pages
+
+
+# ---------------------------------------------------------------------------
+# Analyse d'un fichier exporté (processus de travail)
+# ---------------------------------------------------------------------------
+
+_PAGES = []
+_BY_TITLE = {}
+_HOLE_PATTERNS = {}
+
+
+def _init_worker(pages: list) -> None:
+    global _PAGES, _BY_TITLE, _HOLE_PATTERNS
+    _PAGES = pages
+    _BY_TITLE = {}
+    for idx, page in enumerate(pages):
+        _BY_TITLE.setdefault(page['title'], []).append(idx)
+    _HOLE_PATTERNS = {}
+
+
+def split_export(text: str) -> tuple:
+    """(titre, [(label, corps)]) ; les ``` protègent les lignes « ## » des réponses."""
+    title = None
+    sections = []
+    fence = False
+    for line in text.splitlines():
+        if not fence and title is None and TITLE_RE.match(line):
+            title = TITLE_RE.match(line).group(1).strip()
+            continue
+        if not fence and line.startswith('## '):
+            sections.append([line[3:].strip(), []])
+            continue
+        if line.startswith('```'):
+            fence = not fence
+        if sections:
+            sections[-1][1].append(line)
+    return title, [(label, '\n'.join(body).strip('\n')) for label, body in sections]
+
+
+def _hole_pattern(template: str):
+    pattern = _HOLE_PATTERNS.get(template)
+    if pattern is None:
+        parts = HOLE_RE.split(template.strip())
+        pattern = re.compile(r'\[(.*?)\]'.join(re.escape(p) for p in parts), re.S)
+        _HOLE_PATTERNS[template] = pattern
+    return pattern
+
+
+def parse_block(block: dict, body: str):
+    """Réponse d'une section selon le type du bloc."""
+    if block['type'] == 'answer':
+        lines = body.strip().splitlines()
+        if lines and lines[0].startswith('```'):
+            lines = lines[1:]
+        if lines and lines[-1].startswith('```'):
+            lines = lines[:-1]
+        return '\n'.join(lines).strip()
+    if block['type'] == 'qcm':
+        return [m.group(1) != ' ' for m in map(QCM_LINE_RE.match, body.splitlines()) if m]
+    match = _hole_pattern(block.get('template', '')).fullmatch(body.strip())
+    if match is None:
+        return None
+    return ['' if v.strip() == EMPTY_HOLE else v.strip() for v in match.groups()]
+
+
+def _match_page(title: str, labels: list):
+    candidates = _BY_TITLE.get(safe_title(title), [])
+    if len(candidates) > 1:
+        # Titres identiques : la page dont les labels correspondent le mieux
+        candidates = sorted(candidates, key=lambda i: -sum(
+            1 for a, b in zip(labels, (blk['label'] for blk in _PAGES[i]['blocks'])) if a == b))
+    return candidates[0] if candidates else None
+
+
+def parse_export(item: tuple) -> tuple:
+    """(nom, texte) → (nom, indice de page ou None, {rang du bloc: réponse}, sections ignorées)."""
+    name, text = item
+    title, sections = split_export(text)
+    if title is None:
+        return name, None, {}, len(sections)
+    page_idx = _match_page(title, [label for label, _body in sections])
+    if page_idx is None:
+        return name, None, {}, len(sections)
+
+    blocks = _PAGES[page_idx]['blocks']
+    by_label = {}
+    for idx, block in enumerate(blocks):
+        by_label.setdefault(block['label'], []).append(idx)
+    answers = {}
+    skipped = 0
+    for rank, (label, body) in enumerate(sections):
+        if rank < len(blocks) and blocks[rank]['label'] == label and rank not in answers:
+            idx = rank
+        else:
+            idx = next((i for i in by_label.get(label, ()) if i not in answers), None)
+        value = parse_block(blocks[idx], body) if idx is not None else None
+        if value is None:
+            skipped += 1
+            continue
+        answers[idx] = value
+    return name, page_idx, answers, skipped
+
+
+# ---------------------------------------------------------------------------
+# Sources : dossiers et archives, lus au fil de l'eau
+# ---------------------------------------------------------------------------
+
+def iter_sources(paths: list):
+    for path in paths:
+        if os.path.isfile(path) and zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    if not info.is_dir() and info.filename.lower().endswith('.md'):
+                        yield (f'{path}:{info.filename}',
+                               zf.read(info).decode('utf-8', errors='replace'))
+        elif os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    if name.lower().endswith('.md'):
+                        full = os.path.join(dirpath, name)
+                        with open(full, encoding='utf-8', errors='replace') as fh:
+                            yield full, fh.read()
+        elif os.path.isfile(path):
+            with open(path, encoding='utf-8', errors='replace') as fh:
+                yield path, fh.read()
+        else:
+            print(f'⚠️  source introuvable : {path}', file=sys.stderr)
+
+
+def parse_batch(items: list) -> list:
+    return [parse_export(item) for item in items]
+
+
+def _batches(items, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_parallel(items, pages: list, jobs: int):
+    """
+    parse_export sur chaque (nom, texte), par lots de BATCH_SIZE fichiers
+    (une copie ne pèse que quelques Ko) et au plus jobs × 2 lots en vol.
+    """
+    if jobs <= 1:
+        _init_worker(pages)
+        yield from map(parse_export, items)
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(pages,)) as pool:
+        pending = set()
+        for batch in _batches(items, BATCH_SIZE):
+            pending.add(pool.submit(parse_batch, batch))
+            if len(pending) >= jobs * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in pending:
+            yield from future.result()
+
+
+# ---------------------------------------------------------------------------
+# Agrégats
+# ---------------------------------------------------------------------------
+
+def new_stats(pages: list) -> list:
+    stats = []
+    for page in pages:
+        blocks = []
+        for block in page['blocks']:
+            entry = {'id': block['id'], 'type': block['type'], 'label': block['label'], 'answers': 0}
+            if block['type'] == 'answer':
+                entry.update(empty=0, chars=0)
+            elif block['type'] == 'qcm':
+                entry.update(items=block['items'], checked=[0] * len(block['items']), none=0)
+            else:
+                entry.update(holes=[Counter() for _ in HOLE_RE.findall(block['template'])],
+                             empty=[0] * len(HOLE_RE.findall(block['template'])))
+            blocks.append(entry)
+        stats.append({'docname': page['docname'], 'title': page['title'],
+                      'submissions': 0, 'blocks': blocks})
+    return stats
+
+
+def add_answers(page_stats: dict, answers: dict) -> None:
+    page_stats['submissions'] += 1
+    for idx, value in answers.items():
+        entry = page_stats['blocks'][idx]
+        entry['answers'] += 1
+        if entry['type'] == 'answer':
+            if value:
+                entry['chars'] += len(value)
+            else:
+                entry['empty'] += 1
+        elif entry['type'] == 'qcm':
+            if not any(value):
+                entry['none'] += 1
+            for i, checked in enumerate(value[:len(entry['checked'])]):
+                entry['checked'][i] += checked
+        else:
+            for i, fill in enumerate(value[:len(entry['holes'])]):
+                if fill:
+                    entry['holes'][i][fill] += 1
+                else:
+                    entry['empty'][i] += 1
+
+
+def to_json(stats: list, files: int, unmatched: list, skipped: int) -> dict:
+    pages = []
+    for page in stats:
+        if not page['submissions']:
+            continue
+        blocks = []
+        for entry in page['blocks']:
+            entry = dict(entry)
+            if entry['type'] == 'answer':
+                filled = entry['answers'] - entry['empty']
+                chars = entry.pop('chars')
+                entry['mean_chars'] = round(chars / filled, 1) if filled else 0
+            elif entry['type'] == 'hole':
+                entry['holes'] = [dict(c.most_common()) for c in entry['holes']]
+            blocks.append(entry)
+        pages.append(dict(page, blocks=blocks))
+    return {'files': files, 'unmatched': unmatched, 'skipped_sections': skipped, 'pages': pages}
+
+
+def csv_rows(report: dict):
+    yield ('page', 'block', 'type', 'label', 'key', 'value', 'count')
+    for page in report['pages']:
+        doc = page['docname']
+        for b in page['blocks']:
+            base = (doc, b['id'], b['type'], b['label'])
+            yield base + ('answers', '', b['answers'])
+            if b['type'] == 'answer':
+                yield base + ('empty', '', b['empty'])
+                yield base + ('mean_chars', '', b['mean_chars'])
+            elif b['type'] == 'qcm':
+                yield base + ('none', '', b['none'])
+                for item, count in zip(b['items'], b['checked']):
+                    yield base + ('checked', item, count)
+            else:
+                for i, (values, empty) in enumerate(zip(b['holes'], b['empty']), 1):
+                    yield base + (f'hole{i}', '', empty)
+                    for value, count in values.items():
+                        yield base + (f'hole{i}', value, count)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='tardis-answers',
+                                     description='Dépouillement des réponses exportées')
+    parser.add_argument('sources', nargs='+', help='dossiers, archives .zip ou fichiers .md')
+    parser.add_argument('--site', required=True,
+                        help='site HTML généré (contient _tardis/exercises.json)')
+    parser.add_argument('-o', '--output', default='', help='rapport .json ou .csv')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='processus de travail (défaut: nombre de CPU)')
+    args = parser.parse_args(argv)
+
+    started = time.monotonic()
+    try:
+        pages = load_site(args.site)
+    except (OSError, ValueError) as exc:
+        print(f'❌ site illisible ({exc}) — build HTML requis', file=sys.stderr)
+        return 1
+    if not pages:
+        print('❌ aucune page avec des blocs de réponse dans le site', file=sys.stderr)
+        return 1
+
+    stats = new_stats(pages)
+    files, skipped, unmatched = 0, 0, []
+    for name, page_idx, answers, ignored in run_parallel(iter_sources(args.sources), pages, args.jobs):
+        files += 1
+        skipped += ignored
+        if page_idx is None:
+            unmatched.append(name)
+            continue
+        add_answers(stats[page_idx], answers)
+
+    report = to_json(stats, files, unmatched, skipped)
+    if args.output.endswith('.csv'):
+        with open(args.output, 'w', encoding='utf-8', newline='') as fh:
+            csv.writer(fh).writerows(csv_rows(report))
+    elif args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+    else:
+        for page in report['pages']:
+            print(f"📄 {page['docname']} — {page['submissions']} copie(s)")
+            for b in page['blocks']:
+                print(f"   {b['type']:<6} {b['label'][:60]} : {b['answers']} réponse(s)")
+
+    for name in unmatched[:20]:
+        print(f'⚠️  aucune page correspondante : {name}', file=sys.stderr)
+    if len(unmatched) > 20:
+        print(f'⚠️  … et {len(unmatched) - 20} autre(s)', file=sys.stderr)
+    print(f'✅ {files} fichier(s), {files - len(unmatched)} associé(s), '
+          f'{skipped} section(s) ignorée(s) en {time.monotonic() - started:.2f}s'
+          + (f' → {args.output}' if args.output else ''))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Cache de résultats par empreinte de contenu
+----------------------------------------------------
+Petits utilitaires partagés par les drivers Python de scripts/ :
+
+- sha256_file / hash_files : empreinte stable d'un fichier ou d'un ensemble
+  de fichiers (chemins relatifs inclus → un renommage invalide le cache) ;
+- ResultCache : répertoire de cache contenant les artefacts produits
+  (<clé>.<ext>) et un index JSON docname → clé.
+
+Les clés ne dépendent que du contenu : un checkout frais (mtime neufs) ou un
+cache restauré par actions/cache reste valide tant que les sources n'ont pas
+changé.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+_CHUNK = 1 << 20
+
+
+def sha256_file(path: str) -> str:
+    """Empreinte SHA-256 (hex) du contenu d'un fichier."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def iter_files(root: str):
+    """Parcourt récursivement `root` dans un ordre déterministe."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            yield os.path.join(dirpath, name)
+
+
+def hash_files(paths, root: str | None = None, extra=()) -> str:
+    """Empreinte combinée d'une liste de fichiers et/ou de dossiers.
+
+    Les dossiers sont parcourus récursivement ; les chemins absents sont
+    ignorés. `extra` permet d'ajouter des chaînes (variables d'env, options)
+    à l'empreinte.
+    """
+    h = hashlib.sha256()
+    for path in paths:
+        if os.path.isdir(path):
+            files = list(iter_files(path))
+        elif os.path.isfile(path):
+            files = [path]
+        else:
+            continue
+        for f in files:
+            rel = os.path.relpath(f, root) if root else f
+            h.update(rel.replace(os.sep, '/').encode('utf-8') + b'\0')
+            h.update(sha256_file(f).encode('ascii') + b'\0')
+    for value in extra:
+        h.update(str(value).encode('utf-8') + b'\0')
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Cache d'artefacts adressés par clé de contenu.
+
+    Arborescence :
+        <cache_dir>/objects/<clé><ext>   artefact produit
+        <cache_dir>/index.json           {nom: clé} du dernier build
+    """
+
+    def __init__(self, cache_dir: str, ext: str = ''):
+        self.cache_dir = cache_dir
+        self.ext = ext
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        try:
+            with open(self.index_path, encoding='utf-8') as fh:
+                self.index = json.load(fh)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.objects_dir, key + self.ext)
+
+    def has(self, key: str) -> bool:
+        return os.path.isfile(self.path_for(key))
+
+    def store(self, name: str, key: str, artefact: str) -> None:
+        """Copie l'artefact produit dans le cache et met à jour l'index."""
+        shutil.copy2(artefact, self.path_for(key))
+        self.index[name] = key
+
+    def restore(self, name: str, key: str, dest: str) -> None:
+        """Copie l'artefact en cache vers `dest`."""
+        os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+        shutil.copy2(self.path_for(key), dest)
+        self.index[name] = key
+
+    def prune(self) -> int:
+        """Supprime les objets qui ne sont plus référencés par l'index."""
+        live = {k + self.ext for k in self.index.values()}
+        removed = 0
+        for entry in os.listdir(self.objects_dir):
+            if entry not in live:
+                os.remove(os.path.join(self.objects_dir, entry))
+                removed += 1
+        return removed
+
+    def save(self) -> None:
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(self.index, fh, indent=2, sort_keys=True)
+        os.replace(tmp, self.index_path)
@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Lint MyST des supports de cours (sans build Sphinx)
+------------------------------------------------------------
+Vérifie en quelques dixièmes de seconde ce qu'un build Sphinx ne signale
+qu'après plusieurs minutes (ou pas du tout) :
+
+    {qcm}          lignes :correct:/:wrong: avalées par le bloc d'options
+                   (ligne vide manquante), aucune bonne réponse, QCU avec
+                   plusieurs bonnes réponses, lignes ignorées
+    {card}         :width:/:height: invalides (_parse_len), couleurs
+                   :bg:/:accent: invalides ou vidées par un `#` non protégé
+                   (_normalize_hex_color), image introuvable
+    {hole-answer}  aucun trou [___], tableau aux lignes de largeur inégale
+    {html}         fichier absent de html/, options hors data-* (_DATA_ATTR_RE)
+    {video}        fichier absent de video/
+    toutes         options inconnues ou invalides (analyse MyST), id en double
+
+Le Markdown est découpé par le tokenizer MyST uniquement (pas de docutils
+ni de Sphinx) ; les options sont analysées avec les option_spec et les
+helpers des extensions, comme au build. Les fichiers sont vérifiés en
+parallèle au-delà de LINT_PARALLEL_MIN fichiers.
+
+Sortie : `chemin:ligne: niveau [directive] message` ; code 1 si au moins
+une erreur (ou un avertissement avec --strict).
+
+Usage :
+    python tardis-pipelines/scripts/tardis_lint.py                 # $TARDIS_DOCS_DIR
+    python tardis-pipelines/scripts/tardis_lint.py chap1/ exo.md --strict
+
+Pre-commit (dépôt de cours, .pre-commit-config.yaml) :
+    - repo: local
+      hooks:
+        - id: tardis-lint
+          name: tardis-lint
+          entry: python tardis-pipelines/scripts/tardis_lint.py
+          language: system
+          types: [markdown]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(SCRIPT_DIR), 'extensions'))
+
+from markdown_it.renderer import RendererHTML  # noqa: E402
+from myst_parser.config.main import MdParserConfig  # noqa: E402
+from myst_parser.parsers.directives import parse_directive_text  # noqa: E402
+from myst_parser.parsers.mdit import create_md_parser  # noqa: E402
+
+from tardis_cards import CardDirective, _normalize_hex_color, _parse_len  # noqa: E402
+from tardis_html import _DATA_ATTR_RE, HtmlIncludeDirective  # noqa: E402
+from tardis_qcm import QcmDirective, _bool  # noqa: E402
+from tardis_textarea import (  # noqa: E402
+    HOLE_RE, AnswerBlockDirective, ExportAnswersDirective, HoleAnswerDirective,
+    QcmAnswerDirective,
+)
+from tardis_video import VideoDirective  # noqa: E402
+
+DOCS = os.getenv('TARDIS_DOCS_DIR') or os.path.join(
+    os.getenv('TARDIS_UNITS_DIR', 'b-UnitesEnseignement'), 'Support')
+# ~0,5 ms par fichier : en dessous, le démarrage du pool coûte plus qu'il ne rapporte
+PARALLEL_MIN = int(os.getenv('LINT_PARALLEL_MIN', '400'))
+_SKIP_DIRS = ('_build', 'node_modules')
+
+DIRECTIVES = {
+    'qcm': QcmDirective,
+    'card': CardDirective,
+    'html': HtmlIncludeDirective,
+    'video': VideoDirective,
+    'answer': AnswerBlockDirective,
+    'qcm-answer': QcmAnswerDirective,
+    'hole-answer': HoleAnswerDirective,
+    'export-answers': ExportAnswersDirective,
+}
+
+_NAME_RE = re.compile(r'^\{([^}\s]+)\}\s*(.*)$')
+_BOOL_VALUES = ('1', 'true', 'yes', 'on', 'y', 't', '0', 'false', 'no', 'off', 'n', 'f', '')
+_TABLE_SEP_RE = re.compile(r'^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$')
+
+_md = create_md_parser(MdParserConfig(enable_extensions={'colon_fence'}), RendererHTML)
+
+
+# ---------------------------------------------------------------------------
+# Analyse d'un fichier
+# ---------------------------------------------------------------------------
+
+class FileLinter:
+    """Vérifie un fichier Markdown ; `problems` : [(ligne, niveau, directive, message)]."""
+
+    def __init__(self, path: str, srcdir: str = ''):
+        self.path = path
+        self.docdir = os.path.dirname(path)
+        self.srcdir = srcdir
+        self.problems = []
+        self.ids = {}
+
+    def report(self, line: int, level: str, name: str, message: str) -> None:
+        self.problems.append((line, level, name, message))
+
+    def run(self):
+        with open(self.path, encoding='utf-8') as fh:
+            self.lint_text(fh.read(), 0)
+        return self.problems
+
+    def lint_text(self, text: str, offset: int) -> None:
+        for token in _md.parse(text):
+            if token.type not in ('fence', 'colon_fence') or not token.map:
+                continue
+            m = _NAME_RE.match(token.info.strip())
+            if not m:
+                continue
+            name, first_line = m.group(1), m.group(2)
+            line = offset + token.map[0] + 1
+            directive = DIRECTIVES.get(name)
+            if directive is None:
+                # Admonitions, onglets… : les directives TARDIS imbriquées sont vérifiées
+                self.lint_text(token.content, line)
+                continue
+            parsed = parse_directive_text(directive, first_line, token.content, line=line)
+            check = getattr(self, 'check_' + name.replace('-', '_'), None)
+            if check:
+                # Une vérification peut retirer de parsed.warnings ce qu'elle explique mieux
+                check(name, parsed, line, line + 1 + parsed.body_offset)
+            self.check_id(name, parsed, line)
+            for warning in parsed.warnings:
+                self.report(warning.lineno or line, 'warning', name, warning.msg)
+
+    # -- Directives -----------------------------------------------------------
+
+    def check_id(self, name, parsed, line) -> None:
+        explicit = parsed.options.get('id') if name == 'qcm' else \
+            (parsed.arguments[0] if parsed.arguments and name != 'html' and name != 'video' else '')
+        if not explicit:
+            return
+        if explicit in self.ids:
+            self.report(line, 'error', name,
+                        f"id « {explicit} » déjà utilisé ligne {self.ids[explicit]} "
+                        "(réponses des élèves écrasées)")
+        else:
+            self.ids[explicit] = line
+
+    def check_qcm(self, name, parsed, line, body_line) -> None:
+        swallowed = [k for k in parsed.options if k in ('correct', 'wrong')]
+        unknown = [w for w in parsed.warnings if 'correct' in w.msg or 'wrong' in w.msg]
+        if swallowed or unknown:
+            self.report(line, 'error', name,
+                        "lignes :correct:/:wrong: lues comme options : "
+                        "ajouter une ligne vide après les options")
+            parsed.warnings[:] = [w for w in parsed.warnings if w not in unknown]
+        value = parsed.options.get('multiple_answers')
+        if value is not None and str(value).strip().lower() not in _BOOL_VALUES:
+            self.report(line, 'warning', name,
+                        f":multiple_answers: {value!r} non reconnu, lu comme {_bool(value)}")
+        multiple = _bool(parsed.options.get('multiple_answers', 'true'))
+
+        correct = wrong = 0
+        for i, raw in enumerate(parsed.body):
+            text = raw.strip()
+            if not text:
+                continue
+            if text.startswith(':correct:'):
+                correct += bool(text[len(':correct:'):].strip())
+            elif text.startswith(':wrong:'):
+                wrong += bool(text[len(':wrong:'):].strip())
+            else:
+                self.report(body_line + i, 'warning', name,
+                            "ligne ignorée (attendu :correct: ou :wrong:)")
+        if swallowed or unknown:
+            return
+        if not correct:
+            self.report(line, 'error', name, "aucune réponse :correct:")
+        elif not multiple and correct > 1:
+            self.report(line, 'error', name,
+                        f"QCU (:multiple_answers: false) avec {correct} bonnes réponses")
+        if correct + wrong < 2:
+            self.report(line, 'warning', name, "moins de deux propositions")
+
+    def check_card(self, name, parsed, line, body_line) -> None:
+        for key in ('width', 'height'):
+            try:
+                _parse_len(parsed.options.get(key))
+            except ValueError as exc:
+                self.report(line, 'error', name, f":{key}: {exc}")
+        for key in ('bg', 'accent'):
+            if key not in parsed.options:
+                continue
+            value = parsed.options[key]
+            if not (value or '').strip():
+                self.report(line, 'error', name,
+                            f":{key}: vide — un # non protégé commence un commentaire, "
+                            f"écrire :{key}: \"#rrggbb\"")
+                parsed.warnings[:] = [w for w in parsed.warnings if '# comments' not in w.msg]
+            elif _normalize_hex_color(value) is None:
+                self.report(line, 'error', name, f":{key}: couleur hexadécimale invalide {value!r}")
+        image = parsed.options.get('image')
+        if image and '://' not in image and not image.startswith('data:'):
+            if image.startswith('/'):
+                target = os.path.join(self.srcdir, image.lstrip('/')) if self.srcdir else ''
+            else:
+                target = os.path.join(self.docdir, image)
+            if target and not os.path.isfile(target):
+                self.report(line, 'error', name, f"image introuvable : {image}")
+
+    def check_hole_answer(self, name, parsed, line, body_line) -> None:
+        content = '\n'.join(parsed.body)
+        if not HOLE_RE.search(content):
+            self.report(line, 'error', name, "aucun trou [___] dans le contenu")
+        rows = [(i, raw.strip()) for i, raw in enumerate(parsed.body) if raw.strip().startswith('|')]
+        if not rows:
+            return
+        width = None
+        for pos, (i, row) in enumerate(rows):
+            cells = len(row.strip('|').split('|'))
+            if pos == 1 and not _TABLE_SEP_RE.match(row):
+                self.report(body_line + i, 'error', name,
+                            "ligne de séparation |---| manquante sous l'en-tête")
+            if width is None:
+                width = cells
+            elif cells != width:
+                self.report(body_line + i, 'error', name,
+                            f"ligne de tableau à {cells} cellule(s), en-tête à {width}")
+
+    def _check_adjacent(self, name, folder, parsed, line) -> None:
+        if not parsed.arguments:
+            return
+        filename = parsed.arguments[0].strip()
+        if not os.path.isfile(os.path.join(self.docdir, folder, filename)):
+            self.report(line, 'error', name, f"fichier introuvable : {folder}/{filename}")
+
+    def check_html(self, name, parsed, line, body_line) -> None:
+        self._check_adjacent(name, 'html', parsed, line)
+        for key in parsed.options:
+            if not _DATA_ATTR_RE.match(key):
+                self.report(line, 'warning', name,
+                            f"option ignorée (doit être 'data-*' en minuscules) : {key}")
+
+    def check_video(self, name, parsed, line, body_line) -> None:
+        self._check_adjacent(name, 'video', parsed, line)
+
+
+def lint_file(path: str, srcdir: str = ''):
+    try:
+        return path, FileLinter(path, srcdir).run()
+    except (OSError, UnicodeDecodeError) as exc:
+        return path, [(0, 'error', '-', f"lecture impossible : {exc}")]
+
+
+# ---------------------------------------------------------------------------
+# Fichiers
+# ---------------------------------------------------------------------------
+
+def collect(paths) -> list:
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            if path.endswith('.md'):
+                files.append(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(d for d in dirnames
+                                 if not d.startswith('.') and d not in _SKIP_DIRS)
+            files.extend(os.path.join(dirpath, f) for f in sorted(filenames) if f.endswith('.md'))
+    return files
+
+
+def lint(files, srcdir: str, jobs: int):
+    if jobs > 1 and len(files) >= PARALLEL_MIN:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            chunksize = max(1, len(files) // (jobs * 4))
+            return list(pool.map(lint_file, files, [srcdir] * len(files), chunksize=chunksize))
+    return [lint_file(path, srcdir) for path in files]
+
+
+# ---------------------------------------------------------------------------
+# MAIN
+# ---------------------------------------------------------------------------
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='tardis-lint', description='Lint MyST des supports TARDIS')
+    parser.add_argument('paths', nargs='*', help=f'fichiers .md ou dossiers (défaut: {DOCS})')
+    parser.add_argument('--srcdir', default='',
+                        help='racine Sphinx pour les images absolues (défaut: dossier unique passé)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='processus (défaut: nb CPU)')
+    parser.add_argument('--strict', action='store_true', help='les avertissements font échouer')
+    args = parser.parse_args(argv)
+
+    started = time.monotonic()
+    paths = args.paths or [DOCS]
+    srcdir = args.srcdir or (paths[0] if len(paths) == 1 and os.path.isdir(paths[0]) else '')
+    files = collect(paths)
+
+    errors = warnings = 0
+    for path, problems in lint(files, srcdir, max(1, args.jobs)):
+        for line, level, name, message in sorted(problems):
+            print(f'{path}:{line}: {level} [{name}] {message}')
+            if level == 'error':
+                errors += 1
+            else:
+                warnings += 1
+
+    status = '❌' if errors or (args.strict and warnings) else '✓'
+    print(f'{status} {len(files)} fichier(s) vérifié(s) en {time.monotonic() - started:.2f}s : '
+          f'{errors} erreur(s), {warnings} avertissement(s)', file=sys.stderr)
+    return 1 if errors or (args.strict and warnings) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
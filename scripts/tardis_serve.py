@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+TARDIS - Serveur de prévisualisation (tardis.py serve)
+------------------------------------------------------
+Garde une application Sphinx « chaude » en mémoire (imports, extensions,
+thème, environnement déjà lus) et reconstruit à chaque enregistrement :
+
+- le dossier source est surveillé par scrutation (stat, pas de dépendance) :
+  Markdown, mais aussi html/ et video/ adjacents — tardis_html et
+  tardis_video les déclarent comme dépendances de leur document, Sphinx ne
+  relit donc que les documents concernés ;
+- _toc.yml modifié → nouvelle application (le sommaire est lu à l'init) ;
+- le site est servi sous le chemin de html_baseurl (/cours/ en local) ;
+- index de recherche et index général désactivés par défaut : les relire et
+  les réécrire coûte plus que la page modifiée (--search pour les garder) ;
+- chaque page reçoit un petit script relié à /__tardis/ws (WebSocket) :
+  après un build, les pages réécrites se rechargent d'elles-mêmes (toutes
+  si _toc.yml, _static/ ou _templates/ ont changé).
+
+Un build en erreur est affiché et le serveur continue. Les avertissements
+Sphinx s'affichent dans le terminal, le reste dans <out>/serve.log.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+
+WS_PATH = '/__tardis/ws'
+_WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+POLL_INTERVAL = 0.2
+# Dossiers jamais surveillés (sorties de build, dépôts, caches)
+_IGNORED_DIRS = ('_build', '.git', '__pycache__', 'node_modules')
+# Dossiers du module dont un changement recharge tous les onglets
+_SHARED_DIRS = ('_static', '_templates')
+
+RELOAD_JS = """\
+(function () {
+  var root = document.documentElement.dataset.content_root || "./";
+  var page = new URL(location.href);
+  var base = new URL(root, location.href).pathname;
+  var rel = decodeURIComponent(page.pathname.slice(base.length)) || "index.html";
+  if (rel.endsWith("/")) rel += "index.html";
+  function connect() {
+    var ws = new WebSocket((location.protocol === "https:" ? "wss://" : "ws://") + location.host + "__WS__");
+    ws.onmessage = function (e) {
+      var msg = JSON.parse(e.data);
+      if (msg.all || (msg.pages || []).indexOf(rel) >= 0) location.reload();
+    };
+    ws.onclose = function () { setTimeout(connect, 1000); };
+  }
+  connect();
+})();"""
+
+
+# ---------------------------------------------------------------------------
+# WebSocket minimal (serveur → navigateur uniquement)
+# ---------------------------------------------------------------------------
+
+class ReloadHub:
+    """Connexions WebSocket ouvertes ; diffuse les messages de rechargement."""
+
+    def __init__(self):
+        self._clients = set()
+        self._lock = threading.Lock()
+
+    def add(self, wfile):
+        with self._lock:
+            self._clients.add(wfile)
+
+    def remove(self, wfile):
+        with self._lock:
+            self._clients.discard(wfile)
+
+    def broadcast(self, message: dict) -> int:
+        payload = json.dumps(message).encode('utf-8')
+        if len(payload) < 126:
+            header = struct.pack('!BB', 0x81, len(payload))
+        elif len(payload) < 1 << 16:
+            header = struct.pack('!BBH', 0x81, 126, len(payload))
+        else:
+            header = struct.pack('!BBQ', 0x81, 127, len(payload))
+        sent = 0
+        with self._lock:
+            for wfile in list(self._clients):
+                try:
+                    wfile.write(header + payload)
+                    wfile.flush()
+                    sent += 1
+                except OSError:
+                    self._clients.discard(wfile)
+        return sent
+
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    """Fichiers du site sous `prefix`, et WebSocket de rechargement sur WS_PATH."""
+
+    def __init__(self, *args, prefix='/', hub=None, **kwargs):
+        self.prefix = prefix
+        self.hub = hub
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == WS_PATH and self.headers.get('Upgrade', '').lower() == 'websocket':
+            return self._websocket()
+        if not path.startswith(self.prefix):
+            self.send_response(302)
+            self.send_header('Location', self.prefix)
+            self.end_headers()
+            return None
+        return super().do_GET()
+
+    def translate_path(self, path):
+        path = urlsplit(path).path
+        return super().translate_path('/' + unquote(path)[len(self.prefix):])
+
+    def _websocket(self):
+        key = self.headers.get('Sec-WebSocket-Key', '')
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+        self.send_response(101, 'Switching Protocols')
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', accept)
+        self.end_headers()
+        self.wfile.flush()
+        self.hub.add(self.wfile)
+        try:
+            # Trames du navigateur ignorées ; on attend la fermeture
+            while True:
+                head = self.rfile.read(2)
+                if len(head) < 2 or head[0] & 0x0F == 0x8:
+                    break
+                length = head[1] & 0x7F
+                if length == 126:
+                    length = struct.unpack('!H', self.rfile.read(2))[0]
+                elif length == 127:
+                    length = struct.unpack('!Q', self.rfile.read(8))[0]
+                self.rfile.read(length + (4 if head[1] & 0x80 else 0))
+        except OSError:
+            pass
+        finally:
+            self.hub.remove(self.wfile)
+            self.close_connection = True
+
+
+# ---------------------------------------------------------------------------
+# Surveillance des sources
+# ---------------------------------------------------------------------------
+
+def snapshot(srcdir: str, skip=()) -> dict:
+    """{chemin: (mtime_ns, taille)} des fichiers du module (hors dossiers `skip`)."""
+    state = {}
+    stack = [srcdir]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if not entry.name.startswith(_IGNORED_DIRS) and entry.path not in skip:
+                    stack.append(entry.path)
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            state[entry.path] = (st.st_mtime_ns, st.st_size)
+    return state
+
+
+def changed_paths(old: dict, new: dict) -> list:
+    return sorted(p for p in old.keys() | new.keys() if old.get(p) != new.get(p))
+
+
+# ---------------------------------------------------------------------------
+# Application Sphinx chaude
+# ---------------------------------------------------------------------------
+
+class WarmSphinx:
+    """Application Sphinx réutilisée d'un build à l'autre."""
+
+    def __init__(self, srcdir: str, outdir: str, doctreedir: str, log, search: bool = False):
+        self.srcdir = srcdir
+        self.search = search
+        self.outdir = outdir
+        self.doctreedir = doctreedir
+        self.log = log
+        self.app = None
+        self.read = []
+        self.written = []
+        self._namespace = None
+
+    def create(self):
+        """(Re)crée l'application, dans ses propres registres docutils."""
+        from sphinx.application import Sphinx
+        from sphinx.util.docutils import docutils_namespace, patch_docutils
+
+        self.close()
+        self.app = None
+        self._namespace = ExitStack()
+        self._namespace.enter_context(patch_docutils(BASE_DIR))
+        self._namespace.enter_context(docutils_namespace())
+        app = Sphinx(srcdir=self.srcdir, confdir=BASE_DIR, outdir=self.outdir,
+                     doctreedir=self.doctreedir, buildername='html',
+                     confoverrides={} if self.search else {'html_use_index': False},
+                     status=self.log, warning=sys.stderr)
+        app.builder.search = self.search
+        app.add_js_file(None, body=RELOAD_JS.replace('__WS__', WS_PATH))
+        app.connect('env-before-read-docs', lambda _app, _env, docnames: self.read.extend(docnames))
+        app.connect('html-page-context', self._note_page)
+        self.app = app
+
+    def _note_page(self, app, pagename, templatename, context, doctree):
+        self.written.append(app.builder.get_target_uri(pagename) or 'index.html')
+
+    def build(self, force_all: bool = False) -> int:
+        self.read, self.written = [], []
+        self.app.build(force_all=force_all)
+        return self.app.statuscode
+
+    def close(self):
+        if self._namespace is not None:
+            self._namespace.close()
+        self._namespace = None
+
+
+def serve(srcdir: str, out: str, host: str, port: int, module: str, search: bool = False) -> int:
+    srcdir = os.path.abspath(srcdir)
+    if not os.path.isdir(srcdir):
+        print(f'❌ Dossier source introuvable: {srcdir}', file=sys.stderr)
+        return 1
+    if module:
+        os.environ['ICT_MODULE'] = module
+    out = os.path.abspath(out)
+    outdir = os.path.join(out, 'html')
+    os.makedirs(outdir, exist_ok=True)
+
+    with open(os.path.join(out, 'serve.log'), 'a', encoding='utf-8') as log:
+        warm = WarmSphinx(srcdir, outdir, os.path.join(out, '.doctrees'), log,
+                          search)
+        started = time.monotonic()
+        warm.create()
+        code = warm.build()
+        print(f'📖 build initial : {len(warm.read)} document(s) en '
+              f'{time.monotonic() - started:.1f}s{" ⚠️  en erreur" if code else ""}')
+
+        prefix = urlsplit(warm.app.config.html_baseurl or '/').path or '/'
+        if not prefix.endswith('/'):
+            prefix += '/'
+        hub = ReloadHub()
+        handler = partial(PreviewHandler, directory=outdir, prefix=prefix, hub=hub)
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f'🌐 http://{host}:{port}{prefix} — Ctrl+C pour arrêter')
+
+        state = snapshot(srcdir, (out,))
+        try:
+            while True:
+                time.sleep(POLL_INTERVAL)
+                new_state = snapshot(srcdir, (out,))
+                changes = changed_paths(state, new_state)
+                if not changes:
+                    continue
+                # Laisse l'éditeur finir d'écrire (enregistrements en plusieurs temps)
+                time.sleep(0.05)
+                new_state = snapshot(srcdir, (out,))
+                changes = changed_paths(state, new_state)
+                state = new_state
+
+                began = time.monotonic()
+                rel = [os.path.relpath(p, srcdir) for p in changes]
+                toc_changed = '_toc.yml' in rel
+                try:
+                    if toc_changed or warm.app is None:
+                        warm.create()
+                    # Nouveau sommaire : liens suivant/précédent et navigation de toutes les pages
+                    code = warm.build(force_all=toc_changed)
+                except Exception as exc:  # une erreur de source ne doit pas arrêter le serveur
+                    print(f'❌ {type(exc).__name__}: {exc}', file=sys.stderr)
+                    continue
+                # Sommaire ou assets partagés : toutes les pages sont concernées
+                shared = toc_changed or any(r.split(os.sep)[0] in _SHARED_DIRS for r in rel)
+                message = {'all': shared, 'pages': warm.written}
+                clients = hub.broadcast(message)
+                names = ', '.join(rel[:3])
+                print(f'♻️  {names}{"…" if len(rel) > 3 else ""} → {len(warm.read)} relu(s), '
+                      f'{len(warm.written)} page(s) en {time.monotonic() - began:.2f}s, '
+                      f'{clients} onglet(s) rechargé(s){" ⚠️  en erreur" if code else ""}')
+        except KeyboardInterrupt:
+            print('\n👋 arrêt du serveur')
+        finally:
+            server.shutdown()
+            warm.close()
+    return 0
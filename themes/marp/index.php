@@ -1,44 +1,57 @@
 <?php
 // --- Configuration ---
-$baseDir = __DIR__;
-$slidesDir = $baseDir;
+// Index généré au build par scripts/build_marp.py : aucun scandir à la requête
+$indexFile = __DIR__ . DIRECTORY_SEPARATOR . 'decks.json';
 $baseUrl = './';
 
-// --- Fonction récursive pour scanner les dossiers ---
-function scanSlidesHierarchy($dir, $baseUrl = './') {
-    $structure = [
-        'folders' => [],
-        'slides' => []
-    ];
-
-    if (!is_dir($dir)) return $structure;
-
-    $items = scandir($dir);
-    $items = array_diff($items, ['.', '..']);
-    natsort($items);
-
-    foreach ($items as $item) {
-        $fullPath = $dir . DIRECTORY_SEPARATOR . $item;
+// --- Lecture de l'index + en-têtes de cache ---
+$index = is_file($indexFile) ? json_decode((string) file_get_contents($indexFile), true) : null;
+$decks = is_array($index['decks'] ?? null) ? $index['decks'] : [];
+$combined = $index['combined'] ?? null;
+
+$etag = '"' . ($index['hash'] ?? 'none') . '-' . filemtime(__FILE__) . '"';
+header('ETag: ' . $etag);
+header('Cache-Control: public, max-age=300, must-revalidate');
+if (trim($_SERVER['HTTP_IF_NONE_MATCH'] ?? '') === $etag) {
+    http_response_code(304);
+    exit;
+}
 
-        if (is_dir($fullPath)) {
-            $subStructure = scanSlidesHierarchy($fullPath, $baseUrl . rawurlencode($item) . '/');
-            if (!empty($subStructure['slides']) || !empty($subStructure['folders'])) {
-                $structure['folders'][$item] = $subStructure;
+// --- Hiérarchie dossiers / slides à partir de l'index ---
+function buildHierarchy(array $decks) {
+    $root = ['folders' => [], 'slides' => []];
+    foreach ($decks as $deck) {
+        $node = &$root;
+        $folder = (string) ($deck['folder'] ?? '');
+        foreach ($folder === '' ? [] : explode('/', $folder) as $part) {
+            if (!isset($node['folders'][$part])) {
+                $node['folders'][$part] = ['folders' => [], 'slides' => []];
             }
-        } elseif (strtolower(pathinfo($item, PATHINFO_EXTENSION)) === 'html' && $item !== 'index.php') {
-            $structure['slides'][$item] = [
-                'name' => preg_replace('/\.html$/', '', $item),
-                'path' => $baseUrl . rawurlencode($item),
-                'file' => $item
-            ];
+            $node = &$node['folders'][$part];
         }
+        $node['slides'][] = $deck;
+        unset($node);
     }
+    return $root;
+}
 
-    return $structure;
+function deckUrl($baseUrl, $rel) {
+    return $baseUrl . implode('/', array_map('rawurlencode', explode('/', $rel)));
+}
+
+function formatSize($bytes) {
+    if ($bytes === null) return '';
+    if ($bytes >= 1048576) return number_format($bytes / 1048576, 1, ',', ' ') . ' Mo';
+    return max(1, (int) round($bytes / 1024)) . ' Ko';
+}
+
+function formatDate($iso) {
+    $ts = $iso ? strtotime($iso) : false;
+    return $ts ? date('d.m.Y', $ts) : '';
 }
 
 // --- Fonction pour afficher la hiérarchie ---
-function renderHierarchy($structure, $level = 0) {
+function renderHierarchy($structure, $baseUrl, $level = 0) {
     $html = '';
     $uniqueId = uniqid('accordion_');
 
@@ -46,16 +59,25 @@ function renderHierarchy($structure, $level = 0) {
     if (!empty($structure['slides'])) {
         $html .= '<div class="slides-grid">';
         foreach ($structure['slides'] as $slide) {
+            $meta = array_filter([
+                'Présentation MARP',
+                formatSize($slide['size'] ?? null),
+                formatDate($slide['modified'] ?? null),
+            ]);
+            $pdf = '';
+            if (!empty($slide['pdf'])) {
+                $pdf = ' · <a href="' . htmlspecialchars(deckUrl($baseUrl, $slide['pdf']), ENT_QUOTES) . '" target="_blank">PDF</a>';
+            }
             $html .= '
             <div class="slide-card">
               <div class="card shadow-sm h-100">
                 <div class="card-body">
                   <h5 class="card-title mb-2">
-                    <a href="' . htmlspecialchars($slide['path'], ENT_QUOTES) . '" target="_blank" class="text-decoration-none">
-                      ' . htmlspecialchars($slide['name'], ENT_QUOTES, 'UTF-8') . '
+                    <a href="' . htmlspecialchars(deckUrl($baseUrl, $slide['html']), ENT_QUOTES) . '" target="_blank" class="text-decoration-none">
+                      ' . htmlspecialchars($slide['title'] ?? $slide['file'], ENT_QUOTES, 'UTF-8') . '
                     </a>
                   </h5>
-                  <p class="card-text text-muted small mb-0">Présentation MARP</p>
+                  <p class="card-text text-muted small mb-0">' . htmlspecialchars(implode(' · ', $meta), ENT_QUOTES, 'UTF-8') . $pdf . '</p>
                 </div>
               </div>
             </div>';
@@ -79,7 +101,7 @@ function renderHierarchy($structure, $level = 0) {
               </div>
               <div id="' . $collapsedId . '" class="collapse" data-parent="#' . $uniqueId . '">
                 <div class="card-body">
-                  ' . renderHierarchy($subStructure, $level + 1) . '
+                  ' . renderHierarchy($subStructure, $baseUrl, $level + 1) . '
                 </div>
               </div>
             </div>';
@@ -92,7 +114,7 @@ function renderHierarchy($structure, $level = 0) {
     return $html;
 }
 
-$hierarchy = scanSlidesHierarchy($slidesDir, $baseUrl);
+$hierarchy = buildHierarchy($decks);
 $hasContent = !empty($hierarchy['slides']) || !empty($hierarchy['folders']);
 ?>
 <!DOCTYPE html>
@@ -274,7 +296,13 @@ $hasContent = !empty($hierarchy['slides']) || !empty($hierarchy['folders']);
         <strong>ℹ️ Aucune présentation trouvée.</strong> Les fichiers HTML générés par MARP apparaîtront ici.
       </div>
     <?php else: ?>
-      <?php echo renderHierarchy($hierarchy); ?>
+      <?php if (!empty($combined['pdf'])): ?>
+        <p class="mb-4">
+          📑 <a href="<?php echo htmlspecialchars(deckUrl($baseUrl, $combined['pdf']), ENT_QUOTES); ?>" target="_blank">Toutes les présentations (PDF)</a>
+          <span class="text-muted small"><?php echo htmlspecialchars(formatSize($combined['size'] ?? null), ENT_QUOTES, 'UTF-8'); ?></span>
+        </p>
+      <?php endif; ?>
+      <?php echo renderHierarchy($hierarchy, $baseUrl); ?>
     <?php endif; ?>
   </div>
 
@@ -14,29 +14,22 @@
     const raw = document.querySelector("h1, h2")?.textContent?.trim() || "Exercices";
     return safeTitleText(raw);
   }
-  function previousHeading(el) {
-    let cur = el.previousElementSibling;
-    while (cur) {
-      const tag = cur.tagName?.toLowerCase();
-      if (tag && /^(h1|h2)$/.test(tag)) return cur;
-      cur = cur.previousElementSibling;
+  // Métadonnées des blocs ({id: {type, label, items, template, holes}}) :
+  // JSON unique #tardis-answers écrit par tardis_textarea, lu une fois par page.
+  // label n'y est que pour les blocs sans label visible (titre de section).
+  let blockMetaById = null;
+  function blockMeta(block) {
+    if (!blockMetaById) {
+      const el = document.getElementById("tardis-answers");
+      try { blockMetaById = el ? JSON.parse(el.textContent) : {}; }
+      catch (e) { blockMetaById = {}; }
     }
-    const p = el.parentElement;
-    if (p) {
-      cur = p.previousElementSibling;
-      while (cur) {
-        const tag = cur.tagName?.toLowerCase();
-        if (tag && /^(h1|h2)$/.test(tag)) return cur;
-        cur = cur.previousElementSibling;
-      }
-    }
-    return null;
+    return blockMetaById[block.dataset.id] || {};
   }
   function getBlockLabel(block) {
-    if (block.dataset.label?.trim()) return block.dataset.label.trim();
-    const h = previousHeading(block);
-    if (h?.textContent) return h.textContent.trim();
-    return block.dataset.id || "Réponse";
+    const label = $(":scope > .answer-label", block)?.textContent?.trim()
+      || blockMeta(block).label;
+    return label || block.dataset.id || "Réponse";
   }
 
   // --------- fallback textarea: autosave (Monaco autosave est dans monaco-init.js) ----------
@@ -128,19 +121,18 @@
       lines.push(`## ${label}`);
 
       if (block.classList.contains("tardis-hole-answer")) {
-        const template = JSON.parse(block.dataset.template || '""');
+        const template = blockMeta(block).template || "";
         const holes = $$(".hole-input", block);
         let idx = 0;
-        const result = template.replace(/\[___\]/g, () => {
+        const result = template.replace(/\[_+\]/g, () => {
           const val = (holes[idx++]?.value || "").trim();
           return val ? `[${val}]` : "[___]";
         });
         lines.push(result);
       } else if (block.classList.contains("tardis-qcm-answer")) {
-        $$("li", block).forEach(li => {
-          const cb = li.querySelector(".tardis-qcm-check");
-          const txt = li.querySelector("label").textContent.trim();
-          lines.push(`- ${cb?.checked ? "[x]" : "[ ]"} ${txt}`);
+        const items = blockMeta(block).items || [];
+        $$(".tardis-qcm-check", block).forEach((cb, idx) => {
+          lines.push(`- ${cb.checked ? "[x]" : "[ ]"} ${(items[idx] || "").trim()}`);
         });
       } else {
         const txt = getBlockText(block);